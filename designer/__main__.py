@@ -1,11 +1,30 @@
-import os.path
+import os
+import sys
 
-from designer.app import DesignerApp
-from designer.utils.utils import get_fs_encoding
-from kivy.resources import resource_add_path
+from designer.utils import startup_profile
+
+
+def check(argv):
+    # the check runs without a window, Kivy must not parse its arguments
+    os.environ.setdefault('KIVY_NO_ARGS', '1')
+    from designer.core.project_checker import main as check_main
+    return check_main(argv)
 
 
 def main():
+    if sys.argv[1:2] == ['check']:
+        sys.exit(check(sys.argv[2:]))
+
+    # must be enabled before Kivy is imported, and removed from the arguments
+    # so Kivy doesn't parse it
+    if '--profile-startup' in sys.argv:
+        sys.argv.remove('--profile-startup')
+        startup_profile.enable()
+
+    from designer.app import DesignerApp
+    from designer.utils.utils import get_fs_encoding
+    from kivy.resources import resource_add_path
+
     data = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
     if isinstance(data, bytes):
         data = data.decode(get_fs_encoding())
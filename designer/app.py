@@ -8,28 +8,25 @@ from distutils.dir_util import copy_tree
 import kivy
 import sys
 
-from designer.components.buildozer_spec_editor import BuildozerSpecEditor
 from designer.components.designer_content import DesignerContent
-from designer.components.dialogs.about import AboutDialog
-from designer.components.dialogs.add_file import AddFileDialog
-from designer.components.dialogs.help import HelpDialog
-from designer.components.dialogs.new_project import (
-    NEW_PROJECTS,
-    NewProjectDialog,
-)
-from designer.components.dialogs.recent import RecentDialog
 from designer.components.edit_contextual_view import EditContView
 from designer.components.playground import PlaygroundDragElement
-from designer.components.run_contextual_view import ModulesContView
 from designer.core.builder import Profiler
-from designer.core.profile_settings import ProfileSettings
+from designer.core.completion import CodeCompletion
+from designer.core.edit_journal import EditJournal
+from designer.core.file_writer import write_files
+from designer.core.introspection import DEFAULT_TIMEOUT, IntrospectionWorker
+from designer.core.profile_settings import (
+    ProfileSettings,
+    load_profile_configs,
+)
 from designer.core.project_manager import ProjectManager, ProjectWatcher
 from designer.core.project_settings import ProjectSettings
 from designer.core.recent_manager import RecentManager
 from designer.core.settings import DesignerSettings
 from designer.core.shortcuts import Shortcuts
+from designer.core.symbol_index import SymbolIndex
 from designer.core.undo_manager import UndoManager
-from designer.tools.bug_reporter import BugReporterApp
 from designer.tools.tools import DesignerTools
 from designer.uix.action_items import DesignerActionProfileCheck
 from designer.uix.confirmation_dialog import (
@@ -38,7 +35,7 @@ from designer.uix.confirmation_dialog import (
 )
 from designer.uix.input_dialog import InputDialog
 from designer.uix.sandbox import DesignerSandbox
-from designer.utils import constants
+from designer.utils import constants, startup_profile, trace
 from designer.utils.toolbox_widgets import toolbox_widgets
 from designer.utils.utils import (
     get_config_dir,
@@ -51,13 +48,13 @@ from designer.utils.utils import (
     show_message,
     update_info,
 )
+from designer.utils.worker import Worker
 from kivy.app import App
 from kivy.base import ExceptionHandler, ExceptionManager
 from kivy.clock import Clock
 from kivy.config import Config
 from kivy.core.window import Window
 from kivy.factory import Factory
-from kivy.garden.xpopup.file import XFileSave, XFileOpen
 from kivy.graphics.context_instructions import Color
 from kivy.graphics.vertex_instructions import Line
 from kivy.properties import (
@@ -89,7 +86,13 @@ class Designer(FloatLayout):
 
     spec_editor = ObjectProperty(None)
     '''Instance of
-        :class:`~designer.components.buildozer_spec_editor.BuildozerSpecEditor`
+        :class:`~designer.components.buildozer_spec_editor.BuildozerSpecEditor`,
+        created by :meth:`get_spec_editor` when it's first displayed
+    '''
+
+    prof_settings = ObjectProperty(None)
+    '''Instance of :class:`~designer.core.profile_settings.ProfileSettings`,
+        created by :meth:`get_prof_settings` when it's first displayed
     '''
 
     designer_tools = ObjectProperty(None)
@@ -206,34 +209,42 @@ class Designer(FloatLayout):
     def __init__(self, **kwargs):
         super(Designer, self).__init__(**kwargs)
         self.project_watcher = ProjectWatcher()
-        self.project_watcher.bind(on_project_modified=self.project_modified)
+        self.project_watcher.bind(on_project_modified=self.project_modified,
+                                  on_files_changed=self.on_files_changed)
         self.project_manager = ProjectManager()
         self.recent_manager = RecentManager()
-        self.spec_editor = BuildozerSpecEditor()
+        self.code_completion = CodeCompletion()
+        self.symbol_index = SymbolIndex()
+        self.io_worker = Worker(name='FileIO')
+        self.edit_journal = EditJournal(self.io_worker)
         self.widget_to_paste = None
 
-        self.designer_settings = DesignerSettings()
-        self.designer_settings.bind(on_config_change=self._config_change)
-        self.designer_settings.load_settings()
-        self.designer_settings.bind(on_close=self.close_popup)
+        with startup_profile.span('DesignerSettings'):
+            self.designer_settings = DesignerSettings()
+            self.designer_settings.bind(on_config_change=self._config_change)
+            self.designer_settings.load_settings()
+            self.designer_settings.bind(on_close=self.close_popup)
 
         self.shortcuts = Shortcuts()
         self.shortcuts.map_shortcuts(self.designer_settings.config_parser)
         self.designer_settings.config_parser.add_callback(
                 self.on_designer_settings)
         self.display_shortcuts()
+        self.set_tracing()
+        self.set_introspection()
+        self.set_project_cache()
 
-        self.prof_settings = ProfileSettings()
-        self.prof_settings.bind(on_close=self.close_popup)
-        self.prof_settings.bind(on_changed=self.on_profiles_changed)
-        self.prof_settings.bind(
-            on_use_this_profile=self._perform_use_this_prof)
-        self.prof_settings.load_profiles()
+        # the build profiles listed in the Run menu. The settings to edit
+        # them are created when they are first displayed
+        with startup_profile.span('load_profile_configs'):
+            self.profile_configs = load_profile_configs()
 
-        self.designer_content = DesignerContent(size_hint=(1, None))
-        self.designer_content = self.designer_content.__self__
+        with startup_profile.span('DesignerContent'):
+            self.designer_content = DesignerContent(size_hint=(1, None))
+            self.designer_content = self.designer_content.__self__
 
-        self.designer_git.bind(on_branch=self.on_git_branch)
+        self.designer_git.bind(on_branch=self.on_git_branch,
+                               status=self.designer_content.on_git_status)
         self.statusbar.bind(on_info_press=self.on_info_press)
 
         Clock.schedule_interval(
@@ -260,6 +271,26 @@ class Designer(FloatLayout):
 
         self.temp_proj_directories = []
 
+    def get_spec_editor(self):
+        '''Returns the buildozer spec editor, creating it on first use
+        '''
+        if self.spec_editor is None:
+            from designer.components.buildozer_spec_editor import \
+                BuildozerSpecEditor
+            self.spec_editor = BuildozerSpecEditor()
+        return self.spec_editor
+
+    def get_prof_settings(self):
+        '''Returns the build profiles settings, creating them on first use
+        '''
+        if self.prof_settings is None:
+            self.prof_settings = ProfileSettings()
+            self.prof_settings.bind(on_close=self.close_popup)
+            self.prof_settings.bind(on_changed=self.on_profiles_changed)
+            self.prof_settings.bind(
+                on_use_this_profile=self._perform_use_this_prof)
+        return self.prof_settings
+
     def _write_window_size(self, *_):
         '''Write updated window size to config
         '''
@@ -416,6 +447,7 @@ class Designer(FloatLayout):
         if self.popup:
             return False
         if self.help_dlg is None:
+            from designer.components.dialogs.help import HelpDialog
             self.help_dlg = HelpDialog()
             self.help_dlg.rst.source = os.path.join(get_kd_dir(), 'help.rst')
 
@@ -453,6 +485,49 @@ class Designer(FloatLayout):
             self._write_window_size()
 
         self.set_escape_exit()
+        self.set_tracing()
+        self.set_introspection()
+        self.set_project_cache()
+
+    def set_tracing(self):
+        '''Enable or disable the trace recording from the designer settings
+        '''
+        config = self.designer_settings.config_parser
+        if int(config.getdefault('global', 'enable_tracing', 0)):
+            trace.enable(int(config.getdefault('global', 'trace_buffer_size',
+                                               trace.DEFAULT_CAPACITY)))
+        else:
+            trace.disable()
+        self.statusbar.update_trace_info()
+
+    def set_introspection(self):
+        '''Starts or stops the process loading the python files of the
+        projects, from the designer settings
+        '''
+        config = self.designer_settings.config_parser
+        worker = self.project_manager.introspection
+        if int(config.getdefault('global', 'introspection_worker', 0)):
+            if worker is None:
+                worker = IntrospectionWorker()
+            worker.timeout = float(config.getdefault(
+                'global', 'introspection_timeout', DEFAULT_TIMEOUT))
+        elif worker is not None:
+            worker.stop()
+            worker = None
+        self.project_manager.introspection = worker
+        self.project_manager.current_project.introspection = worker
+
+    def set_project_cache(self):
+        '''Sets the limits of the projects kept loaded from the designer
+        settings
+        '''
+        config = self.designer_settings.config_parser
+        manager = self.project_manager
+        manager.max_projects = int(config.getdefault(
+            'global', 'max_cached_projects', 5))
+        manager.max_projects_size = float(config.getdefault(
+            'global', 'max_cached_projects_size', 200)) * 1024 * 1024
+        manager.evict_projects()
 
     def on_profiler_error(self, instance, message):
         '''Display an alert if get an error
@@ -556,6 +631,15 @@ class Designer(FloatLayout):
 
         self._proj_modified_outside = True
 
+    def on_files_changed(self, instance, paths):
+        '''Event Handler called with the files modified in the project
+        directory. Updates the Project Tree, the symbol index and the git
+        status
+        '''
+        self.designer_content.update_files(paths)
+        self.symbol_index.update(paths)
+        self.designer_git.update_status(paths)
+
     @ignore_proj_watcher
     def _perform_reload(self, *args):
         '''Perform reload of project after it is modified
@@ -571,7 +655,8 @@ class Designer(FloatLayout):
 
         def reload_spec_editor(*args):
             self.spec_editor.load_settings(proj_path)
-        if os.path.exists(os.path.join(proj_path, 'buildozer.spec')):
+        if self.spec_editor is not None and \
+                os.path.exists(os.path.join(proj_path, 'buildozer.spec')):
             Clock.schedule_once(reload_spec_editor, 1)
 
     def on_show_edit(self, *args):
@@ -751,6 +836,8 @@ class Designer(FloatLayout):
         if self.popup:
             return False
         if self._new_dialog is None:
+            from designer.components.dialogs.new_project import \
+                NewProjectDialog
             self._new_dialog = NewProjectDialog()
             self._new_dialog.bind(on_select=self._perform_new,
                                   on_cancel=self.close_popup)
@@ -763,6 +850,7 @@ class Designer(FloatLayout):
     def _perform_new(self, *args):
         '''To load new project
         '''
+        from designer.components.dialogs.new_project import NEW_PROJECTS
 
         self.close_popup()
 
@@ -808,13 +896,13 @@ class Designer(FloatLayout):
         '''To cleanup everything loaded by the current project before loading
            another project.
         '''
+        self.edit_journal.close()
         self.ui_creator.cleanup()
         self.undo_manager.cleanup()
         self.designer_content.toolbox.cleanup()
         self.designer_content.tab_pannel.cleanup()
 
-        for node in self.proj_tree_view.root.nodes[:]:
-            self.proj_tree_view.remove_node(node)
+        self.proj_tree_view.clear()
 
         for widget in toolbox_widgets[:]:
             if widget[1] == 'custom':
@@ -901,6 +989,8 @@ class Designer(FloatLayout):
         self.ids['actn_menu_tools'].disabled = True
         self.project_manager.close_current_project()
         self.project_watcher.stop_watching()
+        self.code_completion.unload_project()
+        self.symbol_index.clear()
 
     def _show_open_dialog(self, *args):
         '''To show FileBrowser to "Open" a project
@@ -920,6 +1010,7 @@ class Designer(FloatLayout):
 
             self._fbrowser_load(instance)
 
+        from kivy.garden.xpopup.file import XFileOpen
         XFileOpen(title="Open", on_dismiss=open_file_browser, path=def_path)
 
     def _fbrowser_load(self, instance):
@@ -957,8 +1048,22 @@ class Designer(FloatLayout):
         if os.path.isfile(file_path):
             file_path = os.path.dirname(file_path)
 
-        project = self.project_manager.open_project(file_path)
+        self.project_manager.open_project(
+            file_path, on_opened=partial(self._on_project_opened, file_path,
+                                         new_project))
+
+    def _on_project_opened(self, file_path, new_project, project):
+        '''Called when the project opened by :meth:`_perform_open` is parsed
+        '''
+        if project is not self.project_manager.current_project:
+            # another project was opened meanwhile
+            return
+        if self.edit_journal.open(project.path):
+            self.edit_journal.recover(
+                partial(self._on_journal_recovered, project.path))
         self.project_watcher.start_watching(file_path)
+        self.code_completion.load_project(file_path, project.py_list)
+        self.symbol_index.build(project.kv_list + project.py_list)
         self.designer_content.update_tree_view(project)
 
         if not new_project:
@@ -982,12 +1087,50 @@ class Designer(FloatLayout):
                 self.ui_creator.playground.load_widget(first_wdg.name)
             else:
                 self.ui_creator.playground.no_widget()
+        self.ui_creator.playground.widget_pool.update_specs()
 
         Clock.schedule_once(partial(self.ui_creator.kivy_console.run_command,
             'cd %s' % (file_path)
         ), 1)
         self.designer_git.load_repo(file_path)
 
+    def _on_journal_recovered(self, project_path, files):
+        '''Called with the files recovered from the edit journal of a
+        previous session that was not closed properly
+        '''
+        journal = self.edit_journal
+        if not files or journal.project_path != project_path:
+            journal.discard_recovery()
+            return
+        if self.popup:
+            # keep the journal to ask the next time the project is opened
+            return
+
+        def recover(*args):
+            self.close_popup()
+            journal.discard_recovery()
+            self.io_worker.submit(
+                write_files, list(files.items()),
+                on_write=self.project_watcher.expect_write,
+                on_result=lambda job, result: self._perform_open(
+                    project_path),
+                on_error=lambda job, error: show_message(
+                    'Failed to recover the changes: %s' % error, 5, 'error'))
+
+        def discard(*args):
+            self.close_popup()
+            journal.discard_recovery()
+
+        confirm_dlg = ConfirmationDialog(
+            message="Kivy Designer was not closed properly.\n"
+                    "Do you want to recover the unsaved\n"
+                    "changes of %d files?" % len(files))
+        confirm_dlg.bind(on_ok=recover, on_cancel=discard)
+        self.popup = Popup(title='Kivy Designer', content=confirm_dlg,
+                           size_hint=(None, None), size=('250pt', '150pt'),
+                           auto_dismiss=False)
+        self.popup.open()
+
     def close_popup(self, *args):
         '''EventHandler for all self.popup when self.popup.content
            emits 'on_cancel' or equivalent.
@@ -1001,17 +1144,28 @@ class Designer(FloatLayout):
             return True
         return False
 
-    @ignore_proj_watcher
     def save_project(self, *args):
-        '''Saves the current project.
-        :param path: path to save the project.
+        '''Saves the current project in background.
+        '''
+        self._save_project()
+
+    def _save_project(self, callback=None):
+        '''Saves the current project and calls callback when it's saved
         '''
         proj = self.project_manager.current_project
-        saved = proj.save()
-        if saved:
-            show_message('Project saved!', 5, 'info')
-        else:
+        proj.save(on_saved=partial(self._on_project_saved, callback))
+
+    def _on_project_saved(self, callback, saved, modified):
+        if not saved:
             show_message('Failed to save the project!', 5, 'error')
+        elif modified:
+            # the callback would lose the changes made during the save
+            show_message('Project saved, but %d files were modified while '
+                         'saving' % len(modified), 5, 'info')
+        else:
+            show_message('Project saved!', 5, 'info')
+            if callback is not None:
+                callback()
 
     def action_btn_save_pressed(self, exit_on_save=False, *args):
         '''Event Handler when ActionButton "Save" is pressed.
@@ -1022,9 +1176,7 @@ class Designer(FloatLayout):
             self.action_btn_save_as_pressed(exit_on_save=exit_on_save)
             return
         else:
-            self.save_project()
-            if exit_on_save:
-                self._perform_quit()
+            self._save_project(self._perform_quit if exit_on_save else None)
 
     def action_btn_save_as_pressed(self, exit_on_save=False, *args):
         '''Event Handler when ActionButton "Save As" is pressed.
@@ -1043,6 +1195,7 @@ class Designer(FloatLayout):
 
             self._perform_save_as(instance, exit_on_save=exit_on_save)
 
+        from kivy.garden.xpopup.file import XFileSave
         XFileSave(title="Enter Folder Name", size_hint=(0.9, 0.9),
                   on_dismiss=save_project, path=def_path)
 
@@ -1053,12 +1206,13 @@ class Designer(FloatLayout):
         proj_dir = instance.path + os.path.sep + instance.filename
 
         # save the project in the folder and then copy it to a new folder
-        self.save_project()
-        copy_tree(self.project_manager.current_project.path, proj_dir)
-        if exit_on_save:
-            self._perform_quit()
-            return
-        self._perform_open(proj_dir)
+        def copy_project():
+            copy_tree(self.project_manager.current_project.path, proj_dir)
+            if exit_on_save:
+                self._perform_quit()
+                return
+            self._perform_open(proj_dir)
+        self._save_project(copy_project)
 
     def action_btn_settings_pressed(self, *args):
         '''Event handler for 'on_release' event of
@@ -1085,6 +1239,7 @@ class Designer(FloatLayout):
         '''Callback when there is a modification in the profile settings
         '''
         self.prof_settings.load_profiles()
+        self.profile_configs = self.prof_settings.config_parsers
         self.fill_select_profile_menu()
 
     def _perform_use_this_prof(self, instance, *args):
@@ -1103,8 +1258,8 @@ class Designer(FloatLayout):
         prof_menu = self.select_profile_cont_menu
         prof_menu.remove_children()
         group = 'profile'
-        for profile in sorted(self.prof_settings.config_parsers.keys()):
-            config = self.prof_settings.config_parsers[profile]
+        for profile in sorted(self.profile_configs.keys()):
+            config = self.profile_configs[profile]
             config_path = config.filename
             if isinstance(config_path, bytes):
                 config_path = config_path.decode(get_fs_encoding())
@@ -1136,7 +1291,7 @@ class Designer(FloatLayout):
         Save the selected config_parser path to the config
         '''
         if value:
-            _config = self.prof_settings.config_parsers[instance.config_key]
+            _config = self.profile_configs[instance.config_key]
             _config_path = _config.filename
             if isinstance(_config_path, bytes):
                 _config_path.decode(get_fs_encoding())
@@ -1158,6 +1313,7 @@ class Designer(FloatLayout):
         '''
         if self.popup:
             return False
+        from designer.components.dialogs.recent import RecentDialog
         _recent_dlg = RecentDialog(self.recent_manager.list_projects)
         _recent_dlg.bind(on_cancel=self.close_popup,
                          on_select=self._recent_file_release)
@@ -1520,6 +1676,7 @@ class Designer(FloatLayout):
         '''
         if self.popup:
             return False
+        from designer.components.dialogs.add_file import AddFileDialog
         add_file_dlg = AddFileDialog(
             self.project_manager.current_project)
         add_file_dlg.bind(on_added=self._added_file,
@@ -1534,9 +1691,18 @@ class Designer(FloatLayout):
         self.popup.open()
         return True
 
+    def action_btn_find_in_files_pressed(self, *args):
+        '''Event Handler when ActionButton "Find in Files" is pressed.
+        '''
+        ui_creator = self.ui_creator
+        ui_creator.tab_pannel.switch_to(ui_creator.tab_project_search)
+        ui_creator.project_search.txt_query.focus = True
+
     def action_btn_run_module_pressed(self, *args):
 
         if self.modulescontview is None:
+            from designer.components.run_contextual_view import \
+                ModulesContView
             self.modulescontview = ModulesContView()
             self.modulescontview.bind(
                 on_module=self.action_btn_run_project_pressed)
@@ -1565,9 +1731,10 @@ class Designer(FloatLayout):
         '''
         if self.popup:
             return False
-        self.prof_settings.load_profiles()
+        prof_settings = self.get_prof_settings()
+        prof_settings.load_profiles()
         self.popup = Popup(title="Build Profiles",
-                           content=self.prof_settings,
+                           content=prof_settings,
                            size_hint=(None, None),
                            size=(720, 480),
                            auto_dismiss=False)
@@ -1643,6 +1810,7 @@ class Designer(FloatLayout):
         '''
         if self.popup:
             return False
+        from designer.components.dialogs.about import AboutDialog
         about_dlg = AboutDialog()
         self.popup = Popup(title='About Kivy Designer',
                            content=about_dlg,
@@ -1670,6 +1838,7 @@ class DesignerException(ExceptionHandler):
                 Window.remove_widget(child)
             self.raised_exception = True
             Window.fullscreen = False
+            from designer.tools.bug_reporter import BugReporterApp
             BugReporterApp(traceback=traceback.format_exc()).run()
             return ExceptionManager.PASS
 
@@ -1687,6 +1856,14 @@ class DesignerApp(App):
     title = 'Kivy Designer'
 
     def on_stop(self, *args):
+        if hasattr(self.root, 'code_completion'):
+            self.root.code_completion.worker.stop()
+            self.root.symbol_index.worker.stop()
+            self.root.designer_git.worker.stop()
+            self.root.edit_journal.close()
+            self.root.io_worker.stop()
+            if self.root.project_manager.introspection is not None:
+                self.root.project_manager.introspection.stop()
         if hasattr(self.root, 'ui_creator'):
             if hasattr(self.root.ui_creator, 'py_console'):
                 self.root.ui_creator.py_console.exit()
@@ -1731,13 +1908,26 @@ class DesignerApp(App):
                          module='designer.components.edit_contextual_view')
         Factory.register('PlaygroundSizeSelector',
                          module='designer.components.playground_size_selector')
+        Factory.register('PlaygroundPreviewButton',
+                         module='designer.components.playground_preview')
         Factory.register('CodeInputFind',
                          module='designer.uix.code_find')
+        Factory.register('ProjectSearchView',
+                         module='designer.components.project_search')
+        Factory.register('ProjectTreeView',
+                         module='designer.components.project_tree')
+        Factory.register('PyScrollView',
+                         module='designer.uix.py_code_input')
 
         self._widget_focused = None
-        self.root = Designer()
+        with startup_profile.span('Designer'):
+            self.root = Designer()
         Clock.schedule_once(self._setup)
 
+    def load_kv(self, *args, **kwargs):
+        with startup_profile.span('load designer.kv'):
+            return super(DesignerApp, self).load_kv(*args, **kwargs)
+
     def _setup(self, *args):
         '''To setup the properties of different classes
         '''
@@ -1785,6 +1975,12 @@ class DesignerApp(App):
 
         self.root.fill_select_profile_menu()
         self.started = True
+        startup_profile.mark('setup done')
+        # the start page is displayed on the next frame
+        Clock.schedule_once(lambda dt: startup_profile.report())
+        # the toolbox widgets are created after the start page is displayed
+        Clock.schedule_once(
+            self.root.ui_creator.playground.widget_pool.prepare, 1)
 
     def create_kivy_designer_dir(self):
         '''To create the ~/.kivy-designer dir
@@ -1816,18 +2012,8 @@ class DesignerApp(App):
             container.center_x = touch.x
             container.y = touch.y + 20
         else:
-            default_args = {}
-            extra_args = {}
-            for options in toolbox_widgets:
-                if widget_name == options[0]:
-                    if len(options) > 2:
-                        default_args = options[2].copy()
-                    if len(options) > 3:
-                        extra_args = options[3].copy()
-                    break
             container = self.root.ui_creator.playground.\
-                get_playground_drag_element(instance, widget_name,
-                                            touch, default_args, extra_args)
+                get_playground_drag_element(instance, widget_name, touch)
         if container:
             self.root.add_widget(container)
         else:
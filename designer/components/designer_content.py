@@ -1,8 +1,7 @@
 import os
 from io import open
-from designer.components.buildozer_spec_editor import BuildozerSpecEditor
 from designer.uix.confirmation_dialog import ConfirmationDialog
-from designer.uix.py_code_input import PyScrollView
+from designer.uix.large_file_view import LargeFileView
 from designer.utils.utils import get_designer, show_message
 from kivy.app import App
 from kivy.properties import (
@@ -16,12 +15,18 @@ from kivy.properties import (
 from kivy.uix.floatlayout import FloatLayout
 from kivy.uix.popup import Popup
 from kivy.uix.tabbedpanel import TabbedPanel, TabbedPanelHeader, TabbedPanelItem
-from kivy.uix.treeview import TreeViewLabel
 
 
 SUPPORTED_EXT = ('.py', '.py2', '.kv', '.py3', '.txt', '.diff', )
 
 
+def _read_file(path):
+    '''Returns the content of a text file. Runs in the io worker
+    '''
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+
 class DesignerContent(FloatLayout):
     '''This class contains the body of the Kivy Designer. It contains,
        Project Tree and TabbedPanel.
@@ -94,101 +99,93 @@ class DesignerContent(FloatLayout):
         self.find_tool.bind(on_close=partial(self.show_findmenu, False))
         self.find_tool.bind(on_next=self.find_tool_next)
         self.find_tool.bind(on_prev=self.find_tool_prev)
+        self.find_tool.bind(query=self.find_tool_search,
+                            use_regex=self.find_tool_search,
+                            case_sensitive=self.find_tool_search)
         self.focus_code_input = Clock.create_trigger(self._focus_input)
+        self.tree_view.bind(on_file_press=self._file_node_clicked)
+        self._git_files = {}
 
     def update_tree_view(self, project):
-        '''This function is used to insert all the py files detected.
-           as a node in the Project Tree.
+        '''This function is used to insert all the files detected
+           in the Project Tree.
            :param project: instance of the current project
         '''
         self.project = project
+        self.tree_view.load(project.path, project.get_files())
 
-        # Fill nodes with file and directories
-        self._root_node = self.tree_view.root
-        self.clear_tree_view()
-
-        for _file in sorted(project.get_files()):
-            self.add_file_to_tree_view(_file)
-
-        self.tree_view.root_options = dict(
-            text=os.path.basename(self.project.path))
+        git = get_designer().designer_git
+        self._git_files = {}
+        if git.status is not None:
+            self.on_git_status(git, git.status)
 
     def clear_tree_view(self):
         '''
         Clear the TreeView
         '''
-        temp = list(self.tree_view.iterate_all_nodes())
-        for node in temp:
-            self.tree_view.remove_node(node)
+        self.tree_view.clear()
 
     def add_file_to_tree_view(self, _file):
         '''This function is used to insert project files given by it's path
         argument _file. It will also insert any directory node if not present.
         :param _file: path of the file to be inserted
         '''
+        self.tree_view.add_file(_file)
 
-        self.tree_view.root_options = dict(text='')
-        dirname = os.path.dirname(_file)
-        dirname = dirname.replace(self.project.path, '')
-        # The way os.path.dirname works, there will never be '/' at the end
-        # of a directory. So, there will always be '/' at the starting
-        # of 'dirname' variable after removing proj_dir
-
-        # This algorithm first breaks path into its components
-        # and creates a list of these components.
-        _dirname = dirname
-        _basename = 'a'
-        list_path_components = []
-        while _basename != '':
-            _split = os.path.split(_dirname)
-            _dirname = _split[0]
-            _basename = _split[1]
-            list_path_components.insert(0, _split[1])
-
-        if list_path_components[0] == '':
-            del list_path_components[0]
-
-        # Then it traverses from root_node to its children searching from
-        # each component in the path. If it doesn't find any component
-        # related with node then it creates it.
-        node = self._root_node
-        while list_path_components != []:
-            found = False
-            for _node in node.nodes:
-                if _node.text == list_path_components[0]:
-                    node = _node
-                    found = True
-                    break
-
-            if not found:
-                for component in list_path_components:
-                    _node = TreeViewLabel(text=component)
-                    self.tree_view.add_node(_node, node)
-                    node = _node
-                list_path_components = []
-            else:
-                del list_path_components[0]
-
-        # Finally add file_node with node as parent.
-        file_node = TreeViewLabel(text=os.path.basename(_file))
-        file_node.bind(on_touch_down=self._file_node_clicked)
-        self.tree_view.add_node(file_node, node)
-
-    def _file_node_clicked(self, instance, touch):
+    def update_files(self, paths):
+        '''Add and remove the files of a project watcher change set in the
+        Project Tree
+        :param paths: paths created, modified or removed
+        '''
+        if self.project is None or not self.project.path:
+            return
+        added, removed = self.project.update_files(paths)
+        for path in removed:
+            self.tree_view.remove(path)
+        for path in added:
+            self.tree_view.add_file(path)
+        if added and self._git_files:
+            git = get_designer().designer_git
+            if git.repo is not None:
+                root = git.repo.working_tree_dir
+                for path in added:
+                    code = self._git_files.get(os.path.relpath(path, root))
+                    node = self.tree_view.tree.get(path)
+                    if code and node is not None:
+                        node.git_status = code
+
+    def on_git_status(self, instance, status):
+        '''Update the git decoration of the Project Tree nodes. Only the
+        nodes of files whose status changed are updated
+        :param instance: :class:`~designer.tools.git_integration.DesignerGit`
+        :param status: :class:`~designer.core.git_status.GitStatus`
+        '''
+        if self.project is None or instance.repo is None:
+            return
+        files = status.files if status is not None else {}
+        old_files = self._git_files
+        self._git_files = files
+        root = instance.repo.working_tree_dir
+        tree = self.tree_view.tree
+        changed = False
+        for rel_path in set(old_files) | set(files):
+            code = files.get(rel_path, '')
+            if old_files.get(rel_path, '') == code:
+                continue
+            node = tree.get(os.path.join(root, rel_path))
+            if node is not None:
+                node.git_status = code
+                changed = True
+        if changed:
+            self.tree_view.refresh()
+
+    def _file_node_clicked(self, instance, full_path):
         '''This is emmited whenever any file node of Project Tree is
            clicked. This will open up a tab in DesignerTabbedPanel, for
            editing that py file.
         '''
 
-        # Travel upwards and find the path of instance clicked
-        path = instance.text
-        parent = instance.parent_node
-        while parent != self._root_node:
-            _path = parent.text
-            path = os.path.join(_path, path)
-            parent = parent.parent_node
-
-        full_path = os.path.join(self.project.path, path)
+        path = os.path.relpath(full_path, self.project.path)
         if os.path.basename(full_path) == 'buildozer.spec':
             self.tab_pannel.show_buildozer_spec_editor(self.project)
         else:
@@ -208,6 +205,9 @@ class DesignerContent(FloatLayout):
         self.in_find = visible
         if visible:
             Clock.schedule_once(self._focus_find)
+            self.find_tool_search(self.find_tool)
+        elif self.current_codeinput:
+            self.current_codeinput.clear_highlights()
 
     def _focus_find(self, *args):
         '''Focus on the find tool
@@ -227,10 +227,20 @@ class DesignerContent(FloatLayout):
             return
         content = tabbed_panel.content.children[0]
 
-        if isinstance(content, PyScrollView):
-            self.current_codeinput = content.code_input
-        else:
-            self.current_codeinput = None
+        # PyScrollView and DiffView
+        self.current_codeinput = getattr(content, 'code_input', None)
+
+    def find_tool_search(self, instance, *args):
+        '''Search while the query is typed, highlighting all matches
+        '''
+        code_input = self.current_codeinput
+        if not code_input or not self.in_find:
+            return
+        code_input.highlight_matches(instance.query, instance.use_regex,
+                                     instance.case_sensitive)
+        code_input.find(instance.query, instance.use_regex,
+                        instance.case_sensitive)
+        self._update_find_status()
 
     def find_tool_prev(self, instance, *args):
         if self.current_codeinput:
@@ -238,6 +248,7 @@ class DesignerContent(FloatLayout):
             self.current_codeinput.find_prev(instance.query,
                                              instance.use_regex,
                                              instance.case_sensitive)
+            self._update_find_status()
 
     def find_tool_next(self, instance, *args):
         if self.current_codeinput:
@@ -245,6 +256,16 @@ class DesignerContent(FloatLayout):
             self.current_codeinput.find_next(instance.query,
                                              instance.use_regex,
                                              instance.case_sensitive)
+            self._update_find_status()
+
+    def _update_find_status(self):
+        '''Display the number of matches in the find tool
+        '''
+        find_tool = self.find_tool
+        code_input = self.current_codeinput
+        find_tool.matches = code_input.count_matches(
+            find_tool.query, find_tool.use_regex, find_tool.case_sensitive)
+        find_tool.current_match = code_input.current_match_index()
 
     def _focus_input(self, *args):
         self.current_codeinput.focus = True
@@ -256,52 +277,114 @@ class DesignerTabbedPanel(TabbedPanel):
        Tab as a special one containing all features to edit the UI.
     '''
 
-    def open_file(self, path, rel_path, switch_to=True):
+    def __init__(self, **kwargs):
+        # tab of each file being read: list of on_load callbacks. A file
+        # closed and opened again while it is read has a new tab
+        self._loading = {}
+        super(DesignerTabbedPanel, self).__init__(**kwargs)
+
+    def open_file(self, path, rel_path, switch_to=True, on_load=None):
         '''This will open file for editing in the DesignerTabbedPanel.
+        The file is read in background, and files larger than the
+        "large_file_size" setting are opened in a read-only
+        :class:`~designer.uix.large_file_view.LargeFileView`.
         :param switch_to: if should switch to the new tab
         :param rel_path: relative file path
         :param path: absolute file path to open
+        :param on_load: called with the code input of the file when its
+            content is loaded, or with None if the file is not editable
         '''
         for i, tab_item in enumerate(self.tab_list):
             if hasattr(tab_item, 'rel_path') and tab_item.rel_path == rel_path:
-                # self.switch_to(self.tab_list[len(self.tab_list) - i - 2])
                 self.switch_to(tab_item)
+                if on_load is None:
+                    return
+                if tab_item in self._loading:
+                    self._loading[tab_item].append(on_load)
+                else:
+                    on_load(getattr(tab_item.content, 'code_input', None))
                 return
 
         panel_item = DesignerCloseableTab(title=os.path.basename(path))
         panel_item.bind(on_close=self.on_close_tab)
-        f = open(path, 'r', encoding='utf-8')
+        panel_item.rel_path = rel_path
+        d = get_designer()
+        max_size = int(d.designer_settings.config_parser.getdefault(
+            'global', 'large_file_size', 1024)) * 1024
+        try:
+            size = os.path.getsize(path)
+        except OSError as e:
+            show_message('Failed to open %s: %s' % (rel_path, e), 5, 'error')
+            return
+
+        if max_size > 0 and size > max_size:
+            view = LargeFileView()
+            view.open(path)
+            panel_item.content = view
+            self.add_widget(panel_item)
+            if switch_to:
+                self.switch_to(self.tab_list[0])
+            if on_load is not None:
+                on_load(None)
+            return
+
+        # the code editor is only imported when the first file is opened
+        from designer.uix.py_code_input import PyScrollView
         scroll = PyScrollView()
         _py_code_input = scroll.code_input
-        _py_code_input.text = f.read()
         _py_code_input.path = path
+        _py_code_input.readonly = True
+        _py_code_input.hint_text = 'Loading...'
+        panel_item.content = scroll
+        self.add_widget(panel_item)
+        if switch_to:
+            self.switch_to(self.tab_list[0])
+
+        self._loading[panel_item] = [on_load] if on_load is not None else []
+        d.io_worker.submit(_read_file, path,
+                           on_result=partial(self._on_file_read, panel_item),
+                           on_error=partial(self._on_file_error, panel_item))
+
+    def _on_file_read(self, panel_item, job, text):
+        callbacks = self._loading.pop(panel_item, [])
+        if panel_item.parent is None:
+            # the tab was closed while loading
+            return
+        _py_code_input = panel_item.content.code_input
+        _py_code_input.text = text
+        _py_code_input.hint_text = ''
+        _py_code_input.readonly = False
         _py_code_input.bind(
             on_show_edit=App.get_running_app().root.on_show_edit)
         _py_code_input.bind(saved=panel_item.on_tab_content_saved)
         _py_code_input.bind(error=panel_item.on_tab_content_error)
-        f.close()
 
+        # only registered now, so an empty buffer is never saved
         d = get_designer()
         if _py_code_input not in d.code_inputs:
             d.code_inputs.append(_py_code_input)
+        d.edit_journal.track(_py_code_input)
+        for callback in callbacks:
+            callback(_py_code_input)
 
-        panel_item.content = scroll
-        panel_item.rel_path = rel_path
-        self.add_widget(panel_item)
-        if switch_to:
-            self.switch_to(self.tab_list[0])
+    def _on_file_error(self, panel_item, job, error):
+        self._loading.pop(panel_item, None)
+        show_message('Failed to open %s: %s' % (panel_item.rel_path, error),
+                     5, 'error')
+        if panel_item.parent is not None:
+            self._perform_close_tab(panel_item)
 
     def show_buildozer_spec_editor(self, project):
         '''Loads the buildozer.spec file and adds a new tab with the
         Buildozer Spec Editor
         :param project: instance of the current project
         '''
+        spec_editor = get_designer().get_spec_editor()
         for i, child in enumerate(self.tab_list):
-            if isinstance(child.content, BuildozerSpecEditor):
+            if child.content is spec_editor:
                 self.switch_to(child)
                 return child
 
-        spec_editor = get_designer().spec_editor
         if spec_editor.SPEC_PATH != \
                 os.path.join(project.path, 'buildozer.spec'):
             spec_editor.load_settings(project.path)
@@ -347,12 +430,15 @@ class DesignerTabbedPanel(TabbedPanel):
             Clock.schedule_once(partial(self._perform_close_tab, instance))
 
     def _perform_close_tab(self, tab, *args):
+        if hasattr(tab.content, 'close'):
+            tab.content.close()
         # remove code_input from list
         if hasattr(tab.content, 'code_input'):
             code = tab.content.code_input
             d = get_designer()
             if code in d.code_inputs:
                 d.code_inputs.remove(code)
+            d.edit_journal.untrack(code)
         # remove tab
         self.remove_widget(tab)
         if self.tab_list:
@@ -0,0 +1,147 @@
+from designer.core.git_diff import read_changed_files, read_file_diff
+from designer.utils.utils import get_designer
+from kivy.properties import (
+    BooleanProperty,
+    NumericProperty,
+    ObjectProperty,
+    StringProperty,
+)
+from kivy.uix.boxlayout import BoxLayout
+from kivy.uix.treeview import TreeViewLabel
+from pygments.lexers.diff import DiffLexer
+
+
+class DiffFileNode(TreeViewLabel):
+    '''DiffFileNode represents a changed file in DiffView
+    '''
+
+    diff_file = ObjectProperty(None)
+    '''Instance of :class:`~designer.core.git_diff.DiffFile`
+        :data:`diff_file` is a :class:`~kivy.properties.ObjectProperty`
+    '''
+
+
+class DiffView(BoxLayout):
+    '''DiffView displays the git diff of the project. The changed files are
+       listed first, and the diff of a file is only read when it's selected,
+       and displayed in pages, so the view opens immediately regardless of
+       the changeset size.
+    '''
+
+    files_tree = ObjectProperty(None)
+    '''TreeView with the changed files
+        :data:`files_tree` is a :class:`~kivy.properties.ObjectProperty`
+    '''
+
+    diff_scroll = ObjectProperty(None)
+    '''PyScrollView displaying the diff of the selected file
+        :data:`diff_scroll` is a :class:`~kivy.properties.ObjectProperty`
+    '''
+
+    code_input = ObjectProperty(None)
+    '''PyCodeInput with the diff of the selected file
+        :data:`code_input` is a :class:`~kivy.properties.ObjectProperty`
+    '''
+
+    status = StringProperty('')
+    '''Status message
+        :data:`status` is a :class:`~kivy.properties.StringProperty`
+    '''
+
+    remaining = NumericProperty(0)
+    '''Number of lines of the selected file not displayed yet
+        :data:`remaining` is a :class:`~kivy.properties.NumericProperty`
+    '''
+
+    loading = BooleanProperty(False)
+    '''Indicates if the view is waiting for git
+        :data:`loading` is a :class:`~kivy.properties.BooleanProperty`
+    '''
+
+    def __init__(self, **kwargs):
+        super(DiffView, self).__init__(**kwargs)
+        self._pager = None
+        self._file_job = None
+        code = self.diff_scroll.code_input
+        code.readonly = True
+        code.lexer = DiffLexer()
+        code.saved = True
+        self.code_input = code
+
+    def load(self, *args):
+        '''Read the list of changed files in background
+        '''
+        git = get_designer().designer_git
+        if git.repo is None:
+            return
+        self._clear()
+        self.loading = True
+        self.status = 'Loading...'
+        git.run_git(read_changed_files, git.repo,
+                    on_result=self._on_files_loaded, title='Git Diff',
+                    error='Failed to get the diff!')
+
+    def _clear(self):
+        if self._file_job is not None:
+            self._file_job.cancel()
+            self._file_job = None
+        self._pager = None
+        self.remaining = 0
+        self.code_input.text = ''
+        tree = self.files_tree
+        for node in list(tree.root.nodes):
+            tree.remove_node(node)
+
+    def _on_files_loaded(self, job, files):
+        self.loading = False
+        if not files:
+            self.status = 'Empty diff'
+            return
+        added = deleted = 0
+        for diff_file in files:
+            if diff_file.added is None:
+                text = '%s (binary)' % diff_file.path
+            else:
+                added += diff_file.added
+                deleted += diff_file.deleted
+                text = '%s (+%d -%d)' % (diff_file.path, diff_file.added,
+                                         diff_file.deleted)
+            self.files_tree.add_node(DiffFileNode(text=text,
+                                                  diff_file=diff_file))
+        self.status = '%d files changed, +%d -%d' % (len(files), added,
+                                                    deleted)
+
+    def on_selected_node(self, node):
+        '''Read the diff of the selected file in background
+        '''
+        if not isinstance(node, DiffFileNode):
+            return
+        git = get_designer().designer_git
+        if self._file_job is not None:
+            self._file_job.cancel()
+        self._pager = None
+        self.remaining = 0
+        self.code_input.text = ''
+        self.loading = True
+        self._file_job = git.run_git(
+            read_file_diff, git.repo, node.diff_file,
+            on_result=self._on_file_loaded, title='Git Diff',
+            error='Failed to get the diff!')
+
+    def _on_file_loaded(self, job, pager):
+        if job is not self._file_job:
+            return
+        self._file_job = None
+        self.loading = False
+        self._pager = pager
+        self.code_input.text = pager.next_page()
+        self.remaining = pager.remaining
+        self.diff_scroll.scroll_y = 1
+
+    def load_more(self, *args):
+        '''Display the next page of the selected file
+        '''
+        if self._pager is None or not self._pager.remaining:
+            return
+        self.code_input.text += '\n' + self._pager.next_page()
+        self.remaining = self._pager.remaining
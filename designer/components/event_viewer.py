@@ -1,9 +1,9 @@
 import re
 
 from designer.components.property_viewer import PropertyLabel, PropertyViewer
+from designer.core.symbol_index import PY_CLASS
 from designer.uix.info_bubble import InfoBubble
 from designer.utils.utils import get_current_project, get_designer, show_message
-from kivy.clock import Clock
 from kivy.properties import BooleanProperty, ObjectProperty, StringProperty
 from kivy.uix.button import Button
 from kivy.uix.dropdown import DropDown
@@ -193,16 +193,10 @@ class EventViewer(PropertyViewer):
             add(ip)
 
         # check if widget has a class to add custom events
-        is_custom_widget = False
-        app_widgets = get_current_project().app_widgets
-        wdg_name = type(self.widget).__name__
-        for wdg in app_widgets:
-            if wdg == wdg_name:
-                widget = app_widgets[wdg]
-                # if has a python file
-                if widget.py_path:
-                    is_custom_widget = True
-                break
+        widget = get_current_project().app_widgets.get(
+            type(self.widget).__name__)
+        # if has a python file
+        is_custom_widget = widget is not None and bool(widget.py_path)
 
         if is_custom_widget:
             # Allow adding a new event only if current widget is a custom rule
@@ -218,47 +212,52 @@ class EventViewer(PropertyViewer):
         '''This function will create a new event given by 'txt' to the widget.
         '''
         # Find the python file of widget
-        py_file = None
-        app_widgets = get_current_project().app_widgets
-        for rule_name in app_widgets:
-            if self.widget.__class__.__name__ == rule_name:
-                py_file = app_widgets[rule_name].py_path
+        widget_name = type(self.widget).__name__
+        py_file = get_current_project().app_widgets[widget_name].py_path
+        for symbol in get_designer().symbol_index.lookup(widget_name,
+                                                         (PY_CLASS, )):
+            # the class may be defined in more than one file
+            if symbol.path == py_file:
                 break
+        else:
+            symbol = None
 
         # Open it in DesignerTabbedPannel
         rel_path = py_file.replace(get_current_project().path, '')
         if rel_path[0] == '/' or rel_path[0] == '\\':
             rel_path = rel_path[1:]
 
-        self.designer_tabbed_panel.open_file(py_file, rel_path,
-                                             switch_to=True)
-        self.rel_path = rel_path
         self.txt = txt
-        Clock.schedule_once(self._add_event)
+        self.class_symbol = symbol
+        self.designer_tabbed_panel.open_file(py_file, rel_path,
+                                             switch_to=True,
+                                             on_load=self._add_event)
 
-    def _add_event(self, *args):
+    def _add_event(self, py_code_input):
         '''This function will create a new event given by 'txt' to the widget.
+        Called when the python file of the widget is loaded
         '''
-        # Find the class definition
-        py_code_input = None
         txt = self.txt
-        rel_path = self.rel_path
-        for tab_item in self.designer_tabbed_panel.tab_list:
-            if not hasattr(tab_item, 'rel_path'):
-                continue
-            if tab_item.rel_path == rel_path:
-                if hasattr(tab_item.content, 'code_input'):
-                    py_code_input = tab_item.content.code_input
-                    break
-
         if py_code_input is None:
             show_message('Failed to create a custom event', 5, 'error')
             return
         pos = -1
-        for searchiter in re.finditer(r'class\s+%s\(.+\):' %
-                                      type(self.widget).__name__,
-                                      py_code_input.text):
-            pos = searchiter.end()
+        class_re = re.compile(r'class\s+%s\(.+\):' %
+                              type(self.widget).__name__)
+        symbol = self.class_symbol
+        if symbol is not None and py_code_input.saved:
+            # the file was not modified since it was indexed, search only
+            # from the class line
+            search = py_code_input.get_search()
+            if symbol.line < search.line_count:
+                match = class_re.match(py_code_input.text,
+                                       search.line_offset(symbol.line) +
+                                       symbol.col)
+                if match:
+                    pos = match.end()
+        if pos == -1:
+            for searchiter in class_re.finditer(py_code_input.text):
+                pos = searchiter.end()
 
         if pos != -1:
             col, row = py_code_input.get_cursor_from_index(pos)
@@ -1,6 +1,7 @@
 import re
 
 from designer.uix.code_input import DesignerCodeInput
+from designer.utils import trace
 from designer.utils.utils import (
     get_current_project,
     get_indent_str,
@@ -340,12 +341,7 @@ class KVLangArea(DesignerCodeInput):
             parent_lineno = 0
             self.cursor = (0, 0)
             type_name = type(widget).__name__
-            is_class = False
-            app_widgets = get_current_project().app_widgets
-            for rule_name in app_widgets:
-                if rule_name == type_name:
-                    is_class = True
-                    break
+            is_class = type_name in get_current_project().app_widgets
 
             if not is_class:
                 self.insert_text(type_name + ':\n')
@@ -693,6 +689,7 @@ class KVLangArea(DesignerCodeInput):
             self.cursor = (len(lines[widget_lineno]), widget_lineno)
             self.insert_text(indent_str + prop + ': ' + str(value))
 
+    @trace.traced('KVLangArea.set_property_value')
     def set_property_value(self, widget, prop, value, proptype):
         '''To find and change the value of property of widget rule in text
         '''
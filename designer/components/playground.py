@@ -1,17 +1,21 @@
 import functools
 import os
 import re
+from collections import OrderedDict
 from io import open
+from designer.core.file_writer import content_hash
+from designer.components.toolbox import ToolboxWidgetPool
 from designer.core.undo_manager import WidgetDragOperation, WidgetOperation
 from designer.uix.confirmation_dialog import ConfirmationDialogSave
 from designer.uix.settings import SettingListContent
-from designer.utils.toolbox_widgets import toolbox_widgets as widgets_common
+from designer.uix.texture_cache import WidgetTextureCache
+from designer.utils import trace
+from designer.utils.toolbox_widgets import complex_widgets
 from designer.utils.utils import (
     FakeSettingList,
     get_app_widget,
     get_current_project,
     get_designer,
-    ignore_proj_watcher,
     show_message,
 )
 from kivy.app import App
@@ -23,6 +27,7 @@ from kivy.graphics import Color, Line
 from kivy.properties import (
     BooleanProperty,
     ListProperty,
+    NumericProperty,
     ObjectProperty,
     OptionProperty,
     StringProperty,
@@ -101,6 +106,14 @@ class PlaygroundDragElement(BoxLayout):
         super(PlaygroundDragElement, self).__init__(**kwargs)
         if self.child:
             self.add_widget(self.child)
+        # the touch moves are processed once per frame, with the last
+        # position of the touch
+        self._move_touch = None
+        self._move_trigger = Clock.create_trigger(self._perform_move)
+        # drop zones of the playground, and the playground root and
+        # transformation they were computed with
+        self._drop_zones = []
+        self._drop_zones_key = None
 
     def show_lines_on_child(self, *args):
         '''To schedule Clock's callback for _show_lines_on_child.
@@ -177,14 +190,41 @@ class PlaygroundDragElement(BoxLayout):
 
         return False
 
+    def find_playground_target(self, x, y):
+        '''Returns the widget of the playground where the dragged widget
+           would be added at the window position x, y. The drop zones of the
+           playground are computed at the first call, with the layout the
+           playground had when the drag started, and then looked up.
+        '''
+        key = (self.playground.root, self.playground.transform.get())
+        if key != self._drop_zones_key:
+            self._drop_zones = self.playground.drop_zones(self.widget)
+            self._drop_zones_key = key
+        for zone_x, zone_y, right, top, target in self._drop_zones:
+            if zone_x <= x <= right and zone_y <= y <= top:
+                return target
+        return None
+
     def on_touch_move(self, touch):
         '''This is responsible for moving the drag element and showing where
-           the widget it contains will be added.
+           the widget it contains will be added. The move is processed in
+           the next frame, several moves of the same frame are processed
+           once.
         '''
         # if this widget is not being dragged, exit
         if touch.grab_current is not self:
             return False
 
+        self._move_touch = touch
+        self._move_trigger()
+        return True
+
+    def _perform_move(self, *args):
+        touch = self._move_touch
+        if touch is None:
+            return
+        self._move_touch = None
+
         # update dragging position
         self.center_x = touch.x
         self.y = touch.y + 20
@@ -195,8 +235,7 @@ class PlaygroundDragElement(BoxLayout):
         # now, getting the target widget
         # if is targeting the playground
         if self.is_intersecting_playground(touch.x, touch.y):
-            target = self.playground.try_place_widget(
-                    self.widget, touch.x, touch.y)
+            target = self.find_playground_target(touch.x, touch.y)
 
         # if is targeting widget tree
         elif self.is_intersecting_widgettree(touch.x, touch.y):
@@ -220,6 +259,11 @@ class PlaygroundDragElement(BoxLayout):
                         # runs each parent to find a valid target
                         node = node.parent_node
 
+        # already previewed in the target
+        if target is not None and target is self.target and \
+                self.widget.parent is target:
+            return True
+
         self.target = target
 
         # check if its added somewhere, remove it
@@ -273,6 +317,9 @@ class PlaygroundDragElement(BoxLayout):
 
         # aborts the dragging
         touch.ungrab(self)
+        # the last move of the frame, the drop depends on it
+        self._move_trigger.cancel()
+        self._perform_move()
 
         widget_from = None
         target = None
@@ -393,6 +440,20 @@ class Playground(ScatterPlane):
        :data:`root_app_widget` is a :class:`~kivy.properties.ObjectProperty`
     '''
 
+    root_cache_size = NumericProperty(5)
+    '''Number of root widgets kept after being replaced by another one, to
+    be displayed again without creating them
+       :data:`root_cache_size` is a :class:`~kivy.properties.NumericProperty`
+       and defaults to 5
+    '''
+
+    cache_texture = BooleanProperty(False)
+    '''If True, the widgets are drawn in a texture while the playground is
+    moved or zoomed, and drawn again when it stops moving or they change.
+       :data:`cache_texture` is a :class:`~kivy.properties.BooleanProperty`
+       and defaults to False
+    '''
+
     tree = ObjectProperty()
 
     clicked = BooleanProperty(False)
@@ -446,6 +507,9 @@ class Playground(ScatterPlane):
     __events__ = ('on_show_edit',)
 
     def __init__(self, **kwargs):
+        # texture of the sandbox, drawn while moving when cache_texture is
+        # on. Used by the handlers called by the kv rule
+        self.texture_cache = None
         super(Playground, self).__init__(**kwargs)
         self.keyboard = None
         self.selected_widget = None
@@ -455,11 +519,41 @@ class Playground(ScatterPlane):
         self.widget_to_paste = None
         self._popup = None
         self._last_root = None
+        # (root name, kv hash): (root, project, rules revision), from the
+        # least recently displayed
+        self._root_cache = OrderedDict()
+        # (kv hash, project, rules revision) of the root displayed
+        self._root_source = None
+        # instances of the toolbox widgets, ready to be dragged
+        self.widget_pool = ToolboxWidgetPool(self)
+        self.bind(transform=self._on_transform_changed)
 
     def on_root(self, *args):
+        self.release_texture()
         if self.root:
             self._last_root = self.root
 
+    def on_sandbox(self, *args):
+        if self.texture_cache:
+            self.texture_cache.release()
+        self.texture_cache = None
+        if self.sandbox:
+            self.texture_cache = WidgetTextureCache(self.sandbox)
+
+    def on_cache_texture(self, *args):
+        if not self.cache_texture:
+            self.release_texture()
+
+    def _on_transform_changed(self, *args):
+        if self.cache_texture and self.texture_cache:
+            self.texture_cache.hold()
+
+    def release_texture(self, *args):
+        '''Draws the widgets again instead of their cached texture
+        '''
+        if self.texture_cache:
+            self.texture_cache.release()
+
     def on_pos(self, *args):
         '''Default handler for 'on_pos'
         '''
@@ -469,6 +563,7 @@ class Playground(ScatterPlane):
     def on_size(self, *args):
         '''Default handler for 'on_size'
         '''
+        self.release_texture()
         if self.sandbox:
             self.sandbox.size = self.size
 
@@ -568,10 +663,10 @@ class Playground(ScatterPlane):
                 'Do you want to save and continue?' % file_name
             )
 
-            @ignore_proj_watcher
             def save_and_load(*args):
-                get_current_project().save()
-                self._perform_load_widget(widget_name, True)
+                get_current_project().save(
+                    on_saved=lambda *args: self._perform_load_widget(
+                        widget_name, True))
 
             def dont_save(*args):
                 d.close_popup()
@@ -595,14 +690,17 @@ class Playground(ScatterPlane):
         :param update_kv_lang if True, reloads the kv file. If False, keep the
             kv lang text
         '''
+        self._cache_root()
         self.root_name = widget_name
         self.root = None
         self.sandbox.clear_widgets()
         widgets = get_current_project().app_widgets
+        journal = get_designer().edit_journal
         try:
             target = widgets[widget_name]
             if update_kv_lang:
                 # updates kv lang text with file
+                journal.untrack(self.kv_code_input)
                 kv_path = target.kv_path
                 if kv_path:
                     self.kv_code_input.text = open(kv_path,
@@ -614,15 +712,57 @@ class Playground(ScatterPlane):
                     )
                     self.kv_code_input.text = ''
             self.root_app_widget = target
-            wdg = get_app_widget(target)
+            wdg = self._cached_root(widget_name)
+            if wdg is None:
+                wdg = get_app_widget(target)
             if wdg is None:
                 self.kv_code_input.have_error = True
             self.add_widget_to_parent(wdg, None, from_undo=True, from_kv=True)
+            if wdg is not None:
+                self._root_source = self._kv_source()
             self.kv_code_input.path = target.kv_path
+            if update_kv_lang:
+                journal.track(self.kv_code_input)
         except (KeyError, AttributeError):
             show_message(
                 'Failed to load %s widget' % widget_name, 5, 'error')
 
+    def _kv_source(self):
+        project = get_current_project()
+        return (content_hash(self.kv_code_input.text.encode('utf-8')),
+                project, project.rules_revision)
+
+    def _cache_root(self):
+        '''Keeps the root displayed to display it again, if it was not
+        modified since it was created
+        '''
+        root, source = self.root, self._root_source
+        self._root_source = None
+        if root is None or source is None or source != self._kv_source():
+            return
+        key = (self.root_name, source[0])
+        self._root_cache.pop(key, None)
+        self._root_cache[key] = (root, ) + source[1:]
+        while len(self._root_cache) > self.root_cache_size:
+            self._root_cache.popitem(last=False)
+
+    def _cached_root(self, widget_name):
+        '''Returns the root widget_name created from the kv text in the kv
+        lang area, if it is cached and the rules did not change since. The
+        outdated roots are removed
+        '''
+        project = get_current_project()
+        for key, (root, proj, revision) in list(self._root_cache.items()):
+            if proj is not project or revision != project.rules_revision:
+                del self._root_cache[key]
+        key = (widget_name,
+               content_hash(self.kv_code_input.text.encode('utf-8')))
+        entry = self._root_cache.pop(key, None)
+        if entry is None or entry[0].parent is not None:
+            return None
+        return entry[0]
+
+    @trace.traced('Playground.on_reload_kv')
     def on_reload_kv(self, kv_lang_area, text, force):
         '''Reloads widgets from kv lang input and update the
         visible widget.
@@ -631,12 +771,22 @@ class Playground(ScatterPlane):
         :param text: kv source
         :param kv_lang_area: instance of kivy lang area
         '''
+        self.release_texture()
         proj = get_current_project()
         # copy of initial widgets
         widgets = dict(proj.app_widgets)
+        if force:
+            # the python files may be introspected in background
+            proj.parse(on_parsed=functools.partial(self._reload_kv, text,
+                                                   widgets))
+        else:
+            self._reload_kv(text, widgets, proj)
+
+    def _reload_kv(self, text, widgets, proj):
+        '''Reloads the kv source text of the playground.
+        :param widgets: app widgets of the project before the reload
+        '''
         try:
-            if force:
-                proj.parse()
             if self.root_name:
                 kv_path = widgets[self.root_name].kv_path
             else:
@@ -671,10 +821,12 @@ class Playground(ScatterPlane):
         if not os.path.exists(kv_path):
             show_message(kv_path + ' not exists', 5, 'error')
             return
+        journal = get_designer().edit_journal
+        journal.untrack(self.kv_code_input)
         self.kv_code_input.text = open(kv_path, 'r', encoding='utf-8').read()
         self.kv_code_input.path = kv_path
-        for key in widgets:
-            wd = widgets[key]
+        journal.track(self.kv_code_input)
+        for wd in widgets.by_file(kv_path):
             if wd.kv_path == kv_path:
                 self.load_widget(wd.name, update_kv_lang=False)
                 return
@@ -775,6 +927,7 @@ class Playground(ScatterPlane):
         added = False
         if widget is None:
             return False
+        self.release_texture()
 
         with self.sandbox:
             if target is None:
@@ -811,11 +964,9 @@ class Playground(ScatterPlane):
            :param widget_name: name of the widget to be instantiated
         '''
         widget = None
-        for _widget in widgets_common:
-            if _widget[0] == widget_name and _widget[1] == 'custom':
-                app_widgets = get_current_project().app_widgets
-                widget = get_app_widget(app_widgets[widget_name])
-                break
+        if self.widget_pool.spec(widget_name)[3]:
+            app_widgets = get_current_project().app_widgets
+            widget = get_app_widget(app_widgets[widget_name])
         if not widget:
             try:
                 widget = Factory.get(widget_name)(**default_args)
@@ -845,11 +996,9 @@ class Playground(ScatterPlane):
         return kv
 
     def get_playground_drag_element(self, instance, widget_name, touch,
-                                    default_args, extra_args, *args):
+                                    *args):
         '''This function will return the desired playground element
-           for widget_name.
-           :param extra_args: extra args used to display the dragging widget
-           :param default_args: default widget args
+           for widget_name. The widgets are taken from :data:`widget_pool`
            :param touch: instance of the current touch
            :param instance: if from toolbox, ToolboxButton instance.
                     None otherwise
@@ -857,18 +1006,8 @@ class Playground(ScatterPlane):
         '''
 
         # create default widget that will be added and the custom to display
-        widget = self.get_widget(widget_name, **default_args)
-        widget._KD_KV_STR = self.generate_kv_from_args(widget_name,
-                                                       default_args)
-        values = default_args.copy()
-        values.update(extra_args)
-        child = self.get_widget(widget_name, **values)
-        custom = False
-        for op in widgets_common:
-            if op[0] == widget_name:
-                if op[1] == 'custom':
-                    custom = True
-                break
+        widget, child = self.widget_pool.take(widget_name)
+        custom = self.widget_pool.spec(widget_name)[3]
         container = PlaygroundDragElement(
                 playground=self, child=child, widget=widget)
         if not custom:
@@ -896,6 +1035,8 @@ class Playground(ScatterPlane):
         self._widget_x = -1
         self._widget_y = -1
         self.widget_to_paste = None
+        self._root_cache.clear()
+        self._root_source = None
 
     def remove_widget_from_parent(self, widget, from_undo=False,
                                   from_kv=False):
@@ -908,6 +1049,7 @@ class Playground(ScatterPlane):
         d = get_designer()
         if not widget:
             return
+        self.release_texture()
 
         removed_str = ''
         if not from_kv:
@@ -950,21 +1092,12 @@ class Playground(ScatterPlane):
         class_rules = get_current_project().app_widgets
 
         for child in target.children:
-            is_child_custom = False
             if child == widget:
                 continue
 
-            for rule_name in class_rules:
-                if rule_name == type(child).__name__:
-                    is_child_custom = True
-                    break
-
-            is_child_complex = False
-            for _widget in widgets_common:
-                if _widget[0] == type(child).__name__ and \
-                                _widget[1] == 'complex':
-                    is_child_complex = True
-                    break
+            child_name = type(child).__name__
+            is_child_custom = child_name in class_rules
+            is_child_complex = child_name in complex_widgets
 
             # if point lies in custom wigdet's child then return custom widget
             if is_child_custom or is_child_complex:
@@ -997,6 +1130,63 @@ class Playground(ScatterPlane):
 
         return target
 
+    def drop_zones(self, widget):
+        '''Returns the regions of the window where :meth:`find_target` finds
+           each target for widget, with the current layout of the root.
+           A list of (x, y, right, top, target), where the first region
+           containing a position gives its target.
+           :param widget: widget to be added
+        '''
+        zones = []
+        self._add_drop_zones(self.root, widget, None, zones)
+        return zones
+
+    def _add_drop_zones(self, target, widget, clip, zones):
+        '''Adds the drop zones of target to zones, like :meth:`find_target`
+           walks its children. clip is the region of the window where the
+           parents of target collide
+        '''
+        if target is None:
+            return
+
+        x, y = target.to_window(target.x, target.y)
+        right, top = target.to_window(target.right, target.top)
+        x, right = min(x, right), max(x, right)
+        y, top = min(y, top), max(y, top)
+        if clip:
+            x, y = max(x, clip[0]), max(y, clip[1])
+            right, top = min(right, clip[2]), min(top, clip[3])
+            if x > right or y > top:
+                return
+        rect = (x, y, right, top)
+        class_rules = get_current_project().app_widgets
+
+        for child in target.children:
+            if child == widget:
+                continue
+
+            child_name = type(child).__name__
+            if child_name in class_rules or child_name in complex_widgets:
+                if isinstance(child, TabbedPanel):
+                    if child.current_tab:
+                        self._add_drop_zones(child.current_tab.content,
+                                             widget, rect, zones)
+                        zones.append(rect + (None, ))
+                        return
+                else:
+                    zones.append(rect + (target, ))
+                    return
+
+            elif isinstance(target, Carousel):
+                self._add_drop_zones(child, widget, rect, zones)
+                zones.append(rect + (None, ))
+                return
+
+            elif self.allowed_target_for(child, widget) or child.children:
+                self._add_drop_zones(child, widget, rect, zones)
+
+        zones.append(rect + (target, ))
+
     def _custom_widget_collides(self, widget, x, y):
         '''This widget is used to find which custom widget collides with x,y
         '''
@@ -1109,11 +1299,7 @@ class Playground(ScatterPlane):
             d = get_current_project()
             class_rules = d.app_widgets
             root_widget = self.root
-            is_child_custom = False
-            for rule_name in class_rules:
-                if rule_name == type(parent).__name__:
-                    is_child_custom = True
-                    break
+            is_child_custom = type(parent).__name__ in class_rules
 
             # find appropriate parent to add widget_to_paste
             while parent:
@@ -1235,6 +1421,7 @@ class Playground(ScatterPlane):
             self.keyboard.bind(on_key_down=self._on_keyboard_down)
 
         if super(ScatterPlane, self).collide_point(*touch.pos):
+            self.release_texture()
             if not self.dragging:
                 self.touch = touch
                 Clock.schedule_once(self.start_widget_dragging, 0.5)
@@ -0,0 +1,384 @@
+'''Renders the root displayed in the playground at several sizes, in
+offscreen Fbos, to check a layout at phone, tablet and desktop sizes without
+resizing the playground. Each size has its own instance of the root, and
+after an edit only the sizes where the root is drawn differently are
+rendered again.
+'''
+from functools import partial
+from timeit import default_timer
+
+from designer.utils.utils import get_app_widget
+from kivy.clock import Clock
+from kivy.compat import string_types
+from kivy.event import EventDispatcher
+from kivy.factory import Factory
+from kivy.graphics import (
+    Canvas,
+    ClearBuffers,
+    ClearColor,
+    Fbo,
+    InstructionGroup,
+)
+from kivy.lang import Builder, Parser, ParserException
+from kivy.properties import ListProperty, ObjectProperty, StringProperty
+from kivy.uix.boxlayout import BoxLayout
+from kivy.uix.button import Button
+from kivy.uix.layout import Layout
+from kivy.uix.modalview import ModalView
+from kivy.uix.togglebutton import ToggleButton
+
+
+#: (name, size) of the sizes that can be previewed
+PREVIEW_SIZES = (
+    ('Phone', (360, 640)),
+    ('Phone landscape', (640, 360)),
+    ('Tablet', (1024, 768)),
+    ('Desktop', (1920, 1080)),
+)
+
+#: Sizes previewed by default
+DEFAULT_SIZES = [(360, 640), (1024, 768), (1920, 1080)]
+
+_SIMPLE_TYPES = (string_types, int, float, bool)
+
+#: Attributes of the canvas instructions compared by :func:`render_signature`
+_INSTRUCTION_ATTRS = ('rgba', 'pos', 'size', 'points', 'width', 'close',
+                      'source', 'radius', 'segments', 'angle_start',
+                      'angle_end', 'dash_length', 'dash_offset', 'angle',
+                      'axis', 'origin', 'xy', 'x', 'y', 'z')
+
+
+def layout_tree(widget, passes=2):
+    '''Updates the label textures and lays out the widget tree now, as the
+    Clock would do in the next frames
+    '''
+    for _ in range(passes):
+        for child in widget.walk(restrict=True):
+            if hasattr(child, 'texture_update'):
+                child.texture_update()
+            if isinstance(child, Layout):
+                child.do_layout()
+
+
+def _simple_values(obj, names):
+    '''Returns the (name, value) of the attributes names of obj with a
+    number, a string or a list of numbers as value
+    '''
+    values = []
+    for name in names:
+        value = getattr(obj, name, None)
+        if isinstance(value, (list, tuple)):
+            value = tuple(value)
+            if not all(isinstance(v, (int, float)) for v in value):
+                continue
+        elif value is not None and not isinstance(value, _SIMPLE_TYPES):
+            continue
+        values.append((name, value))
+    return values
+
+
+def canvas_signature(group):
+    '''Returns the class and simple attribute values of the instructions of
+    group. The canvas of the children widgets are left out
+    '''
+    signature = []
+    for instruction in group.children:
+        if isinstance(instruction, Canvas):
+            continue
+        signature.append(type(instruction).__name__)
+        if isinstance(instruction, InstructionGroup):
+            signature.append(canvas_signature(instruction))
+        else:
+            signature.extend(_simple_values(instruction, _INSTRUCTION_ATTRS))
+    return tuple(signature)
+
+
+def render_signature(widget):
+    '''Returns the class, geometry and simple property values of each widget
+    of the tree, and the instructions of its canvas. Two trees with the same
+    signature are drawn the same way
+    '''
+    signature = []
+    for child in widget.walk(restrict=True):
+        values = [type(child).__name__]
+        values.extend(_simple_values(child, sorted(child.properties())))
+        canvas = child.canvas
+        if canvas is not None:
+            values.append(canvas_signature(canvas))
+            if canvas.has_before:
+                values.append(canvas_signature(canvas.before))
+            if canvas.has_after:
+                values.append(canvas_signature(canvas.after))
+        signature.append(tuple(values))
+    return tuple(signature)
+
+
+class SizePreview(object):
+    '''Instance of the root at one size, and the texture where it is drawn
+    '''
+
+    def __init__(self, size):
+        self.size = tuple(size)
+        self.widget = None
+        self.source = None
+        self.signature = None
+        self.fbo = Fbo(size=self.size, with_stencilbuffer=True)
+
+    @property
+    def texture(self):
+        return self.fbo.texture
+
+    def update(self, widget):
+        '''Lays out widget at the size of the preview, and draws it if it is
+        not drawn like the previous widget. Returns True if it was drawn
+        '''
+        widget.size_hint = (None, None)
+        widget.pos = (0, 0)
+        widget.size = self.size
+        layout_tree(widget)
+        self.widget = widget
+        signature = render_signature(widget)
+        if signature == self.signature:
+            return False
+        self.signature = signature
+
+        fbo = self.fbo
+        fbo.clear()
+        with fbo:
+            ClearColor(0, 0, 0, 0)
+            ClearBuffers()
+        fbo.add(widget.canvas)
+        fbo.draw()
+        fbo.remove(widget.canvas)
+        return True
+
+
+class PreviewRenderer(EventDispatcher):
+    '''Keeps a :class:`SizePreview` of the playground root for each size of
+    :data:`sizes`, rendered in the next frames, a few milliseconds per frame.
+    Dispatches on_preview with the previews drawn again.
+    :param budget: seconds used per frame to render the previews
+    '''
+
+    playground = ObjectProperty(None)
+    '''Reference to the :class:`~designer.components.playground.Playground`
+       :data:`playground` is an :class:`~kivy.properties.ObjectProperty`
+    '''
+
+    sizes = ListProperty(DEFAULT_SIZES)
+    '''Sizes to preview.
+       :data:`sizes` is a :class:`~kivy.properties.ListProperty`
+    '''
+
+    __events__ = ('on_preview', )
+
+    def __init__(self, budget=0.02, **kwargs):
+        # used by on_sizes, when sizes is given
+        self.budget = budget
+        self.previews = {}  # size: SizePreview
+        self._pending = []
+        self._root_rule = (None, None)  # (source, parsed kv)
+        self._render_trigger = Clock.create_trigger(self.render)
+        super(PreviewRenderer, self).__init__(**kwargs)
+
+    def on_sizes(self, *args):
+        self.update()
+
+    def on_preview(self, preview):
+        pass
+
+    def root_source(self):
+        '''Returns the name and kv source of the root of the playground,
+        which change when the previews are outdated
+        '''
+        playground = self.playground
+        if playground is None or playground.root_app_widget is None:
+            return None
+        return playground.root_name, playground._kv_source()
+
+    def update(self, *args):
+        '''Renders, in the next frames, the previews of the sizes that are
+        outdated
+        '''
+        sizes = [tuple(size) for size in self.sizes]
+        for size in list(self.previews):
+            if size not in sizes:
+                del self.previews[size]
+        source = self.root_source()
+        for size in sizes:
+            preview = self.previews.get(size)
+            if preview is None:
+                preview = self.previews[size] = SizePreview(size)
+            if preview.source != source and size not in self._pending:
+                self._pending.append(size)
+        if self._pending:
+            self._render_trigger()
+
+    def render(self, *args):
+        '''Renders the pending previews, during budget seconds
+        '''
+        start = default_timer()
+        while self._pending and default_timer() - start < self.budget:
+            preview = self.previews.get(self._pending.pop(0))
+            if preview is None:
+                continue
+            preview.source = self.root_source()
+            widget = self.create_root()
+            if widget is not None and preview.update(widget):
+                self.dispatch('on_preview', preview)
+        if self._pending:
+            self._render_trigger()
+
+    def create_root(self):
+        '''Creates an instance of the root displayed in the playground.
+        Returns None if it could not be created
+        '''
+        playground = self.playground
+        target = playground.root_app_widget
+        if target is None:
+            return None
+        if not target.is_root:
+            return get_app_widget(target)
+
+        # the root rule of the kv file has a single instance, created when
+        # the file was loaded
+        source = self.root_source()
+        if self._root_rule[0] != source:
+            try:
+                parser = Parser(content=playground.kv_code_input.text)
+            except ParserException:
+                parser = None
+            self._root_rule = (source, parser)
+        parser = self._root_rule[1]
+        if parser is None or parser.root is None:
+            return None
+        widget = None
+        with playground.sandbox:
+            widget = Factory.get(parser.root.name)()
+            Builder._apply_rule(widget, parser.root, parser.root)
+        return widget
+
+
+class PlaygroundPreviewItem(BoxLayout):
+    '''Thumbnail of a :class:`SizePreview`
+    '''
+
+    texture = ObjectProperty(None, allownone=True)
+    '''Texture of the preview.
+       :data:`texture` is an :class:`~kivy.properties.ObjectProperty`
+    '''
+
+    text = StringProperty('')
+    '''Size of the preview.
+       :data:`text` is a :class:`~kivy.properties.StringProperty`
+    '''
+
+
+class PlaygroundPreviewView(ModalView):
+    '''Dialog with the previews of the playground root, updated while it is
+       open
+    '''
+
+    grid = ObjectProperty()
+    '''This property holds a reference to the grid of the thumbnails.
+       :data:`grid` is an :class:`~kivy.properties.ObjectProperty`
+    '''
+
+    sizes_box = ObjectProperty()
+    '''This property holds a reference to the box of the size buttons.
+       :data:`sizes_box` is an :class:`~kivy.properties.ObjectProperty`
+    '''
+
+    renderer = ObjectProperty()
+    '''Instance of :class:`PreviewRenderer` of the dialog.
+       :data:`renderer` is an :class:`~kivy.properties.ObjectProperty`
+    '''
+
+    def __init__(self, **kwargs):
+        super(PlaygroundPreviewView, self).__init__(**kwargs)
+        self._items = {}  # size: PlaygroundPreviewItem
+        self._update_trigger = Clock.create_trigger(self.renderer.update, 0.5)
+        self.renderer.bind(on_preview=self._show_preview,
+                           sizes=self._update_items)
+        for name, size in PREVIEW_SIZES:
+            btn = ToggleButton(text=name)
+            btn.state = 'down' if list(size) in self._sizes() else 'normal'
+            btn.bind(state=partial(self._on_size_state, size))
+            self.sizes_box.add_widget(btn)
+        self._update_items()
+
+    def _sizes(self):
+        return [list(size) for size in self.renderer.sizes]
+
+    def _on_size_state(self, size, btn, state):
+        self.select_size(size, state == 'down')
+
+    def select_size(self, size, selected):
+        '''Adds or removes size from the sizes previewed
+        '''
+        sizes = [s for s in self._sizes() if s != list(size)]
+        if selected:
+            sizes.append(list(size))
+        self.renderer.sizes = sizes
+
+    def _update_items(self, *args):
+        self.grid.clear_widgets()
+        items = {}
+        for size in self.renderer.sizes:
+            size = tuple(size)
+            item = self._items.get(size)
+            if item is None:
+                item = PlaygroundPreviewItem(text='%dx%d' % size)
+            preview = self.renderer.previews.get(size)
+            if preview is not None and preview.signature is not None:
+                item.texture = preview.texture
+            items[size] = item
+            self.grid.add_widget(item)
+        self._items = items
+
+    def _show_preview(self, renderer, preview):
+        item = self._items.get(preview.size)
+        if item is not None:
+            item.texture = preview.texture
+            item.canvas.ask_update()
+
+    def on_open(self, *args):
+        playground = self.renderer.playground
+        playground.bind(root=self._update_trigger)
+        playground.kv_code_input.bind(text=self._update_trigger)
+        self.renderer.update()
+
+    def on_dismiss(self, *args):
+        playground = self.renderer.playground
+        playground.unbind(root=self._update_trigger)
+        playground.kv_code_input.unbind(text=self._update_trigger)
+        self._update_trigger.cancel()
+
+
+class PlaygroundPreviewButton(Button):
+    '''Button to open the :class:`PlaygroundPreviewView` of the playground
+    '''
+
+    playground = ObjectProperty()
+    '''This property holds a reference to the
+       :class:`~designer.components.playground.Playground` instance.
+       :data:`playground` is an :class:`~kivy.properties.ObjectProperty`
+    '''
+
+    view = ObjectProperty(None, allownone=True)
+    '''Instance of :class:`PlaygroundPreviewView`, created when the button
+       is pressed.
+       :data:`view` is an :class:`~kivy.properties.ObjectProperty`
+    '''
+
+    def on_press(self):
+        '''Opens the :class:`PlaygroundPreviewView`
+        '''
+        if self.view is None:
+            self.view = PlaygroundPreviewView(
+                renderer=PreviewRenderer(playground=self.playground))
+        window = self.get_root_window()
+        self.view.size_hint = None, None
+        self.view.width = window.width * 0.8
+        self.view.height = window.height * 0.8
+        self.view.open()
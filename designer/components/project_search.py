@@ -0,0 +1,235 @@
+import os
+import re
+from functools import partial
+
+from designer.core.search import (
+    ProjectSearch,
+    compile_pattern,
+    is_ignored_path,
+)
+from designer.utils.utils import get_current_project, get_designer
+from kivy.properties import BooleanProperty, ObjectProperty, StringProperty
+from kivy.uix.boxlayout import BoxLayout
+from kivy.uix.treeview import TreeViewLabel
+
+
+class SearchFileNode(TreeViewLabel):
+    '''SearchFileNode represents a file with matches in ProjectSearchView
+    '''
+
+    path = StringProperty('')
+    '''Absolute path of the file
+        :data:`path` is a :class:`~kivy.properties.StringProperty`
+    '''
+
+
+class SearchMatchNode(TreeViewLabel):
+    '''SearchMatchNode represents a match in ProjectSearchView
+    '''
+
+    path = StringProperty('')
+    '''Absolute path of the file
+        :data:`path` is a :class:`~kivy.properties.StringProperty`
+    '''
+
+    match = ObjectProperty(None)
+    '''Instance of :class:`~designer.core.search.FileMatch`
+        :data:`match` is a :class:`~kivy.properties.ObjectProperty`
+    '''
+
+
+class ProjectSearchView(BoxLayout):
+    '''ProjectSearchView searches and replaces text in all files of the
+       current project. The results are displayed grouped by file while the
+       search is running.
+    '''
+
+    tree = ObjectProperty(None)
+    '''TreeView with the results
+        :data:`tree` is a :class:`~kivy.properties.ObjectProperty`
+    '''
+
+    txt_query = ObjectProperty(None)
+    '''Search query TextInput
+        :data:`txt_query` is a :class:`~kivy.properties.ObjectProperty`
+    '''
+
+    query = StringProperty('')
+    '''Search query
+        :data:`query` is a :class:`~kivy.properties.StringProperty`
+    '''
+
+    replacement = StringProperty('')
+    '''Replacement text
+        :data:`replacement` is a :class:`~kivy.properties.StringProperty`
+    '''
+
+    use_regex = BooleanProperty(False)
+    '''Filter search with regex
+        :data:`use_regex` is a :class:`~kivy.properties.BooleanProperty`
+    '''
+
+    case_sensitive = BooleanProperty(False)
+    '''Filter search with case sensitive text
+        :data:`case_sensitive` is a :class:`~kivy.properties.BooleanProperty`
+    '''
+
+    whole_word = BooleanProperty(False)
+    '''Only match whole words
+        :data:`whole_word` is a :class:`~kivy.properties.BooleanProperty`
+    '''
+
+    status = StringProperty('')
+    '''Search status message
+        :data:`status` is a :class:`~kivy.properties.StringProperty`
+    '''
+
+    searching = BooleanProperty(False)
+    '''Indicates if a search is running
+        :data:`searching` is a :class:`~kivy.properties.BooleanProperty`
+    '''
+
+    def __init__(self, **kwargs):
+        super(ProjectSearchView, self).__init__(**kwargs)
+        self.project_search = ProjectSearch()
+        self._results = {}
+        # the last search stopped at MAX_RESULTS
+        self._truncated = False
+
+    def _get_open_code_inputs(self):
+        '''Returns a dict with the path and code input of each open file
+        '''
+        d = get_designer()
+        return dict((code.path, code) for code in d.code_inputs if code.path)
+
+    def _get_files(self):
+        '''Returns the list of project files that can be searched
+        '''
+        project = get_current_project()
+        if not project or not project.path:
+            return []
+        return [f for f in project.file_list
+                if not is_ignored_path(project.path, f)]
+
+    def clear(self):
+        '''Remove all results
+        '''
+        self.project_search.cancel()
+        self.searching = False
+        self._results = {}
+        self._truncated = False
+        tree = self.tree
+        for node in list(tree.root.nodes):
+            tree.remove_node(node)
+
+    def search(self, *args):
+        '''Start a search in the project files
+        '''
+        self.clear()
+        if not self.query:
+            self.status = ''
+            return
+        buffers = dict((path, code.text) for path, code in
+                       self._get_open_code_inputs().items())
+        try:
+            self.project_search.search(
+                self._get_files(), self.query, self.use_regex,
+                self.case_sensitive, self.whole_word, buffers=buffers,
+                on_progress=self._on_file_matches,
+                on_result=self._on_search_finished)
+        except re.error as e:
+            self.status = 'Invalid regular expression: %s' % e
+            return
+        self.searching = True
+        self.status = 'Searching...'
+
+    def _on_file_matches(self, request, path, matches):
+        '''Add the matches of a file to the tree
+        '''
+        project = get_current_project()
+        self._results[path] = matches
+        rel_path = os.path.relpath(path, project.path)
+        node = self.tree.add_node(
+            SearchFileNode(text='%s (%d)' % (rel_path, len(matches)),
+                           path=path, is_open=True))
+        for match in matches:
+            self.tree.add_node(
+                SearchMatchNode(text='%d: %s' % (match.line + 1,
+                                                 match.text.strip()),
+                                path=path, match=match), node)
+        self.status = '%d matches in %d files...' % (request.total,
+                                                      len(self._results))
+
+    def _on_search_finished(self, request, total):
+        self.searching = False
+        self.status = '%d matches in %d files' % (total, len(self._results))
+        self._truncated = request.truncated
+        if request.truncated:
+            self.status += ' (only the first %d are displayed)' % total
+
+    def on_selected_node(self, node):
+        '''Open the file of the selected match
+        '''
+        if not isinstance(node, SearchMatchNode):
+            return
+        project = get_current_project()
+        d = get_designer()
+        rel_path = os.path.relpath(node.path, project.path)
+        d.designer_content.tab_pannel.open_file(
+            node.path, rel_path,
+            on_load=partial(self._select_match, node.match))
+
+    def _select_match(self, match, code, *args):
+        if code is not None:
+            code.focus = True
+            code.select_match((match.start, match.end))
+
+    def replace_all(self, *args):
+        '''Replace the query in all files of the last search. Open files are
+        updated in the editor, the others are written in background. If the
+        search stopped at the maximum number of results, all the project
+        files are searched again for the replacement.
+        '''
+        if not self._results or self.searching:
+            return
+        if self._truncated:
+            files = self._get_files()
+        else:
+            files = list(self._results.keys())
+        code_inputs = self._get_open_code_inputs()
+        closed_files = [f for f in files if f not in code_inputs]
+        try:
+            pattern = compile_pattern(self.query, self.use_regex,
+                                      self.case_sensitive, self.whole_word)
+            self.project_search.replace(
+                closed_files, self.query, self.replacement, self.use_regex,
+                self.case_sensitive, self.whole_word,
+                on_write=get_designer().project_watcher.expect_write,
+                on_result=self._on_replace_finished,
+                on_error=self._on_replace_error)
+        except re.error as e:
+            self.status = 'Invalid regular expression: %s' % e
+            return
+
+        project = get_current_project()
+        for path in files:
+            code = code_inputs.get(path)
+            if code is None:
+                continue
+            text, count = self.project_search.replace_text(
+                code.text, pattern, self.replacement, self.use_regex)
+            if count:
+                code.text = text
+                code.saved = False
+                project.saved = False
+
+        self.searching = True
+        self.status = 'Replacing...'
+
+    def _on_replace_finished(self, job, counts):
+        self.searching = False
+        self.search()
+
+    def _on_replace_error(self, job, error):
+        self.searching = False
+        self.status = 'Failed to replace, no file was modified: %s' % error
@@ -0,0 +1,184 @@
+
+from designer.core.file_tree import FileTree
+from kivy.clock import Clock
+from kivy.metrics import dp
+from kivy.properties import (
+    BooleanProperty,
+    NumericProperty,
+    ObjectProperty,
+    StringProperty,
+)
+from kivy.uix.behaviors import ButtonBehavior
+from kivy.uix.label import Label
+from kivy.uix.relativelayout import RelativeLayout
+from kivy.uix.scrollview import ScrollView
+from kivy.utils import escape_markup
+
+
+#: Colors of the git status markers in the Project Tree
+GIT_COLORS = {
+    '?': '77cc77',
+    'M': 'e6b84d',
+    'D': 'e06060',
+    'staged': '6fa8dc',
+}
+
+
+def node_markup(node):
+    '''Returns the text displayed for a
+    :class:`~designer.core.file_tree.FileTreeNode`, with the git status
+    '''
+    name = escape_markup(node.name)
+    if node.is_dir:
+        return '%s %s' % ('-' if node.is_open else '+', name)
+    value = node.git_status
+    if not value:
+        return name
+    if value == '??':
+        color = GIT_COLORS['?']
+    elif value[1] != ' ':
+        color = GIT_COLORS.get(value[1], GIT_COLORS['M'])
+    else:
+        color = GIT_COLORS['staged']
+    return '%s [color=%s]%s[/color]' % (name, color, value.strip()[-1])
+
+
+class ProjectTreeRow(ButtonBehavior, Label):
+    '''ProjectTreeRow displays a node of
+    :class:`~designer.components.project_tree.ProjectTreeView`. Rows are
+    reused while scrolling
+    '''
+
+    node = ObjectProperty(None, allownone=True)
+    '''Instance of :class:`~designer.core.file_tree.FileTreeNode`
+        :data:`node` is a :class:`~kivy.properties.ObjectProperty`
+    '''
+
+    selected = BooleanProperty(False)
+    '''Indicates if the row node is selected
+        :data:`selected` is a :class:`~kivy.properties.BooleanProperty`
+    '''
+
+
+class ProjectTreeView(ScrollView):
+    '''ProjectTreeView displays the project files. The files are kept in a
+       :class:`~designer.core.file_tree.FileTree`, and only the rows visible
+       on the screen are realized as widgets, so the number of widgets
+       doesn't depend on the number of files.
+    '''
+
+    row_height = NumericProperty(dp(24))
+    '''Height of each row
+        :data:`row_height` is a :class:`~kivy.properties.NumericProperty`
+    '''
+
+    indent = NumericProperty(dp(16))
+    '''Horizontal indentation of each tree level
+        :data:`indent` is a :class:`~kivy.properties.NumericProperty`
+    '''
+
+    selected_path = StringProperty('')
+    '''Path of the selected node
+        :data:`selected_path` is a :class:`~kivy.properties.StringProperty`
+    '''
+
+    __events__ = ('on_file_press', )
+
+    def __init__(self, **kwargs):
+        self.tree = FileTree()
+        self.container = RelativeLayout(size_hint=(1, None))
+        self._rows = {}
+        self._free_rows = []
+        self._trigger_refresh = Clock.create_trigger(self.refresh)
+        super(ProjectTreeView, self).__init__(**kwargs)
+        self.add_widget(self.container)
+        self.container.bind(width=self._trigger_refresh)
+        self.bind(scroll_y=self._trigger_refresh,
+                  size=self._trigger_refresh,
+                  row_height=self._trigger_refresh,
+                  selected_path=self._trigger_refresh)
+
+    def load(self, path, files):
+        '''Display files, all inside of the directory path
+        '''
+        self.tree.reset(path, files)
+        self.selected_path = ''
+        self.scroll_y = 1
+        self._trigger_refresh()
+
+    def clear(self):
+        '''Remove all files
+        '''
+        self.load('', ())
+
+    def add_file(self, path):
+        '''Add a file to the tree. Returns True if the file was added
+        '''
+        if self.tree.add_file(path) is None:
+            return False
+        self._trigger_refresh()
+        return True
+
+    def remove(self, path):
+        '''Remove a file or directory from the tree. Returns True if it was
+        in the tree
+        '''
+        if not self.tree.remove(path):
+            return False
+        self._trigger_refresh()
+        return True
+
+    def on_file_press(self, path):
+        pass
+
+    def on_row_press(self, row):
+        '''Expand or collapse a directory, or dispatch on_file_press
+        '''
+        node = row.node
+        if node is None:
+            return
+        self.selected_path = node.path
+        if node.is_dir:
+            self.tree.set_open(node, not node.is_open)
+            self._trigger_refresh()
+        else:
+            self.dispatch('on_file_press', node.path)
+
+    def refresh(self, *args):
+        '''Update the rows displayed on the screen
+        '''
+        nodes = self.tree.rows()
+        rh = self.row_height
+        container = self.container
+        height = max(len(nodes) * rh, self.height)
+        container.height = height
+        y0 = self.scroll_y * max(0, height - self.height)
+        first = max(0, int((height - y0 - self.height) / rh))
+        last = min(len(nodes) - 1, int((height - y0) / rh))
+
+        # release the rows out of the screen
+        rows = self._rows
+        for index in list(rows):
+            if index < first or index > last:
+                row = rows.pop(index)
+                row.node = None
+                container.remove_widget(row)
+                self._free_rows.append(row)
+
+        for index in range(first, last + 1):
+            row = rows.get(index)
+            if row is None:
+                if self._free_rows:
+                    row = self._free_rows.pop()
+                else:
+                    row = ProjectTreeRow(size_hint=(None, None))
+                    row.bind(on_release=self.on_row_press)
+                rows[index] = row
+                container.add_widget(row)
+            node = nodes[index]
+            row.node = node
+            row.text = node_markup(node)
+            row.selected = node.path == self.selected_path
+            row.x = node.depth * self.indent
+            row.y = height - (index + 1) * rh
+            row.size = (container.width - row.x, rh)
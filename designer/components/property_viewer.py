@@ -1,5 +1,6 @@
 from designer.core.undo_manager import PropOperation
 from designer.uix.settings import SettingListContent
+from designer.utils import trace
 from designer.utils.utils import FakeSettingList, get_designer
 from kivy.core.window import Window
 from kivy.properties import (
@@ -259,6 +260,7 @@ class PropertyViewer(ScrollView):
         '''
         self.prop_list.clear_widgets()
 
+    @trace.traced('PropertyViewer.discover')
     def discover(self, value):
         '''To discover all properties and add their
            :class:`~designer.components.property_viewer.PropertyLabel` and
@@ -1,3 +1,4 @@
+from designer.utils import trace
 from kivy.clock import Clock
 from kivy.properties import ObjectProperty, StringProperty
 from kivy.uix.boxlayout import BoxLayout
@@ -10,6 +11,11 @@ from kivy.uix.tabbedpanel import (
 )
 
 
+#: Spans displayed on the status bar when tracing is enabled: (label, name)
+TRACE_READOUT = (('reload', 'Playground.on_reload_kv'),
+                 ('parse', 'Project.parse'))
+
+
 class StatusNavBarButton(Button):
     '''StatusNavBarButton is a :class:`~kivy.uix.button` representing
        the Widgets in the Widget hierarchy of currently selected widget.
@@ -139,12 +145,37 @@ class StatusBar(BoxLayout):
        :class:`~kivy.properties.ObjectProperty`
     '''
 
+    trace_info = StringProperty('')
+    '''Durations of the last spans of :data:`TRACE_READOUT`, visible when
+       tracing is enabled
+       :data:`trace_info` is an
+       :class:`~kivy.properties.StringProperty` and defaults to ''
+    '''
+
     __events__ = ('on_message_press', 'on_info_press', )
 
     def __init__(self, **kwargs):
         super(StatusBar, self).__init__(**kwargs)
         self.update_navbar = Clock.create_trigger(self._update_navbar)
         self.update_nav_size = Clock.create_trigger(self._update_content_width)
+        self.update_trace_info = Clock.create_trigger(self._update_trace_info)
+        self._trace_names = set(name for label, name in TRACE_READOUT)
+        trace.add_listener(self._on_trace_span)
+
+    def _on_trace_span(self, name, duration):
+        if name in self._trace_names:
+            self.update_trace_info()
+
+    def _update_trace_info(self, *args):
+        if not trace.enabled:
+            self.trace_info = ''
+            return
+        info = []
+        for label, name in TRACE_READOUT:
+            duration = trace.last_duration(name)
+            if duration is not None:
+                info.append('%s %d ms' % (label, duration * 1000))
+        self.trace_info = ' | '.join(info)
 
     def _update_navbar(self, *args):
         '''To update navbar with the parents of currently selected Widget.
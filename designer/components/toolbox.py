@@ -1,4 +1,7 @@
+from timeit import default_timer
+
 from designer.utils.toolbox_widgets import toolbox_widgets
+from designer.utils.utils import get_current_project
 from kivy.clock import Clock
 from kivy.factory import Factory
 from kivy.metrics import pt
@@ -8,6 +11,117 @@ from kivy.uix.boxlayout import BoxLayout
 from kivy.uix.button import Button
 
 
+class ToolboxWidgetPool(object):
+    '''Keeps, for each toolbox widget, an instance to add to the playground
+    and another to display while dragging, so a drag from the toolbox
+    doesn't wait for the widgets to be created. The instances taken are
+    created again in the next frames, a few milliseconds per frame.
+    The widgets of the project are not kept, as their classes change when
+    the project is parsed, and the instances are dropped when the kv rules
+    of the project change, as they may apply to the toolbox widgets.
+    :param playground: :class:`~designer.components.playground.Playground`
+        used to generate the kv of the widgets
+    :param budget: seconds used per frame to create instances
+    '''
+
+    def __init__(self, playground, budget=0.005):
+        self.playground = playground
+        self.budget = budget
+        self._specs = {}  # name: (default args, extra args, kv, custom)
+        self._pool = {}  # name: (widget, drag widget)
+        # (project, rules revision) of the instances of the pool
+        self._rules = None
+        self._pending = []
+        self._refill_trigger = Clock.create_trigger(self.refill)
+
+    def spec(self, widget_name):
+        '''Returns (default args, extra args, kv, custom) of the toolbox
+        widget widget_name
+        '''
+        spec = self._specs.get(widget_name)
+        if spec is None:
+            # widgets of the project are added after the pool is prepared
+            self.update_specs()
+            spec = self._specs.get(widget_name, ({}, {}, '', False))
+        return spec
+
+    def update_specs(self):
+        '''Reads the default and extra args of the toolbox widgets
+        '''
+        specs = {}
+        for options in toolbox_widgets:
+            name = options[0]
+            if name in specs:
+                continue
+            default_args = options[2] if len(options) > 2 else {}
+            extra_args = options[3] if len(options) > 3 else {}
+            specs[name] = (
+                default_args, extra_args,
+                self.playground.generate_kv_from_args(name, default_args),
+                options[1] == 'custom')
+        self._specs = specs
+
+    def prepare(self, *args):
+        '''Creates the instances of all the toolbox widgets in the next
+        frames
+        '''
+        self.update_specs()
+        self._pending = [name for name, spec in self._specs.items()
+                         if not spec[3] and name not in self._pool]
+        self._refill_trigger()
+
+    def _check_rules(self):
+        '''Drops the instances created with other kv rules, they are created
+        again in the next frames
+        '''
+        project = get_current_project()
+        rules = (project, project.rules_revision)
+        if rules == self._rules:
+            return
+        self._rules = rules
+        for name in self._pool:
+            if name not in self._pending:
+                self._pending.append(name)
+        self._pool = {}
+        if self._pending:
+            self._refill_trigger()
+
+    def take(self, widget_name):
+        '''Returns (widget, drag widget) of widget_name, created by the pool
+        or now. widget has the kv in _KD_KV_STR
+        '''
+        self._check_rules()
+        default_args, extra_args, kv, custom = self.spec(widget_name)
+        widgets = self._pool.pop(widget_name, None)
+        if widgets is None:
+            widgets = self._create(widget_name)
+        if not custom:
+            self._pending.append(widget_name)
+            self._refill_trigger()
+        return widgets
+
+    def _create(self, widget_name):
+        default_args, extra_args, kv, custom = self.spec(widget_name)
+        widget = self.playground.get_widget(widget_name, **default_args)
+        if widget is not None:
+            widget._KD_KV_STR = kv
+        values = dict(default_args)
+        values.update(extra_args)
+        return widget, self.playground.get_widget(widget_name, **values)
+
+    def refill(self, *args):
+        '''Creates the pending instances, during budget seconds
+        '''
+        self._check_rules()
+        start = default_timer()
+        while self._pending and default_timer() - start < self.budget:
+            name = self._pending.pop(0)
+            if name not in self._pool:
+                self._pool[name] = self._create(name)
+        if self._pending:
+            self._refill_trigger()
+
+
 class ToolboxCategory(AccordionItem):
     '''ToolboxCategory is responsible for grouping and showing
        :class:`~designer.components.toolbox.ToolboxButton`
@@ -80,6 +80,15 @@ class UICreator(FloatLayout):
        containing error_console, kivy_console and kv_lang_area
     '''
 
+    project_search = ObjectProperty(None)
+    '''Instance of
+        :class:`~designer.components.project_search.ProjectSearchView`
+    '''
+
+    tab_project_search = ObjectProperty(None)
+    '''Tab of :data:`project_search` in :data:`tab_pannel`
+    '''
+
     eventviewer = ObjectProperty(None)
 
     def __init__(self, **kwargs):
@@ -1,4 +1,5 @@
-from designer.utils.toolbox_widgets import toolbox_widgets
+from designer.utils import trace
+from designer.utils.toolbox_widgets import complex_widgets
 from designer.utils.utils import get_current_project
 from kivy.clock import Clock
 from kivy.properties import BooleanProperty, ObjectProperty
@@ -57,17 +58,8 @@ class WidgetsTree(ScrollView):
         class_rules = get_current_project().app_widgets
         root_widget = self.playground.root
 
-        is_child_custom = False
-        for rule_name in class_rules:
-            if rule_name == type(node).__name__:
-                is_child_custom = True
-                break
-
-        is_child_complex = False
-        for widget in toolbox_widgets:
-            if widget[0] == type(node).__name__ and widget[1] == 'complex':
-                is_child_complex = True
-                break
+        is_child_custom = type(node).__name__ in class_rules
+        is_child_complex = type(node).__name__ in complex_widgets
 
         if root_widget == node or (not is_child_custom and
                                    not is_child_complex):
@@ -103,6 +95,7 @@ class WidgetsTree(ScrollView):
             self._clear_tree(tree, n)
             remove_node(n)
 
+    @trace.traced('WidgetsTree.refresh')
     def _refresh(self, *l):
         '''This function will refresh the tree. It will first remove all nodes
            and then insert them using recursive_insert
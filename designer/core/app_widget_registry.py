@@ -0,0 +1,175 @@
+'''Plain data records of the widgets and rules found in a project, and the
+registry that indexes them by name, file and kind.
+
+The records don't dispatch events: the registry counts its changes and calls
+its change callback once, when the outermost :meth:`AppWidgetRegistry.batch`
+ends, so a whole project parse produces a single notification.
+'''
+from contextlib import contextmanager
+
+
+ROOT = 'root'
+DYNAMIC = 'dynamic'
+CLASS = 'class'
+KINDS = (ROOT, DYNAMIC, CLASS)
+
+
+class AppWidget(object):
+    '''Widget or rule found in the project files.
+    :param name: widget name
+    :param kv_path: path of the kv file where the widget rule is
+    :param py_path: path of the py file where the widget class is
+    :param module_name: module name used to import the widget class
+    :param is_root: if the widget is a root widget of a kv file
+    :param is_dynamic: if the widget is a dynamic class, like <Name@Button>
+    :param instance: root widget instance returned by Builder.load_string.
+        None if the widget is not root
+    '''
+
+    __slots__ = ('name', 'kv_path', 'py_path', 'module_name', 'is_root',
+                 'is_dynamic', 'instance')
+
+    def __init__(self, name='', kv_path='', py_path='', module_name='',
+                 is_root=False, is_dynamic=False, instance=None):
+        self.name = name
+        self.kv_path = kv_path
+        self.py_path = py_path
+        self.module_name = module_name
+        self.is_root = is_root
+        self.is_dynamic = is_dynamic
+        self.instance = instance
+
+    @property
+    def kind(self):
+        '''One of ROOT, DYNAMIC or CLASS
+        '''
+        if self.is_root:
+            return ROOT
+        if self.is_dynamic:
+            return DYNAMIC
+        return CLASS
+
+    def __repr__(self):
+        return '<AppWidget %s %s>' % (self.name, self.kind)
+
+
+class AppWidgetRegistry(object):
+    '''Read only mapping of widget name: :class:`AppWidget`, in the order they
+    were added, with indexes by file and kind.
+    Records must be changed with :meth:`update`, so the indexes are kept.
+    :param on_change: called with the registry after a change, or at the end
+        of the outermost :meth:`batch` if something changed in it
+    '''
+
+    def __init__(self, on_change=None):
+        self.on_change = on_change
+        self.revision = 0
+        self._widgets = {}
+        # path: {name: None}, dicts are used as ordered sets
+        self._by_file = {}
+        # kind: {name: None}
+        self._by_kind = dict((kind, {}) for kind in KINDS)
+        self._batch_depth = 0
+        self._batch_revision = 0
+
+    def __len__(self):
+        return len(self._widgets)
+
+    def __iter__(self):
+        return iter(list(self._widgets))
+
+    def __contains__(self, name):
+        return name in self._widgets
+
+    def __getitem__(self, name):
+        return self._widgets[name]
+
+    def __delitem__(self, name):
+        self._unindex(self._widgets.pop(name))
+        self._changed()
+
+    def get(self, name, default=None):
+        return self._widgets.get(name, default)
+
+    def keys(self):
+        return list(self._widgets)
+
+    def values(self):
+        return list(self._widgets.values())
+
+    def items(self):
+        return list(self._widgets.items())
+
+    def by_file(self, path):
+        '''Returns the records with path as kv or py file
+        '''
+        return [self._widgets[n] for n in self._by_file.get(path, ())]
+
+    def by_kind(self, kind):
+        '''Returns the records of a kind, one of ROOT, DYNAMIC or CLASS
+        '''
+        return [self._widgets[n] for n in self._by_kind[kind]]
+
+    def update(self, name, **fields):
+        '''Sets the fields of the record name, creating it if needed.
+        Returns the record
+        '''
+        wdg = self._widgets.get(name)
+        if wdg is None:
+            wdg = self._widgets[name] = AppWidget(name=name)
+        else:
+            self._unindex(wdg)
+        for field, value in fields.items():
+            setattr(wdg, field, value)
+        self._index(wdg)
+        self._changed()
+        return wdg
+
+    def clear(self):
+        '''Removes all the records
+        '''
+        if not self._widgets:
+            return
+        self._widgets = {}
+        self._by_file = {}
+        self._by_kind = dict((kind, {}) for kind in KINDS)
+        self._changed()
+
+    @contextmanager
+    def batch(self):
+        '''Groups the changes done inside it in a single notification
+        '''
+        if not self._batch_depth:
+            self._batch_revision = self.revision
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if not self._batch_depth and \
+                    self.revision != self._batch_revision:
+                self._notify()
+
+    def _index(self, wdg):
+        for path in (wdg.kv_path, wdg.py_path):
+            if path:
+                self._by_file.setdefault(path, {})[wdg.name] = None
+        self._by_kind[wdg.kind][wdg.name] = None
+
+    def _unindex(self, wdg):
+        for path in (wdg.kv_path, wdg.py_path):
+            names = self._by_file.get(path)
+            if names is not None:
+                names.pop(wdg.name, None)
+                if not names:
+                    del self._by_file[path]
+        self._by_kind[wdg.kind].pop(wdg.name, None)
+
+    def _changed(self):
+        self.revision += 1
+        if not self._batch_depth:
+            self._notify()
+
+    def _notify(self):
+        if self.on_change is not None:
+            self.on_change(self)
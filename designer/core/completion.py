@@ -0,0 +1,177 @@
+import ast
+import collections
+from io import open
+
+from designer.utils.worker import Worker, current_job
+
+
+COMPLETION_BATCH_SIZE = 40
+
+Suggestion = collections.namedtuple('Suggestion', ('name', 'complete'))
+'''Plain completion item, safe to be used outside the completion thread.
+Compatible with :class:`~designer.uix.completion_bubble.CompletionBubble`
+'''
+
+
+class _Prewarm(object):
+    '''State of the prewarming of a project, kept between the prewarm jobs
+    '''
+
+    def __init__(self, project_path, py_files):
+        self.project_path = project_path
+        self.py_files = py_files
+        self.modules = None
+        self.done = set()
+
+
+class CodeCompletion(object):
+    '''CodeCompletion runs Jedi in a background worker, so the UI is never
+       blocked while the completions are computed. Jedi is only used from
+       the worker thread, that keeps a Jedi project per opened project path.
+       Each new completion request cancels the previous one. Jedi is
+       imported by the worker on the first request.
+    '''
+
+    def __init__(self):
+        super(CodeCompletion, self).__init__()
+        self.worker = Worker(name='CodeCompletion')
+        self.project_path = ''
+        self._projects = {}
+        self._prewarm_state = None
+
+    def _get_project(self, path):
+        '''Returns the cached Jedi project of path. Old Jedi versions have no
+        project support, so returns None
+        '''
+        import jedi
+        if not path or not hasattr(jedi, 'Project'):
+            return None
+        project = self._projects.get(path)
+        if project is None:
+            project = self._projects[path] = jedi.Project(path)
+        return project
+
+    def _completions(self, source, line, column, path=None,
+                     project_path=''):
+        '''Calls Jedi with the correct API to the installed version.
+        Must be called from the worker thread.
+        '''
+        import jedi
+        if hasattr(jedi.Script, 'complete'):
+            kwargs = {'path': path or None}
+            project = self._get_project(project_path)
+            if project is not None:
+                kwargs['project'] = project
+            return jedi.Script(source, **kwargs).complete(line, column)
+        return jedi.Script(source, line, column, path or None).completions()
+
+    def load_project(self, path, py_files=()):
+        '''Sets the project used by the completions and starts the cache
+        prewarming with the modules imported by the project files
+        :param path: project path
+        :param py_files: list of project python files
+        Returns the :class:`~designer.utils.worker.Job` of the prewarming
+        '''
+        self.project_path = path
+        self._prewarm_state = _Prewarm(path, list(py_files))
+        return self.worker.submit(self._prewarm, self._prewarm_state,
+                                  key='prewarm')
+
+    def unload_project(self):
+        '''Cancel pending and running requests of the current project
+        '''
+        self.worker.cancel_all()
+        self.project_path = ''
+        self._prewarm_state = None
+
+    def _prewarm(self, state):
+        '''Find the modules imported by the project and complete them,
+        so Jedi caches are hot when the user requests the first completion.
+        Stops between modules when cancelled, the next prewarm job of state
+        continues with the modules left. Returns the number of modules
+        prewarmed
+        '''
+        job = current_job()
+        if state.modules is None:
+            modules = self._imported_modules(state.py_files, job)
+            if modules is None:
+                return len(state.done)
+            state.modules = modules
+
+        for module in state.modules:
+            if job.cancelled:
+                break
+            if module in state.done:
+                continue
+            try:
+                self._completions('import %s\n%s.' % (module, module),
+                                  2, len(module) + 1,
+                                  project_path=state.project_path)
+            except Exception:
+                # the module may not be importable, ignore it
+                pass
+            state.done.add(module)
+        return len(state.done)
+
+    def _imported_modules(self, py_files, job):
+        '''Returns the sorted names of the top level modules imported by
+        py_files, or None if job was cancelled
+        '''
+        modules = set()
+        for py in py_files:
+            if job.cancelled:
+                return None
+            try:
+                with open(py, 'r', encoding='utf-8') as f:
+                    tree = ast.parse(f.read())
+            except (IOError, SyntaxError, ValueError):
+                continue
+            for node in ast.walk(tree):
+                if isinstance(node, ast.Import):
+                    for alias in node.names:
+                        modules.add(alias.name.split('.')[0])
+                elif isinstance(node, ast.ImportFrom) and node.module \
+                        and not node.level:
+                    modules.add(node.module.split('.')[0])
+        return sorted(modules)
+
+    def complete(self, source, line, column, path='', on_progress=None,
+                 on_result=None):
+        '''Request completions to the source at line and column.
+        Completions are sent to on_progress in batches as a list of
+        :class:`Suggestion`. on_result receives the total of completions.
+        Returns the :class:`~designer.utils.worker.Job`
+        :param source: python source code
+        :param line: line number, starting in 1
+        :param column: column number, starting in 0
+        :param path: path of the source file
+        '''
+        # the request is not queued behind the prewarming, which continues
+        # after it
+        prewarming = self.worker.cancel('prewarm')
+        job = self.worker.submit(self._complete, source, line, column, path,
+                                 self.project_path, on_progress=on_progress,
+                                 on_result=on_result, key='complete')
+        if prewarming and self._prewarm_state is not None:
+            self.worker.submit(self._prewarm, self._prewarm_state,
+                               key='prewarm')
+        return job
+
+    def _complete(self, source, line, column, path, project_path):
+        job = current_job()
+        completions = self._completions(source, line, column, path,
+                                        project_path)
+        batch = []
+        total = 0
+        for completion in completions:
+            if job.cancelled:
+                return total
+            batch.append(Suggestion(completion.name, completion.complete))
+            if len(batch) == COMPLETION_BATCH_SIZE:
+                job.emit(batch)
+                total += len(batch)
+                batch = []
+        if batch:
+            job.emit(batch)
+            total += len(batch)
+        return total
@@ -0,0 +1,371 @@
+'''Append-only journal of the edits made to the open files of a project.
+Each change of a code input is appended as a small text delta, so unsaved
+changes can be recovered after a crash without saving the whole buffers.
+
+The journal is a file of JSON lines in the project .designer folder:
+
+    {"op": "open", "path": "main.kv", "hash": "..."}
+    {"op": "edit", "path": "main.kv", "start": 10, "end": 12, "text": "x"}
+
+"open" entries record the hash of the content the following edits of the
+file are based on, and the edits are only replayed if the file still has
+this content. The operations of the UndoManager are not recorded: undoing
+or redoing one updates the kv text, which is recorded as edits.
+'''
+import json
+import os
+from io import open
+
+from designer.core.file_writer import (
+    TEMP_EXT,
+    content_hash,
+    encode_text,
+    replace_file,
+)
+from kivy.logger import Logger
+
+
+JOURNAL_FILE = os.path.join('.designer', 'journal')
+
+#: Suffix of a journal left by a previous session, waiting to be recovered
+RECOVER_EXT = '.recover'
+
+#: The journal is compacted after this number of bytes is appended
+COMPACT_SIZE = 256 * 1024
+
+
+def text_delta(old, new):
+    '''Returns (start, end, text) such that
+    new == old[:start] + text + old[end:]
+    '''
+    # bisect the common prefix and suffix, comparing slices is much faster
+    # than comparing characters one by one
+    limit = min(len(old), len(new))
+    lo, hi = 0, limit
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if old[:mid] == new[:mid]:
+            lo = mid
+        else:
+            hi = mid - 1
+    start = lo
+    lo, hi = 0, limit - start
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if old[len(old) - mid:] == new[len(new) - mid:]:
+            lo = mid
+        else:
+            hi = mid - 1
+    return start, len(old) - lo, new[start:len(new) - lo]
+
+
+def apply_edit(text, edit):
+    '''Returns text with the edit (start, end, text) applied
+    '''
+    start, end, new = edit
+    return text[:start] + new + text[end:]
+
+
+def merge_edits(first, second):
+    '''Returns a single edit equivalent to applying first and then second,
+    or None if they don't touch the same range
+    '''
+    s1, e1, t1 = first
+    s2, e2, t2 = second
+    end1 = s1 + len(t1)
+    if s2 > end1 or e2 < s1:
+        return None
+    text = (t1[:s2 - s1] if s2 > s1 else u'') + t2 + \
+        (t1[e2 - s1:] if e2 < end1 else u'')
+    return min(s1, s2), e1 + max(0, e2 - end1), text
+
+
+def read_entries(path):
+    '''Returns the entries of a journal file. A line partially written when
+    the journal was interrupted is ignored
+    '''
+    entries = []
+    try:
+        with open(path, 'rb') as f:
+            for line in f:
+                try:
+                    entries.append(json.loads(line.decode('utf-8')))
+                except ValueError:
+                    continue
+    except (IOError, OSError):
+        pass
+    return entries
+
+
+def replay(entries):
+    '''Returns a dict with the files edited in entries:
+    path: (hash of the base content, list of edits)
+    '''
+    files = {}
+    for entry in entries:
+        op = entry.get('op')
+        if op == 'open':
+            files[entry['path']] = (entry['hash'], [])
+        elif op == 'edit':
+            state = files.get(entry['path'])
+            if state is not None:
+                state[1].append((entry['start'], entry['end'],
+                                 entry['text']))
+    return dict((path, state) for path, state in files.items() if state[1])
+
+
+def compact(entries):
+    '''Returns the entries needed to replay entries, with the consecutive
+    edits of a file merged
+    '''
+    result = []
+    for path, (digest, edits) in sorted(replay(entries).items()):
+        result.append({'op': 'open', 'path': path, 'hash': digest})
+        merged = []
+        for edit in edits:
+            if merged:
+                edit_merged = merge_edits(merged[-1], edit)
+                if edit_merged is not None:
+                    merged[-1] = edit_merged
+                    continue
+            merged.append(edit)
+        for start, end, text in merged:
+            result.append({'op': 'edit', 'path': path, 'start': start,
+                           'end': end, 'text': text})
+    return result
+
+
+def _dump(entry):
+    return (json.dumps(entry) + '\n').encode('utf-8')
+
+
+def compact_journal(path, size, tmp_path):
+    '''Write the compacted first size bytes of the journal path to
+    tmp_path. Runs in the io worker
+    '''
+    with open(path, 'rb') as f:
+        data = f.read(size)
+    entries = []
+    for line in data.splitlines():
+        try:
+            entries.append(json.loads(line.decode('utf-8')))
+        except ValueError:
+            continue
+    with open(tmp_path, 'wb') as f:
+        for entry in compact(entries):
+            f.write(_dump(entry))
+    return tmp_path
+
+
+def recover_files(project_path, journal_path):
+    '''Replay the journal journal_path. Returns a dict with the recovered
+    content of the files whose content on disk is the one the edits are
+    based on. Runs in the io worker
+    '''
+    recovered = {}
+    for rel_path, (digest, edits) in replay(
+            read_entries(journal_path)).items():
+        path = os.path.join(project_path, rel_path)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                text = f.read()
+        except (IOError, OSError, ValueError):
+            continue
+        if content_hash(encode_text(text)) != digest:
+            continue
+        for edit in edits:
+            text = apply_edit(text, edit)
+        recovered[path] = text
+    return recovered
+
+
+class _JournalFile(object):
+    '''Journal state of a tracked code input
+    '''
+
+    __slots__ = ('path', 'rel_path', 'text', 'digest', 'opened')
+
+    def __init__(self, path, rel_path, text, digest=None):
+        self.path = path
+        self.rel_path = rel_path
+        self.text = text
+        self.digest = digest
+        self.opened = False
+
+
+class EditJournal(object):
+    '''Records the edits of the tracked code inputs in the journal of the
+    current project. The journal is compacted in background by worker
+    '''
+
+    def __init__(self, worker):
+        self.worker = worker
+        self.path = None
+        self.project_path = None
+        self._file = None
+        self._files = {}
+        self._written = 0
+        self._compact_job = None
+        self._compact_pending = None
+
+    @property
+    def recover_path(self):
+        return self.path + RECOVER_EXT if self.path else None
+
+    def open(self, project_path):
+        '''Start the journal of a project. A journal left by a previous
+        session is moved aside to be recovered. Returns True if there is a
+        journal to recover
+        '''
+        self.close()
+        self.project_path = project_path
+        self.path = os.path.join(project_path, JOURNAL_FILE)
+        recover_path = self.recover_path
+        try:
+            if not os.path.exists(os.path.dirname(self.path)):
+                os.makedirs(os.path.dirname(self.path))
+            if os.path.exists(self.path) and os.path.getsize(self.path):
+                if os.path.exists(recover_path):
+                    with open(recover_path, 'ab') as dest:
+                        with open(self.path, 'rb') as src:
+                            dest.write(src.read())
+                else:
+                    os.rename(self.path, recover_path)
+            self._file = open(self.path, 'wb')
+        except (IOError, OSError) as e:
+            Logger.warning('Edit Journal: failed to open %s: %s' %
+                           (self.path, e))
+            self._file = None
+        self._written = 0
+        return os.path.exists(recover_path)
+
+    def recover(self, on_result):
+        '''Replay the journal left by a previous session in background.
+        on_result is called with a dict path: recovered content
+        '''
+        self.worker.submit(recover_files, self.project_path,
+                           self.recover_path,
+                           on_result=lambda job, files: on_result(files))
+
+    def discard_recovery(self):
+        '''Remove the journal left by a previous session
+        '''
+        if self.recover_path and os.path.exists(self.recover_path):
+            os.remove(self.recover_path)
+
+    def close(self, discard=True):
+        '''Stop recording. With discard, the journal is removed, as all
+        changes were saved or dropped by the user
+        '''
+        for code in list(self._files):
+            self.untrack(code)
+        if self._compact_job is not None:
+            self._compact_job.cancel()
+            self._compact_job = None
+            self._compact_pending = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            if discard and os.path.exists(self.path):
+                os.remove(self.path)
+
+    def track(self, code):
+        '''Record the edits of code. Its current text must be the content of
+        the file on disk
+        '''
+        if self._file is None or not code.path:
+            return
+        if code not in self._files:
+            code.bind(text=self._on_text)
+        self._files[code] = _JournalFile(
+            code.path, os.path.relpath(code.path, self.project_path),
+            code.text)
+
+    def untrack(self, code):
+        '''Stop recording the edits of code
+        '''
+        if self._files.pop(code, None) is not None:
+            code.unbind(text=self._on_text)
+
+    def checkpoint(self, code, path, text, digest):
+        '''The text of code was saved to path with the content hash digest.
+        The next edits are based on it
+        '''
+        state = self._files.get(code)
+        if state is None or state.path != path or code.path != path:
+            return
+        state.text = text
+        state.digest = digest
+        state.opened = False
+        if code.text != text:
+            # modified while it was saved
+            self._on_text(code, code.text)
+
+    def _on_text(self, code, text):
+        state = self._files.get(code)
+        if state is None or state.path != code.path:
+            # the code input has another file, until tracked again
+            return
+        start, end, new = text_delta(state.text, text)
+        if start == end and not new:
+            return
+        if not state.opened:
+            if state.digest is None:
+                state.digest = content_hash(encode_text(state.text))
+            self._write({'op': 'open', 'path': state.rel_path,
+                         'hash': state.digest})
+            state.opened = True
+        self._write({'op': 'edit', 'path': state.rel_path, 'start': start,
+                     'end': end, 'text': new})
+        state.text = text
+
+    def _write(self, entry):
+        if self._file is None:
+            return
+        data = _dump(entry)
+        try:
+            self._file.write(data)
+            self._file.flush()
+        except (IOError, OSError) as e:
+            Logger.warning('Edit Journal: failed to write: %s' % e)
+            return
+        if self._compact_pending is not None:
+            self._compact_pending.append(data)
+        self._written += len(data)
+        if self._written > COMPACT_SIZE and self._compact_job is None:
+            self._compact()
+
+    def _compact(self):
+        '''Compact the journal in background. Entries written meanwhile are
+        appended to the compacted journal when it's ready
+        '''
+        self._compact_pending = []
+        self._compact_job = self.worker.submit(
+            compact_journal, self.path, self._file.tell(),
+            self.path + TEMP_EXT, on_result=self._on_compacted,
+            on_error=self._on_compact_error)
+
+    def _on_compacted(self, job, tmp_path):
+        if job is not self._compact_job:
+            return
+        pending = self._compact_pending
+        self._compact_job = None
+        self._compact_pending = None
+        try:
+            with open(tmp_path, 'ab') as f:
+                for data in pending:
+                    f.write(data)
+            self._file.close()
+            replace_file(tmp_path, self.path)
+            self._file = open(self.path, 'ab')
+        except (IOError, OSError) as e:
+            Logger.warning('Edit Journal: failed to compact: %s' % e)
+            if self._file.closed:
+                self._file = open(self.path, 'ab')
+        self._written = 0
+
+    def _on_compact_error(self, job, error):
+        if job is self._compact_job:
+            self._compact_job = None
+            self._compact_pending = None
+        Logger.warning('Edit Journal: failed to compact: %s' % error)
@@ -0,0 +1,140 @@
+'''Tree of the project files indexed by path. Used by the Project Tree to
+add and remove files without looping over the siblings, and to display
+only the rows of the open directories.
+'''
+import os
+
+
+class FileTreeNode(object):
+    '''A file or directory of the :class:`FileTree`
+    '''
+
+    __slots__ = ('name', 'path', 'parent', 'depth', 'is_dir', 'is_open',
+                 'children', 'git_status', '_sorted')
+
+    def __init__(self, name, path, parent=None, is_dir=False):
+        self.name = name
+        self.path = path
+        self.parent = parent
+        self.depth = parent.depth + 1 if parent is not None else 0
+        self.is_dir = is_dir
+        self.is_open = False
+        self.children = {} if is_dir else None
+        self.git_status = ''
+        self._sorted = None
+
+    def sorted_children(self):
+        '''Returns the children sorted with directories first. The list is
+        cached until a child is added or removed
+        '''
+        if self._sorted is None:
+            self._sorted = sorted(
+                self.children.values(),
+                key=lambda n: (not n.is_dir, n.name.lower(), n.name))
+        return self._sorted
+
+
+class FileTree(object):
+    '''Files of a directory organized as a tree. The nodes are indexed by
+    their absolute path
+    '''
+
+    def __init__(self, path=''):
+        self.reset(path, ())
+
+    def reset(self, path, files):
+        '''Remove all nodes and add files, all inside of path
+        '''
+        self.path = path
+        self.root = FileTreeNode(os.path.basename(path), path, is_dir=True)
+        self.root.is_open = True
+        self._nodes = {path: self.root}
+        self._rows = None
+        for f in files:
+            self.add_file(f)
+
+    def __len__(self):
+        return len(self._nodes) - 1
+
+    def __contains__(self, path):
+        return path in self._nodes
+
+    def get(self, path):
+        '''Returns the node of path, or None
+        '''
+        return self._nodes.get(path)
+
+    def add_file(self, path):
+        '''Add a file and its missing directories. Returns the new node, or
+        None if the file is already in the tree or is not inside of the
+        tree path
+        '''
+        if path in self._nodes:
+            return None
+        rel_path = os.path.relpath(path, self.path)
+        if rel_path.startswith(os.pardir):
+            return None
+        components = rel_path.split(os.sep)
+        node = self.root
+        nodes = self._nodes
+        for name in components[:-1]:
+            child = node.children.get(name)
+            if child is None:
+                child = FileTreeNode(name, os.path.join(node.path, name),
+                                     node, is_dir=True)
+                node.children[name] = child
+                node._sorted = None
+                nodes[child.path] = child
+            node = child
+        child = FileTreeNode(components[-1], path, node)
+        node.children[child.name] = child
+        node._sorted = None
+        nodes[path] = child
+        self._rows = None
+        return child
+
+    def remove(self, path):
+        '''Remove a file or directory. Empty directories left are removed
+        too. Returns True if the path was in the tree
+        '''
+        node = self._nodes.get(path)
+        if node is None or node is self.root:
+            return False
+        stack = [node]
+        while stack:
+            n = stack.pop()
+            del self._nodes[n.path]
+            if n.is_dir:
+                stack.extend(n.children.values())
+        parent = node.parent
+        del parent.children[node.name]
+        parent._sorted = None
+        while parent is not self.root and not parent.children:
+            del self._nodes[parent.path]
+            del parent.parent.children[parent.name]
+            parent.parent._sorted = None
+            parent = parent.parent
+        self._rows = None
+        return True
+
+    def set_open(self, node, is_open):
+        '''Expand or collapse a directory
+        '''
+        if node.is_dir and node.is_open != is_open:
+            node.is_open = is_open
+            self._rows = None
+
+    def rows(self):
+        '''Returns the list of visible nodes: the root and the children of
+        the open directories, in display order
+        '''
+        if self._rows is None:
+            rows = []
+            stack = [self.root]
+            while stack:
+                node = stack.pop()
+                rows.append(node)
+                if node.is_dir and node.is_open:
+                    stack.extend(reversed(node.sorted_children()))
+            self._rows = rows
+        return self._rows
@@ -0,0 +1,108 @@
+'''Writes the project files atomically: the content is written to a temporary
+file in the same directory, which is then renamed over the original file, so
+a file is never left half written.
+'''
+import hashlib
+import os
+import shutil
+import tempfile
+
+from designer.utils import trace
+
+
+#: Extension of the temporary files, ignored by the project watcher
+TEMP_EXT = '.kdtmp'
+
+#: Renames a file over an existing one
+replace_file = getattr(os, 'replace', os.rename)
+
+
+def encode_text(text):
+    '''Returns the bytes written for text, with the platform line breaks
+    '''
+    if os.linesep != '\n':
+        text = text.replace('\n', os.linesep)
+    return text.encode('utf-8')
+
+
+def content_hash(data):
+    '''Returns the hash of the bytes data
+    '''
+    return hashlib.sha1(data).hexdigest()
+
+
+def file_hash(path):
+    '''Returns the hash of the content of path, or None if it can't be read
+    '''
+    try:
+        with open(path, 'rb') as f:
+            return content_hash(f.read())
+    except (IOError, OSError):
+        return None
+
+
+def write_temp(path, data):
+    '''Write the bytes data to a temporary file next to path, with the mode
+    of path. Returns the temporary file path, to be renamed over path with
+    :func:`replace_file`
+    '''
+    directory, name = os.path.split(path)
+    fd, tmp_path = tempfile.mkstemp(prefix='.%s.' % name, suffix=TEMP_EXT,
+                                    dir=directory or '.')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        if os.path.exists(path):
+            shutil.copymode(path, tmp_path)
+    except Exception:
+        remove_temp(tmp_path)
+        raise
+    return tmp_path
+
+
+def remove_temp(tmp_path):
+    '''Remove a temporary file created by :func:`write_temp`
+    '''
+    try:
+        os.remove(tmp_path)
+    except OSError:
+        pass
+
+
+def atomic_write(path, data):
+    '''Replace the content of path with the bytes data
+    '''
+    tmp_path = write_temp(path, data)
+    try:
+        replace_file(tmp_path, path)
+    except Exception:
+        remove_temp(tmp_path)
+        raise
+
+
+@trace.traced('write_files')
+def write_files(files, on_write=None):
+    '''Write the files whose content changed. Can be called from a worker
+    thread.
+    :param files: list of (path, text). Each text is compared with the
+        content on disk, which may have been modified outside of Kivy
+        Designer since the last save
+    :param on_write: called with (path, hash) before a file is replaced
+    Returns (hashes, written): a dict with the hash of the content of each
+    file, and the list of paths written
+    '''
+    result = {}
+    written = []
+    for path, text in files:
+        data = encode_text(text)
+        digest = content_hash(data)
+        result[path] = digest
+        if file_hash(path) == digest:
+            continue
+        if on_write is not None:
+            on_write(path, digest)
+        atomic_write(path, data)
+        written.append(path)
+    return result, written
@@ -0,0 +1,80 @@
+'''Lazy access to the diff of a repository: the list of changed files is
+read first, and the diff of each file is only read when requested and
+displayed in pages.
+'''
+import collections
+
+
+#: Number of diff lines displayed at once
+PAGE_LINES = 1000
+
+DiffFile = collections.namedtuple(
+    'DiffFile', ('path', 'added', 'deleted', 'old_path'))
+'''A changed file. added and deleted are the number of changed lines, or
+None for binary files. old_path is the previous path of a renamed file
+'''
+
+
+def parse_numstat(output):
+    '''Parses the output of `git diff --numstat -z`
+    '''
+    files = []
+    entries = output.split('\0')
+    i = 0
+    while i < len(entries):
+        entry = entries[i]
+        i += 1
+        if not entry:
+            continue
+        added, deleted, path = entry.split('\t', 2)
+        old_path = None
+        if not path:
+            # renamed, the next entries are the old and new paths
+            old_path, path = entries[i], entries[i + 1]
+            i += 2
+        files.append(DiffFile(
+            path,
+            int(added) if added != '-' else None,
+            int(deleted) if deleted != '-' else None,
+            old_path))
+    return files
+
+
+def read_changed_files(repo):
+    '''Returns the list of :class:`DiffFile` with changes in the work tree
+    not yet staged
+    '''
+    return parse_numstat(repo.git.diff('--numstat', '-z'))
+
+
+def read_file_diff(repo, diff_file, page_lines=PAGE_LINES):
+    '''Returns a :class:`DiffPager` with the diff of a :class:`DiffFile`
+    '''
+    paths = [diff_file.path]
+    if diff_file.old_path:
+        paths.insert(0, diff_file.old_path)
+    return DiffPager(repo.git.diff('--', *paths), page_lines)
+
+
+class DiffPager(object):
+    '''Splits a diff in pages of lines
+    '''
+
+    def __init__(self, text, page_lines=PAGE_LINES):
+        self.lines = text.splitlines()
+        self.page_lines = page_lines
+        self.position = 0
+
+    @property
+    def remaining(self):
+        '''Number of lines not returned yet
+        '''
+        return len(self.lines) - self.position
+
+    def next_page(self):
+        '''Returns the text of the next page, or '' if there are no lines
+        left
+        '''
+        start = self.position
+        self.position = min(len(self.lines), start + self.page_lines)
+        return '\n'.join(self.lines[start:self.position])
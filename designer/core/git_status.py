@@ -0,0 +1,118 @@
+'''Repository status read with a single `git status --porcelain` call.
+Used by :class:`~designer.tools.git_integration.DesignerGit` to cache the
+status in background instead of querying GitPython in the UI thread.
+'''
+import collections
+import re
+
+
+_BRANCH_RE = re.compile(
+    r'^(?:No commits yet on |Initial commit on )?(?P<branch>.+?)'
+    r'(?:\.\.\.(?P<tracking>\S+))?'
+    r'(?: \[(?P<info>[^\]]*)\])?$')
+_AHEAD_RE = re.compile(r'ahead (\d+)')
+_BEHIND_RE = re.compile(r'behind (\d+)')
+
+
+class GitStatus(collections.namedtuple(
+        'GitStatus', ('branch', 'tracking', 'ahead', 'behind', 'files'))):
+    '''Status of a repository. files is a dict with the path of each changed
+    file, relative to the repository root, and its two letters porcelain
+    status code (XY, X is the index status and Y the work tree status)
+    '''
+
+    __slots__ = ()
+
+    @property
+    def untracked(self):
+        return sorted(p for p, c in self.files.items() if c == '??')
+
+    @property
+    def staged(self):
+        return sorted(p for p, c in self.files.items() if c[0] not in ' ?!')
+
+    @property
+    def modified(self):
+        return sorted(p for p, c in self.files.items() if c[1] not in ' ?!')
+
+    @property
+    def is_dirty(self):
+        '''Same as Repo.is_dirty(), untracked files are not considered
+        '''
+        return any(c != '??' for c in self.files.values())
+
+    @property
+    def description(self):
+        '''Branch name with the number of commits ahead and behind the
+        tracking branch
+        '''
+        text = self.branch
+        if self.ahead:
+            text += ' +%d' % self.ahead
+        if self.behind:
+            text += ' -%d' % self.behind
+        return text
+
+
+def parse_status(output):
+    '''Parses the output of `git status --porcelain --branch -z`
+    '''
+    branch = ''
+    tracking = None
+    ahead = behind = 0
+    files = {}
+    entries = output.split('\0')
+    i = 0
+    while i < len(entries):
+        entry = entries[i]
+        i += 1
+        if not entry:
+            continue
+        if entry.startswith('## '):
+            match = _BRANCH_RE.match(entry[3:])
+            if match:
+                branch = match.group('branch')
+                tracking = match.group('tracking')
+                info = match.group('info') or ''
+                m = _AHEAD_RE.search(info)
+                ahead = int(m.group(1)) if m else 0
+                m = _BEHIND_RE.search(info)
+                behind = int(m.group(1)) if m else 0
+            continue
+        code, path = entry[:2], entry[3:]
+        files[path] = code
+        if 'R' in code or 'C' in code:
+            # the next entry is the original path
+            i += 1
+    return GitStatus(branch, tracking, ahead, behind, files)
+
+
+def read_status(repo, paths=None):
+    '''Returns the :class:`GitStatus` of a GitPython Repo. If paths is not
+    None, only these paths (relative to the repository root) are checked;
+    git compares them against the index stat cache, so it doesn't scan the
+    whole work tree
+    '''
+    args = ['--porcelain', '--branch', '-z', '--untracked-files=all']
+    if paths is not None:
+        args.append('--')
+        args.extend(paths)
+    return parse_status(repo.git.status(*args))
+
+
+def merge_status(status, update, paths):
+    '''Returns a new :class:`GitStatus` with the files of status replaced by
+    the files of update in paths. update is the result of
+    :func:`read_status` called with the same paths
+    '''
+    files = dict(status.files)
+    for path in paths:
+        if path in ('', '.'):
+            files = {}
+            break
+        prefix = path.rstrip('/') + '/'
+        for f in list(files):
+            if f == path or f.startswith(prefix):
+                del files[f]
+    files.update(update.files)
+    return update._replace(files=files)
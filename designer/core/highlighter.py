@@ -0,0 +1,253 @@
+'''Incremental syntax highlighting.
+
+:class:`LineHighlighter` keeps the lexer state at the beginning of each line,
+so when a line changes only this line is tokenized again, followed by the
+next lines until the lexer state is the same as before the change.
+'''
+import six
+from pygments.lexer import RegexLexer
+from pygments.token import Error, Text, _TokenType
+
+
+HIGHLIGHT_LINES_PER_STEP = 200
+'''Maximum number of existing lines tokenized again after an edit. If the
+lexer state did not converge, the remaining lines are left to
+:meth:`LineHighlighter.resume`
+'''
+
+CACHE_SIZE = 20000
+'''Maximum number of lines kept in the tokenization cache
+'''
+
+
+class _LineInfo(object):
+    '''Result of the tokenization of a line
+    '''
+
+    __slots__ = ('start', 'end', 'markup')
+
+    def __init__(self, start, end, markup):
+        self.start = start
+        self.end = end
+        self.markup = markup
+
+
+class LineHighlighter(object):
+    '''Converts a list of lines to Kivy markup, using a Pygments lexer and a
+    BBCode formatter, as :class:`~kivy.uix.codeinput.CodeInput` does.
+    Lexers that are not a RegexLexer are tokenized line by line without state
+    '''
+
+    def __init__(self, lexer=None, formatter=None, text_color='',
+                 tab_width=4, lines_per_step=HIGHLIGHT_LINES_PER_STEP):
+        self.lexer = lexer
+        self.formatter = formatter
+        self.text_color = text_color
+        self.tab_width = tab_width
+        self.lines_per_step = lines_per_step
+        self.lines = []
+        self._infos = []
+        self._breaks = []
+        self._cache = {}
+
+    @property
+    def pending(self):
+        '''True if there are lines waiting for :meth:`resume`
+        '''
+        return bool(self._breaks)
+
+    def configure(self, lexer, formatter, text_color, tab_width):
+        '''Update the highlight options. If something changed, the current
+        lines are highlighted again. Returns True if the options changed
+        '''
+        if (lexer is self.lexer and formatter is self.formatter and
+                text_color == self.text_color and
+                tab_width == self.tab_width):
+            return False
+        self.lexer = lexer
+        self.formatter = formatter
+        self.text_color = text_color
+        self.tab_width = tab_width
+        self._cache = {}
+        self.reset(self.lines)
+        return True
+
+    def reset(self, lines):
+        '''Highlight all lines
+        '''
+        self.lines = []
+        self._infos = []
+        self._breaks = []
+        self.splice(0, 0, lines)
+
+    def markup(self, row):
+        '''Returns the markup of the line row
+        '''
+        return self._infos[row].markup
+
+    def update(self, lines):
+        '''Highlight the lines that differ from the current ones.
+        Returns the same as :meth:`splice`
+        '''
+        old = self.lines
+        n_old = len(old)
+        n_new = len(lines)
+        start = 0
+        limit = min(n_old, n_new)
+        while start < limit and old[start] == lines[start]:
+            start += 1
+        end = 0
+        limit -= start
+        while end < limit and old[n_old - end - 1] == lines[n_new - end - 1]:
+            end += 1
+        return self.splice(start, n_old - end, lines[start:n_new - end])
+
+    def splice(self, start, end, new_lines):
+        '''Replace lines[start:end] with new_lines and highlight them.
+        Existing lines after them are highlighted again while the lexer
+        state differs from the state used the last time.
+        Returns a list with the rows, after the new lines, whose markup
+        changed.
+        '''
+        count = len(new_lines)
+        self.lines[start:end] = new_lines
+        self._infos[start:end] = [None] * count
+
+        delta = count - (end - start)
+        breaks = []
+        for row in self._breaks:
+            if row > end:
+                breaks.append(row + delta)
+            elif row > start:
+                # the line after the new ones may be inconsistent
+                breaks.append(start + count)
+            else:
+                breaks.append(row)
+        self._breaks = sorted(set(breaks))
+        return self._highlight(start, start + count)
+
+    def resume(self):
+        '''Continue the highlight interrupted by :data:`lines_per_step`.
+        Returns the rows whose markup changed
+        '''
+        if not self._breaks:
+            return []
+        row = self._breaks.pop(0)
+        return self._highlight(row, row)
+
+    def _highlight(self, row, stop_min):
+        '''Tokenize from row, at least until stop_min, until the lexer state
+        converges
+        '''
+        infos = self._infos
+        lines = self.lines
+        n = len(lines)
+        state = infos[row - 1].end if row else None
+        budget = stop_min + self.lines_per_step
+        changed = []
+        while row < n:
+            info = infos[row]
+            if row >= stop_min and info is not None and info.start == state:
+                break
+            if row >= budget:
+                break
+            new_info = self._lex_line(state, lines[row])
+            if info is not None and new_info.markup != info.markup:
+                changed.append(row)
+            infos[row] = new_info
+            state = new_info.end
+            row += 1
+        # lines checked by this step are consistent now
+        breaks = [b for b in self._breaks if b > row]
+        if row == budget and row < n:
+            breaks.insert(0, row)
+        self._breaks = breaks
+        return changed
+
+    def _lex_line(self, state, line):
+        key = (state, line)
+        info = self._cache.get(key)
+        if info is None:
+            if len(self._cache) >= CACHE_SIZE:
+                self._cache = {}
+            text = line.replace(u'\n', u'').replace(
+                u'\t', u' ' * self.tab_width)
+            if isinstance(self.lexer, RegexLexer) and not self.lexer.filters:
+                tokens, end = self._tokenize(state or ('root', ), text)
+            else:
+                tokens = self.lexer.get_tokens(text)
+                end = None
+            markup = self._format(tokens) if text else u''
+            info = self._cache[key] = _LineInfo(state, end, markup)
+        return info
+
+    def _tokenize(self, stack, text):
+        '''Same algorithm as pygments.lexer.RegexLexer.get_tokens_unprocessed,
+        but also returns the state stack at the end of the line
+        '''
+        lexer = self.lexer
+        text += u'\n'
+        tokens = []
+        pos = 0
+        tokendefs = lexer._tokens
+        statestack = list(stack)
+        statetokens = tokendefs[statestack[-1]]
+        while True:
+            for rexmatch, action, new_state in statetokens:
+                m = rexmatch(text, pos)
+                if m:
+                    if action is not None:
+                        if type(action) is _TokenType:
+                            tokens.append((action, m.group()))
+                        else:
+                            tokens.extend((t, v) for _, t, v in
+                                          action(lexer, m))
+                    pos = m.end()
+                    if new_state is not None:
+                        if isinstance(new_state, tuple):
+                            for s in new_state:
+                                if s == '#pop':
+                                    if len(statestack) > 1:
+                                        statestack.pop()
+                                elif s == '#push':
+                                    statestack.append(statestack[-1])
+                                else:
+                                    statestack.append(s)
+                        elif isinstance(new_state, int):
+                            if abs(new_state) >= len(statestack):
+                                del statestack[1:]
+                            else:
+                                del statestack[new_state:]
+                        elif new_state == '#push':
+                            statestack.append(statestack[-1])
+                        statetokens = tokendefs[statestack[-1]]
+                    break
+            else:
+                if pos >= len(text):
+                    break
+                if text[pos] == u'\n':
+                    statestack = ['root']
+                    statetokens = tokendefs['root']
+                    tokens.append((Text, u'\n'))
+                else:
+                    tokens.append((Error, text[pos]))
+                pos += 1
+        return tokens, tuple(statestack)
+
+    def _format(self, tokens):
+        '''Format tokens to markup, with the same post processing of
+        :meth:`~kivy.uix.codeinput.CodeInput._get_bbcode`
+        '''
+        # replace brackets with special chars, they are not markup
+        tokens = ((t, v.replace(u'[', u'\x01').replace(u']', u'\x02'))
+                  for t, v in tokens)
+        out = six.StringIO()
+        self.formatter.format(tokens, out)
+        ntext = out.getvalue()
+        ntext = ntext.replace(u'\x01', u'&bl;').replace(u'\x02', u'&br;')
+        ntext = u''.join((u'[color=', str(self.text_color), u']',
+                          ntext, u'[/color]'))
+        ntext = ntext.replace(u'\n', u'')
+        # remove possible extra highlight options
+        ntext = ntext.replace(u'[u]', u'').replace(u'[/u]', u'')
+        return ntext
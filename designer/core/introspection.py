@@ -0,0 +1,152 @@
+'''Loads the python files of the projects in a long lived process, to find
+the ones with widget classes. Only these files are loaded again in the
+designer process, which creates the widgets: the other files of the project,
+and their imports, don't run in the designer. The modules imported by the
+project files stay loaded in the worker process between the parses, and a
+file that crashes the worker or doesn't load before the timeout only fails
+itself: the worker process is restarted for the next file.
+
+The worker is disabled by default, the files with widgets are loaded twice.
+'''
+import multiprocessing
+import os
+import signal
+import sys
+from timeit import default_timer
+
+from designer.core.project_manager import (
+    load_py,
+    module_classes,
+    py_module_name,
+)
+from kivy.logger import Logger
+from kivy.uix.widget import Widget
+
+
+DEFAULT_TIMEOUT = 10
+
+# the worker is started from a thread of the designer, and a fork would copy
+# the state of the designer and of its GL context. Python 2 can only fork
+if hasattr(multiprocessing, 'get_context'):
+    _context = multiprocessing.get_context('spawn')
+else:
+    _context = multiprocessing
+
+
+def introspect_file(path, module_name):
+    '''Loads the python file path as module_name and returns the dict sent
+    back to the designer, with the names of its widget classes, or the error
+    raised by the file
+    '''
+    result = {'path': path, 'module_name': module_name, 'widgets': [],
+              'error': None}
+    start = default_timer()
+    try:
+        module = load_py(path, module_name)
+    except Exception as e:
+        result['error'] = str(e)
+    else:
+        # the module replaces the one loaded in the previous parse
+        sys.modules[module_name] = module
+        result['widgets'] = [name for name, klass in module_classes(module)
+                             if issubclass(klass, Widget)]
+    result['time'] = default_timer() - start
+    return result
+
+
+def _worker_main(conn):
+    '''Loop of the worker process, gets (path, module name) and sends the
+    result of :func:`introspect_file`, until it gets None
+    '''
+    # the handlers of the designer are inherited, the worker must stop when
+    # it is terminated
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    # anything printed by the project must not mix with the designer output
+    sys.stdout = sys.stderr
+    while True:
+        try:
+            task = conn.recv()
+        except (EOFError, KeyboardInterrupt):
+            break
+        if task is None:
+            break
+        conn.send(introspect_file(*task))
+    conn.close()
+
+
+class IntrospectionWorker(object):
+    '''Process that loads the python files of the projects.
+    :param timeout: seconds to wait for each file before restarting the
+        worker process
+    '''
+
+    def __init__(self, timeout=DEFAULT_TIMEOUT):
+        self.timeout = timeout
+        self._process = None
+        self._conn = None
+
+    @property
+    def running(self):
+        return self._process is not None and self._process.is_alive()
+
+    def start(self):
+        '''Starts the worker process, if it is not running
+        '''
+        if self.running:
+            return
+        self._conn, child_conn = _context.Pipe()
+        self._process = _context.Process(
+            target=_worker_main, args=(child_conn, ),
+            name='KDIntrospection')
+        self._process.daemon = True
+        self._process.start()
+        child_conn.close()
+
+    def stop(self):
+        '''Stops the worker process, waiting for the current file
+        '''
+        if self._process is None:
+            return
+        if self._process.is_alive():
+            try:
+                self._conn.send(None)
+            except (IOError, OSError):
+                pass
+            self._process.join(self.timeout)
+        self._kill()
+
+    def _kill(self):
+        if self._process is None:
+            return
+        if self._process.is_alive():
+            self._process.terminate()
+            self._process.join()
+        self._conn.close()
+        self._process = None
+        self._conn = None
+
+    def introspect(self, project_path, paths):
+        '''Loads the python files paths of project_path in the worker
+        process. Returns a list with the result of :func:`introspect_file`
+        for each file
+        '''
+        return [self._introspect(path, py_module_name(project_path, path))
+                for path in paths]
+
+    def _introspect(self, path, name):
+        error = None
+        try:
+            self.start()
+            self._conn.send((path, name))
+            if self._conn.poll(self.timeout):
+                return self._conn.recv()
+            error = '%s took more than %s seconds to load' % (
+                os.path.basename(path), self.timeout)
+        except (EOFError, IOError, OSError):
+            error = 'The designer worker process stopped while loading ' \
+                    '%s' % os.path.basename(path)
+        Logger.warning('Introspection: %s, restarting the worker' % error)
+        self._kill()
+        return {'path': path, 'module_name': name, 'widgets': [],
+                'error': error, 'time': None}
@@ -0,0 +1,88 @@
+'''Read-only access to the lines of a large file mapped in memory, so the
+file is never loaded as a whole.
+'''
+import mmap
+import os
+import re
+import threading
+from itertools import islice
+
+
+#: Maximum number of bytes of a line returned by :meth:`MappedFile.line`
+MAX_LINE_BYTES = 4096
+
+#: Number of lines indexed between two checks of :data:`MappedFile.closed`
+INDEX_CHUNK = 65536
+
+_NEWLINE_RE = re.compile(b'\n')
+
+
+class MappedFile(object):
+    '''A file mapped in memory with the offset of each line.
+    :meth:`build_index` must be called before reading lines.
+    :data:`closed` is True once :meth:`close` was called
+    '''
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        self.size = os.fstat(self._file.fileno()).st_size
+        if self.size:
+            self._map = mmap.mmap(self._file.fileno(), 0,
+                                  access=mmap.ACCESS_READ)
+        else:
+            # empty files can not be mapped
+            self._map = b''
+        self._offsets = [0]
+        self.closed = False
+        # held while the map is read by build_index
+        self._lock = threading.Lock()
+
+    def build_index(self):
+        '''Find the offset of each line. Can be called from a worker thread,
+        it stops if the file is closed meanwhile.
+        Returns the number of lines
+        '''
+        offsets = [0]
+        with self._lock:
+            if self.closed:
+                return 0
+            matches = _NEWLINE_RE.finditer(self._map)
+            while not self.closed:
+                chunk = [m.end() for m in islice(matches, INDEX_CHUNK)]
+                offsets.extend(chunk)
+                if len(chunk) < INDEX_CHUNK:
+                    break
+            # the iterator keeps the map buffer exported
+            del matches
+            if self.closed:
+                return 0
+        if offsets[-1] == self.size and len(offsets) > 1:
+            # no line after the last line break
+            offsets.pop()
+        self._offsets = offsets
+        return len(offsets)
+
+    @property
+    def line_count(self):
+        return len(self._offsets)
+
+    def line(self, index, max_bytes=MAX_LINE_BYTES):
+        '''Returns the text of the line index without the line break. Lines
+        longer than max_bytes are truncated
+        '''
+        offsets = self._offsets
+        start = offsets[index]
+        end = offsets[index + 1] if index + 1 < len(offsets) else self.size
+        data = self._map[start:min(end, start + max_bytes)]
+        return data.decode('utf-8', 'replace').rstrip(u'\r\n')
+
+    def close(self):
+        '''Unmap and close the file. Waits for a running :meth:`build_index`
+        to stop
+        '''
+        self.closed = True
+        with self._lock:
+            if isinstance(self._map, mmap.mmap):
+                self._map.close()
+            self._file.close()
@@ -17,6 +17,29 @@ from kivy.uix.settings import (
 )
 
 
+def load_profile_configs():
+    '''Returns a dict with the ConfigParser of each build profile, by
+    "<profile name>_<file path>". The default profiles are copied to the
+    config directory the first time
+    '''
+    profiles_path = os.path.join(get_config_dir(), constants.DIR_PROFILES)
+    if not os.path.exists(profiles_path):
+        shutil.copytree(os.path.join(get_kd_data_dir(),
+                                     constants.DIR_PROFILES),
+                        profiles_path)
+
+    config_parsers = {}
+    for _file in os.listdir(profiles_path):
+        _file_path = os.path.join(profiles_path, _file)
+        config_parser = ConfigParser()
+        config_parser.read(_file_path)
+        prof_name = config_parser.getdefault('profile', 'name', 'PROFILE')
+        if not prof_name.strip():
+            prof_name = 'PROFILE'
+        config_parsers[str(prof_name) + '_' + _file_path] = config_parser
+    return config_parsers
+
+
 class ProfileContentPanel(ContentPanel):
     ''' ContentPanel with a custom design and custom events
     '''
@@ -136,25 +159,13 @@ class ProfileSettings(Settings):
         self.DEFAULT_PROFILES = os.path.join(get_kd_data_dir(),
                                              constants.DIR_PROFILES)
 
-        if not os.path.exists(self.PROFILES_PATH):
-            shutil.copytree(self.DEFAULT_PROFILES, self.PROFILES_PATH)
-
         self.update_panel()
 
     def update_panel(self):
         '''Update the MenuSidebar
         '''
-        self.config_parsers = {}
+        self.config_parsers = load_profile_configs()
         self.interface.menu.buttons_layout.clear_widgets()
-        for _file in os.listdir(self.PROFILES_PATH):
-            _file_path = os.path.join(self.PROFILES_PATH, _file)
-            config_parser = ConfigParser()
-            config_parser.read(_file_path)
-            prof_name = config_parser.getdefault('profile', 'name', 'PROFILE')
-            if not prof_name.strip():
-                prof_name = 'PROFILE'
-            self.config_parsers[
-                str(prof_name) + '_' + _file_path] = config_parser
 
         for _file in sorted(self.config_parsers):
             prof_name = self.config_parsers[_file].getdefault('profile',
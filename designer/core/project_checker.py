@@ -0,0 +1,179 @@
+'''Checks that the kv and python files of projects load, without creating
+a window. Python files are loaded as
+:meth:`~designer.core.project_manager.Project.parse_py` does, and kv files
+are parsed by the kv lang parser, without the event handlers, as
+:meth:`~designer.core.project_manager.Project.parse` does. The files are
+checked in parallel by a pool of processes:
+
+    python -m designer check [--format json|text] [--jobs N] project...
+
+The results are printed as JSON, with the time and errors of each file, and
+the exit status is 1 if a file has errors.
+'''
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+from io import open
+from timeit import default_timer
+
+from designer.core.project_manager import (
+    Project,
+    load_py,
+    module_classes,
+    py_module_name,
+    strip_kv_events,
+)
+from kivy.lang.parser import Parser, ParserException
+from kivy.uix.widget import Widget
+
+
+KV_EXTS = ('.kv', )
+PY_EXTS = ('.py', '.py2', '.py3')
+
+
+def project_files(project_path):
+    '''Returns the kv and python files of a project
+    '''
+    project = Project(path=project_path)
+    return [f for f in project.get_files()
+            if os.path.splitext(f)[1] in KV_EXTS + PY_EXTS]
+
+
+def format_error(error):
+    '''Returns a dict describing the exception error
+    '''
+    line = None
+    message = str(error)
+    if isinstance(error, ParserException):
+        line = error.line + 1
+        message = message.splitlines()[-1]
+    elif isinstance(error, SyntaxError):
+        line = error.lineno
+    return {'type': type(error).__name__, 'message': message, 'line': line}
+
+
+def check_kv(path):
+    '''Parses the kv file path. Returns the names of its root widget and
+    rules
+    '''
+    with open(path, 'r', encoding='utf-8') as f:
+        src = f.read()
+    parser = Parser(content=strip_kv_events(src),
+                    filename=os.path.basename(path))
+    widgets = [parser.root.name] if parser.root else []
+    widgets.extend(rule.name[1:-1] for selector, rule in parser.rules)
+    return widgets
+
+
+def check_py(project_path, path):
+    '''Loads the python file path. Returns the names of its widget classes
+    '''
+    module = load_py(path, py_module_name(project_path, path))
+    return [name for name, klass in module_classes(module)
+            if issubclass(klass, Widget)]
+
+
+def check_file(task):
+    '''Checks a file. task is (project path, file path). Runs in the
+    processes of the pool
+    '''
+    project_path, path = task
+    is_kv = os.path.splitext(path)[1] in KV_EXTS
+    result = {'path': os.path.relpath(path, project_path),
+              'type': 'kv' if is_kv else 'py',
+              'widgets': [], 'errors': []}
+    # anything printed by the project must not mix with the results
+    stdout = sys.stdout
+    sys.stdout = sys.stderr
+    start = default_timer()
+    try:
+        if is_kv:
+            result['widgets'] = check_kv(path)
+        else:
+            result['widgets'] = check_py(project_path, path)
+    except Exception as e:
+        result['errors'].append(format_error(e))
+    finally:
+        result['time'] = default_timer() - start
+        sys.stdout = stdout
+    result['ok'] = not result['errors']
+    return project_path, result
+
+
+def check_projects(project_paths, jobs=None):
+    '''Checks the files of the projects with a pool of jobs processes,
+    one per CPU by default. Returns the report of the check
+    '''
+    start = default_timer()
+    tasks = [(project_path, path) for project_path in project_paths
+             for path in project_files(project_path)]
+    if jobs == 1 or len(tasks) < 2:
+        results = [check_file(task) for task in tasks]
+    else:
+        pool = multiprocessing.Pool(jobs)
+        try:
+            results = list(pool.imap_unordered(check_file, tasks))
+        finally:
+            pool.close()
+            pool.join()
+
+    files = dict((project_path, []) for project_path in project_paths)
+    for project_path, result in results:
+        files[project_path].append(result)
+    projects = []
+    for project_path in project_paths:
+        project_files_results = sorted(files[project_path],
+                                       key=lambda r: r['path'])
+        projects.append({
+            'path': project_path,
+            'ok': all(r['ok'] for r in project_files_results),
+            'files': project_files_results})
+    return {'ok': all(p['ok'] for p in projects),
+            'time': default_timer() - start,
+            'projects': projects}
+
+
+def format_text(report):
+    '''Returns the report as readable text
+    '''
+    lines = []
+    for project in report['projects']:
+        lines.append(project['path'])
+        for result in project['files']:
+            lines.append('  %-4s %8.1f ms  %s' % (
+                'ok' if result['ok'] else 'FAIL', result['time'] * 1000,
+                result['path']))
+            for error in result['errors']:
+                lines.append('        line %s: %s: %s' % (
+                    error['line'], error['type'], error['message']))
+    lines.append('%s in %.1f ms' % ('ok' if report['ok'] else 'FAILED',
+                                    report['time'] * 1000))
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m designer check',
+        description='Checks that the kv and python files of Kivy projects '
+                    'load')
+    parser.add_argument('projects', nargs='+', metavar='project',
+                        help='project directory')
+    parser.add_argument('--jobs', '-j', type=int, default=None,
+                        help='number of processes, one per CPU by default')
+    parser.add_argument('--format', choices=('json', 'text'), default='json')
+    args = parser.parse_args(argv)
+
+    project_paths = []
+    for path in args.projects:
+        if not os.path.isdir(path):
+            parser.error('%s is not a directory' % path)
+        project_paths.append(os.path.abspath(path))
+
+    report = check_projects(project_paths, args.jobs)
+    if args.format == 'json':
+        print(json.dumps(report, indent=2, sort_keys=True))
+    else:
+        print(format_text(report))
+    return 0 if report['ok'] else 1
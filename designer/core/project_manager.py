@@ -3,8 +3,18 @@ import imp
 import inspect
 import os
 import re
-import sys
-
+import threading
+from functools import partial
+
+from designer.core.app_widget_registry import AppWidgetRegistry
+from designer.core.file_writer import (
+    TEMP_EXT,
+    content_hash,
+    file_hash,
+    write_files,
+)
+from designer.core.project_modules import project_modules
+from designer.utils import trace
 from designer.utils.utils import (
     get_app_widget,
     get_designer,
@@ -14,34 +24,41 @@ from designer.utils.utils import (
 from kivy.event import EventDispatcher
 from kivy.factory import Factory
 from kivy.lang import Builder
+from kivy.logger import Logger
 from kivy.properties import (
+    AliasProperty,
     BooleanProperty,
     Clock,
     DictProperty,
     ListProperty,
+    NumericProperty,
     ObjectProperty,
     StringProperty,
 )
 from kivy.uix.widget import Widget
 from six import exec_
-from watchdog.events import RegexMatchingEventHandler
-from watchdog.observers import Observer
 from io import open
 
 
 IGNORED_PATHS = ('/.designer', '/.buildozer', '/.git', '/bin',)
-IGNORED_EXTS = ('.pyc',)
+IGNORED_EXTS = ('.pyc', TEMP_EXT,)
+PARSED_EXTS = ('.kv', '.py', '.py2', '.py3')
 KV_EVENT_RE = r'(\s+on_\w+\s*:.+)|(^[\s\w\d]+:[\.]+[\s\w]+\(.*)'
 KV_ROOT_WIDGET = r'^([\w\d_]+)\:'
 KV_APP_WIDGET = r'^<([\w\d_@]+)>\:'
 
 
-class ProjectEventHandler(RegexMatchingEventHandler):
+class ProjectEventHandler(object):
+    '''Watchdog event handler forwarding all events to the ProjectWatcher.
+    Watchdog only requires the dispatch method, so it doesn't need to be
+    imported before watching a project
+    '''
+
     def __init__(self, project_watcher):
         super(ProjectEventHandler, self).__init__()
         self.project_watcher = project_watcher
 
-    def on_any_event(self, event):
+    def dispatch(self, event):
         if self.project_watcher:
             self.project_watcher.on_any_event(event)
 
@@ -63,7 +80,7 @@ class ProjectWatcher(EventDispatcher):
        :data:`path` is a :class:`~kivy.properties.StringProperty`
     '''
 
-    __events__ = ('on_project_modified',)
+    __events__ = ('on_project_modified', 'on_files_changed',)
 
     def __init__(self, **kw):
         super(ProjectWatcher, self).__init__(**kw)
@@ -71,10 +88,17 @@ class ProjectWatcher(EventDispatcher):
         self._observer = None
         self._handler = None
         self._watcher = None
+        self._changed = set()
+        self._changed_lock = threading.Lock()
+        # path: hash of the content written by Kivy Designer
+        self._written = {}
+        self._trigger_files_changed = Clock.create_trigger(
+            self._dispatch_files_changed, 0.3)
 
     def start_watching(self, path):
         '''To start watching project_dir.
         '''
+        from watchdog.observers import Observer
         self._path = path
         self._observer = Observer()
         self._handler = ProjectEventHandler(project_watcher=self)
@@ -86,6 +110,19 @@ class ProjectWatcher(EventDispatcher):
     def on_project_modified(self, *args):
         pass
 
+    def on_files_changed(self, paths):
+        '''Dispatched in the main thread with the set of paths modified since
+        the last dispatch
+        '''
+        pass
+
+    def _dispatch_files_changed(self, *args):
+        with self._changed_lock:
+            paths = self._changed
+            self._changed = set()
+        if paths:
+            self.dispatch('on_files_changed', paths)
+
     def stop_watching(self):
         '''To stop watching currently watched directory. This will also call
            join() on the thread created by Observer.
@@ -114,22 +151,62 @@ class ProjectWatcher(EventDispatcher):
             self._observer.event_queue.queue.clear()
         self._active = True
 
-    def on_any_event(self, event):
-        if self._active:
-            # filter events
-            path = event.src_path.replace(self._path, '')
-            if not path:
-                return
-            if '__pycache__' in path:
-                return
-            for ign in IGNORED_PATHS:
-                if path.startswith(ign):
-                    return
-            for ext in IGNORED_EXTS:
-                if event.src_path.endswith(ext):
-                    return
+    def expect_write(self, path, digest):
+        '''Called before Kivy Designer writes a file. The events of path are
+        not reported as external modifications while its content hash is
+        digest. Thread safe
+        '''
+        with self._changed_lock:
+            self._written[path] = digest
 
-            self.dispatch('on_project_modified', event)
+    def _is_own_write(self, path):
+        with self._changed_lock:
+            digest = self._written.get(path)
+        if digest is None:
+            return False
+        if file_hash(path) == digest:
+            return True
+        # modified by someone else since written
+        with self._changed_lock:
+            if self._written.get(path) == digest:
+                del self._written[path]
+        return False
+
+    def _is_ignored(self, path):
+        rel_path = path.replace(self._path, '')
+        if not rel_path:
+            return True
+        if '__pycache__' in rel_path:
+            return True
+        for ign in IGNORED_PATHS:
+            if rel_path.startswith(ign):
+                return True
+        for ext in IGNORED_EXTS:
+            if path.endswith(ext):
+                return True
+        return False
+
+    def on_any_event(self, event):
+        # filter events
+        paths = [p for p in (event.src_path, getattr(event, 'dest_path', None))
+                 if p and not self._is_ignored(p)]
+        if not paths:
+            return
+
+        # the change set includes the files modified by Kivy Designer, so
+        # caches are updated even while the watcher is paused
+        with self._changed_lock:
+            self._changed.update(paths)
+        self._trigger_files_changed()
+
+        if not self._active:
+            return
+        if event.is_directory and event.event_type == 'modified':
+            # the files modified in the directory have their own events
+            return
+        if all(self._is_own_write(p) for p in paths):
+            return
+        self.dispatch('on_project_modified', event)
 
 
 class CallWrapper(ast.NodeTransformer):
@@ -139,49 +216,55 @@ class CallWrapper(ast.NodeTransformer):
         return node
 
 
-class AppWidget(EventDispatcher):
-    name = StringProperty('')
-    '''Root Widget name.
-       :data:`name` is a :class:`~kivy.properties.StringProperty` and
-       defaults to ''
+def strip_kv_events(src):
+    '''Removes the event handlers of a kv source, they may call code of the
+    project that is not loaded
     '''
+    return re.sub(KV_EVENT_RE, '', src, flags=re.MULTILINE)
 
-    kv_path = StringProperty('')
-    '''RootWidget associated kv file path.
-       :data:`kv_path` is a :class:`~kivy.properties.StringProperty` and
-       default to ''
-    '''
 
-    py_path = StringProperty('')
-    '''RootWidget associated py file path.
-       :data:`py_path` is a :class:`~kivy.properties.StringProperty` and
-       default to ''
+def py_module_name(project_path, path):
+    '''Returns the name of the module created to load the python file path.
+    The name starts with a hash of the project path, so the files with the
+    same relative path in two projects, as main.py, are different modules
     '''
+    rel_path = path.replace(project_path, '')
+    project_hash = content_hash(
+        os.path.abspath(project_path).encode('utf-8'))[:8]
+    return 'KDImport' + project_hash + ''.join(
+        [x.replace('.py', '').capitalize() for x in rel_path.split('/')])
 
-    is_root = BooleanProperty(False)
-    '''Indicates if this widget is a root/default kivy widget or not
-        :data:`is_root` is a :class:`~kivy.properties.BooleanProperty` and
-        defaults to False
-    '''
 
-    instance = ObjectProperty(None)
-    '''If the widget is root, it has a instance returned by Builder.load_string
-    If not is root, instance is None
-    data:`instance` is a :class:`~kivy.properties.ObjectProperty` and
-        defaults to None
+def kv_filename(path):
+    '''Returns the filename used by the Builder to load the kv file path:
+    its absolute path, as two projects can have kv files with the same name
     '''
+    return os.path.abspath(path) if path else ''
 
-    is_dynamic = BooleanProperty(False)
-    '''Indicates if this widget is a dynamic widget or not
-        :data:`is_dynamic` is a :class:`~kivy.properties.BooleanProperty` and
-        defaults to False
+
+def load_py(path, module_name):
+    '''Executes the python file path, without the calls at the module level,
+    in a new module called module_name. Returns the module, or raises the
+    exception raised by the file
     '''
+    src = open(path, 'r', encoding='utf-8').read()
+    p = ast.parse(src, os.path.basename(path))
+    p = CallWrapper().visit(p)
+    p = ast.fix_missing_locations(p)
+
+    module = imp.new_module(module_name)
+    exec_(compile(p, os.path.basename(path), 'exec'), module.__dict__)
+    return module
+
 
-    module_name = StringProperty('')
-    '''ModuleName used in the class import
-       :data:`module_name` is a :class:`~kivy.properties.StringProperty` and
-       default to ''
+def module_classes(module):
+    '''Returns the (name, class) of the classes declared in module
     '''
+    return inspect.getmembers(
+        module,
+        lambda member:
+        inspect.isclass(member) and member.__module__ == module.__name__
+    )
 
 
 class Project(EventDispatcher):
@@ -216,21 +299,93 @@ class Project(EventDispatcher):
         :data:`kv_list` is a :class:`~kivy.properties.ListProperty`
     '''
 
-    app_widgets = DictProperty({})
-    '''List of :class:`~designer.core.project_manager.AppWidget`.
-    :data:`app_widgets` is a :class:`~kivy.properties.DictProperty`
+    widgets_revision = NumericProperty(0)
+    '''Incremented once for each change of the project widgets, a whole
+    :meth:`parse` is a single change.
+    :data:`widgets_revision` is a :class:`~kivy.properties.NumericProperty`
     '''
 
     def __init__(self, **kw):
+        self.widget_registry = AppWidgetRegistry(
+            on_change=self._on_widgets_changed)
+        # IntrospectionWorker loading the python files out of the designer
+        # process. If None, they are loaded by parse_py
+        self.introspection = None
+        # job of the io worker running the introspection of the last parse
+        self._introspection_job = None
+        # (path, mtime, size) of the files loaded by the last parse, None if
+        # a file was loaded after it
+        self._parse_snapshot = None
+        # bytes used by the files loaded by the last parse, estimated from
+        # the sources and module namespaces
+        self.estimated_size = 0
+        # incremented when the widget classes or kv rules change, the
+        # widgets created before are outdated
+        self.rules_revision = 0
+        self._kv_hashes = {}  # path: hash of the kv source last parsed
         super(Project, self).__init__(**kw)
         self._errors = []  # exception messages
 
-    def open(self):
-        '''Opens then project
+    def _on_widgets_changed(self, registry):
+        self.widgets_revision = registry.revision
+
+    def _get_app_widgets(self):
+        return self.widget_registry
+
+    app_widgets = AliasProperty(_get_app_widgets, None,
+                                bind=('widgets_revision', ))
+    '''Read only mapping of widget name:
+    :class:`~designer.core.app_widget_registry.AppWidget`, dispatched once
+    for each change of :data:`widgets_revision`. The widgets are changed with
+    :data:`widget_registry`.
+    :data:`app_widgets` is a :class:`~kivy.properties.AliasProperty`
+    '''
+
+    def open(self, on_parsed=None):
+        '''Opens then project. The last parse is kept if the files were not
+        modified and the project was not unloaded
+        :param on_parsed called with the project when it is parsed
         '''
         self.saved = True
         self.get_files()
-        self.parse()
+        if not self.is_parsed():
+            self.parse(on_parsed=on_parsed)
+        elif on_parsed is not None:
+            on_parsed(self)
+
+    def _files_snapshot(self):
+        snapshot = []
+        for path in self.file_list:
+            if path[path.rfind('.'):] not in PARSED_EXTS:
+                continue
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            snapshot.append((path, stat.st_mtime, stat.st_size))
+        return snapshot
+
+    def is_parsed(self):
+        '''Returns True if what the last parse loaded is still loaded and
+        the project files were not modified since it
+        '''
+        return self._parse_snapshot is not None and \
+            project_modules.is_loaded(self.path) and \
+            self._parse_snapshot == self._files_snapshot()
+
+    def unload(self):
+        '''Unloads the modules, Factory classes and kv rules of the project
+        and drops the results of the last parse
+        '''
+        self._cancel_introspection()
+        project_modules.unload(self.path)
+        self.kv_list = []
+        self.py_list = []
+        self.widget_registry.clear()
+        self._parse_snapshot = None
+        self.estimated_size = 0
+        self._kv_hashes = {}
+        self.rules_revision += 1
 
     def get_files(self, path=None, force_reload=True):
         '''Gets a list of files in the project folder. If force_reload is True,
@@ -262,18 +417,71 @@ class Project(EventDispatcher):
         self.file_list = file_list
         return file_list
 
-    def parse(self, reload_files=False):
-        '''Parse project files to analyse python and kv files
+    def is_project_file(self, path):
+        '''Returns True if path is a file that should be in file_list, using
+        the same rules of :meth:`get_files`
         '''
+        if not path.startswith(self.path) or not os.path.isfile(path):
+            return False
+        for ignored in IGNORED_PATHS:
+            if ignored in path:
+                return False
+        return path[path.rfind('.'):] not in IGNORED_EXTS
 
+    def update_files(self, paths):
+        '''Update file_list with the paths of a project watcher change set,
+        without listing the project directory again.
+        Returns the lists of files added and removed
+        '''
+        known = set(self.file_list)
+        added = []
+        removed = []
+        for path in paths:
+            if self.is_project_file(path):
+                if path not in known:
+                    added.append(path)
+                    known.add(path)
+            elif not os.path.exists(path):
+                # removed file, or directory with all its files
+                prefix = path + os.sep
+                for f in list(known):
+                    if f == path or f.startswith(prefix):
+                        removed.append(f)
+                        known.discard(f)
+        if added or removed:
+            removed_set = set(removed)
+            self.file_list = [f for f in self.file_list
+                              if f not in removed_set] + sorted(added)
+        return added, removed
+
+    def parse(self, reload_files=False, on_parsed=None):
+        '''Parse project files to analyse python and kv files. With an
+        introspection worker, the python files are loaded by it from the io
+        worker, and the parse ends in the next frames.
+        :param on_parsed called with the project when the parse is done
+        '''
+        parse_span = trace.begin('Project.parse')
+        self._cancel_introspection()
+        self._find_files(reload_files)
+        if self.introspection is None:
+            self._load_files(self.py_list, parse_span, on_parsed)
+            return
+        # the widgets of the previous parse are kept until the python files
+        # are introspected
+        self._introspection_job = get_designer().io_worker.submit(
+            self.introspection.introspect, self.path, list(self.py_list),
+            on_result=partial(self._on_introspected, parse_span, on_parsed),
+            on_error=partial(self._on_introspection_error, parse_span,
+                             on_parsed))
+
+    def _find_files(self, reload_files):
         if reload_files:
             self.get_files()
 
-        # reset caches
+        self._parse_snapshot = None
+        self._errors = []
         self.kv_list = []
         self.py_list = []
-        self.app_widgets = {}
-        self._errors = []
 
         # find kv and python files
         for _file in self.file_list:
@@ -283,18 +491,63 @@ class Project(EventDispatcher):
                 self.kv_list.append(_file)
             elif ext == '.py' or ext == '.py2' or ext == '.py3':
                 self.py_list.append(_file)
-
-        # find and load classes
-        for py in self.py_list:
-            self.parse_py(py)
-        # find and load root widgets
-        for kv in self.kv_list:
-            src = open(kv, 'r', encoding='utf-8').read()
-            # removes events
-            src = re.sub(KV_EVENT_RE, '', src, flags=re.MULTILINE)
-            self.parse_kv(src, kv)
-
+        trace.counter('Project files', kv=len(self.kv_list),
+                      py=len(self.py_list))
+
+    def _cancel_introspection(self):
+        if self._introspection_job is not None:
+            self._introspection_job.cancel()
+            self._introspection_job = None
+
+    def _on_introspected(self, parse_span, on_parsed, job, results):
+        '''The introspection worker loaded the python files. The files with
+        widget classes are loaded again in the designer process, as the
+        widgets are created by the playground
+        '''
+        self._introspection_job = None
+        py_files = []
+        for result in results:
+            if result['error']:
+                self._errors.append(result['error'])
+            elif result['widgets']:
+                py_files.append(result['path'])
+        self._load_files(py_files, parse_span, on_parsed)
+
+    def _on_introspection_error(self, parse_span, on_parsed, job, error):
+        self._introspection_job = None
+        self._errors.append(str(error))
+        self._load_files([], parse_span, on_parsed)
+
+    def _load_files(self, py_files, parse_span, on_parsed):
+        '''Loads py_files and the kv files in the designer process, ending
+        the parse
+        '''
+        with self.widget_registry.batch():
+            # reset caches
+            project_modules.unload(self.path)
+            self._kv_hashes = {}
+            self.rules_revision += 1
+            self.widget_registry.clear()
+            project_modules.unload_conflicts(
+                self.path,
+                [py_module_name(self.path, py) for py in self.py_list],
+                [kv_filename(kv) for kv in self.kv_list])
+
+            # find and load classes
+            for py in py_files:
+                self.parse_py(py)
+            # find and load root widgets
+            for kv in self.kv_list:
+                src = open(kv, 'r', encoding='utf-8').read()
+                self.parse_kv(strip_kv_events(src), kv)
+
+        self._parse_snapshot = self._files_snapshot()
+        self.estimated_size = project_modules.size(self.path) + \
+            sum(size for path, mtime, size in self._parse_snapshot)
+        parse_span.end()
         self.show_errors()
+        if on_parsed is not None:
+            on_parsed(self)
 
     def show_errors(self, *args):
         '''Pop errors got in the last operations and display it on
@@ -317,8 +570,8 @@ class Project(EventDispatcher):
         Removes widgets and rules already processed to this file
         :param path: file path - the same that in app_widgets
         '''
-        for key in dict(self.app_widgets):
-            wd = self.app_widgets[key]
+        registry = self.widget_registry
+        for wd in registry.by_file(path):
             if path != wd.kv_path:
                 continue
             wdg = get_app_widget(wd)
@@ -329,7 +582,7 @@ class Project(EventDispatcher):
                 if not wdg:
                     continue
             if wd.is_dynamic:
-                del self.app_widgets[key]
+                del registry[wd.name]
 
             rules = Builder.match(wdg)
 
@@ -355,10 +608,25 @@ class Project(EventDispatcher):
         :param src: kv string
         :return boolean indicating if succeed in parsing the file
         '''
+        self._parse_snapshot = None
+        with self.widget_registry.batch():
+            return self._parse_kv(src, path)
+
+    def _parse_kv(self, src, path):
+        # the kv lang area reloads the source with the event handlers
+        src_hash = content_hash(strip_kv_events(src).encode('utf-8'))
+        if self._kv_hashes.get(path) != src_hash:
+            self._kv_hashes[path] = src_hash
+            self.rules_revision += 1
+        registry = self.widget_registry
         self._clean_old_kv(path)
+        filename = kv_filename(path)
+        if filename:
+            project_modules.unload_kv_file(self.path, filename)
+            project_modules.add_kv_file(self.path, filename)
         root = None
         try:
-            root = Builder.load_string(src, filename=os.path.basename(path))
+            root = Builder.load_string(src, filename=filename)
         except Exception as e:
             self._errors.append(str(e))
             d = get_designer()
@@ -371,29 +639,15 @@ class Project(EventDispatcher):
             for r in root_widgets:
                 if r != root_name:
                     continue
-                if r in self.app_widgets:
-                    wdg = self.app_widgets[r]
-                else:
-                    wdg = AppWidget()
-                wdg.name = r
-                if path:
-                    wdg.kv_path = path
-                wdg.is_root = True
-                wdg.instance = root
-                if wdg not in self.app_widgets:
-                    self.app_widgets[r] = wdg
+                fields = {'kv_path': path} if path else {}
+                registry.update(r, is_root=True, instance=root, **fields)
 
         # now, get all custom widgets
         app_widgets = re.findall(KV_APP_WIDGET, src, re.MULTILINE)
         for a in app_widgets:
-            wdg = self.app_widgets[a] if a in self.app_widgets else AppWidget()
-            wdg.name = a
-            if path:
-                wdg.kv_path = path
-            wdg.is_dynamic = '@' in a
+            fields = {'kv_path': path} if path else {}
             # dynamic widgets are not preloaded by py files
-            if wdg not in self.app_widgets:
-                self.app_widgets[a] = wdg
+            registry.update(a, is_dynamic='@' in a, **fields)
 
         return True
 
@@ -401,42 +655,25 @@ class Project(EventDispatcher):
         '''Parses a Python file and load it.
         '''
 
-        rel_path = path.replace(self.path, '')
-
+        self._parse_snapshot = None
+        self.rules_revision += 1
         # creates a name to the import based in the file name and its path
-        module_name = 'KDImport' + ''.join([x.replace('.py', '').capitalize()
-                                            for x in rel_path.split('/')])
-
-        # remove method calls to do a safe import
-        src = open(path, 'r', encoding='utf-8').read()
-        try:
-            p = ast.parse(src, os.path.basename(path))
-        except SyntaxError as e:
-            self._errors.append(str(e))
-            return False
-        p = CallWrapper().visit(p)
-        p = ast.fix_missing_locations(p)
+        module_name = py_module_name(self.path, path)
 
-        # if module is already loaded, removes it
-        if module_name in sys.modules:
-            del sys.modules[module_name]
-
-        # imports the new python
-        module = imp.new_module(module_name)
+        # if module is already loaded, removes it and its classes, so the
+        # new classes are registered in the Factory
+        project_modules.unload_module(self.path, module_name)
 
+        # imports the new python, without the method calls
         try:
-            exec_(compile(p, os.path.basename(path), 'exec'), module.__dict__)
+            module = load_py(path, module_name)
         except Exception as e:
             self._errors.append(str(e))
             return False
-        sys.modules[module_name] = module
+        project_modules.add_module(self.path, module_name, module)
 
         # find classes and possible widgets
-        classes = inspect.getmembers(
-            sys.modules[module_name],
-            lambda member:
-            inspect.isclass(member) and member.__module__ == module_name
-        )
+        classes = module_classes(module)
 
         if classes:
             self.load_widgets(path, classes, module_name)
@@ -447,46 +684,72 @@ class Project(EventDispatcher):
         '''
         Analyze classes and loads Widgets from an array
         :param classes: array with classes to be analyzed
-        :return: self.root_widgets
+        :return: self.app_widgets
         '''
-        for klass_name, klass in classes:
-            if issubclass(klass, Widget):
-                # updates root_widget dict
-                if klass_name in self.app_widgets:
+        registry = self.widget_registry
+        with registry.batch():
+            for klass_name, klass in classes:
+                if not issubclass(klass, Widget):
+                    continue
+                if klass_name in registry:
                     # if already exists, update only the path
-                    self.app_widgets[klass_name].py_path = path
+                    registry.update(klass_name, py_path=path)
                 else:
-                    # otherwise create a new widget representation
-                    r = AppWidget()
-                    r.py_path = path
-                    r.name = klass_name
-                    r.module_name = module_name
-                    self.app_widgets[klass_name] = r
+                    registry.update(klass_name, py_path=path,
+                                    module_name=module_name)
 
-        return self.app_widgets
+        return registry
 
-    def save(self, code_inputs=None, *args):
-        '''Get all KD Code input and save the content
+    def save(self, code_inputs=None, on_saved=None):
+        '''Get all KD Code input and save the content modified since the last
+        save. Files are written atomically in background
         :param code_inputs list of files to save. If None, get all open files
+        :param on_saved called with (saved, modified): saved is True when
+            the files are written, or False if the save failed. modified is
+            the list of paths edited while they were written, which are
+            still not saved
         '''
+        d = get_designer()
         if not code_inputs:
-            d = get_designer()
             code_inputs = d.code_inputs
 
-        try:
-            for code in code_inputs:
-                fname = code.path
-                if not fname:
-                    continue
-                content = code.text
-                open(fname, 'w', encoding='utf-8').write(content)
+        buffers = [(code, code.path, code.text) for code in code_inputs
+                   if code.path]
+        files = [(path, text) for code, path, text in buffers]
+        # from the submission to the callback, with the time in the queue
+        save_span = trace.begin('Project.save', files=len(files))
+        d.io_worker.submit(write_files, files,
+                           on_write=d.project_watcher.expect_write,
+                           on_result=partial(self._on_saved, buffers,
+                                             on_saved, save_span),
+                           on_error=partial(self._on_save_error, on_saved,
+                                            save_span))
+
+    def _on_saved(self, buffers, on_saved, save_span, job, result):
+        hashes, written = result
+        save_span.end()
+        trace.counter('Project.save', written=len(written))
+        d = get_designer()
+        symbol_index = d.symbol_index
+        modified = []
+        for code, path, text in buffers:
+            d.edit_journal.checkpoint(code, path, text, hashes[path])
+            if code.text == text:
                 code.saved = True
-        except IOError as e:
-            return False
+            else:
+                modified.append(path)
+            if path in written:
+                symbol_index.update_text(path, text)
 
-        self.saved = True
+        self.saved = not modified
         self.new_project = False
-        return True
+        if on_saved is not None:
+            on_saved(True, modified)
+
+    def _on_save_error(self, on_saved, save_span, job, error):
+        save_span.end()
+        if on_saved is not None:
+            on_saved(False, [])
 
 
 class ProjectManager(EventDispatcher):
@@ -495,11 +758,28 @@ class ProjectManager(EventDispatcher):
        :data:`current_project` is a :class:`~kivy.properties.ObjectProperty`
     '''
 
-    projects = DictProperty(None)
-    '''A map of opened projects
+    projects = DictProperty({})
+    '''A map of opened projects, kept loaded to be opened again without
+    parsing them. The least recently used are unloaded and removed when there
+    are more than :data:`max_projects`, or when they use more than
+    :data:`max_projects_size`
        :data:`projects` is a :class:`~kivy.properties.DictProperty`
     '''
 
+    max_projects = NumericProperty(5)
+    '''Maximum number of projects kept in :data:`projects`, with the current
+    project
+       :data:`max_projects` is a :class:`~kivy.properties.NumericProperty`
+       and defaults to 5
+    '''
+
+    max_projects_size = NumericProperty(200 * 1024 * 1024)
+    '''Maximum estimated size, in bytes, of the projects kept in
+    :data:`projects`. The current project is kept even if it is larger
+       :data:`max_projects_size` is a
+       :class:`~kivy.properties.NumericProperty` and defaults to 200MB
+    '''
+
     project_manager = BooleanProperty(True)
     '''Auto save the project
         :data:`project_manager` is a :class:`~kivy.properties.BooleanProperty`
@@ -507,30 +787,72 @@ class ProjectManager(EventDispatcher):
 
     def __init__(self, **kwargs):
         super(ProjectManager, self).__init__(**kwargs)
+        # IntrospectionWorker given to the projects opened
+        self.introspection = None
+        # paths of projects, from the least recently used
+        self._recent = []
         self.current_project = Project()
 
-    def open_project(self, path):
+    def open_project(self, path, on_opened=None):
         '''Opens a Python project by path, and returns the Project instance
+        :param on_opened called with the project when it is parsed
         '''
         if os.path.isfile(path):
             path = os.path.dirname(path)
 
         if path in self.projects:
-            self.current_project = self.projects[path]
-            self.current_project.open()
-            return self.current_project
-
-        p = Project(path=path)
-        p.open()
-        self.projects[path] = p
+            p = self.projects[path]
+            self._recent.remove(path)
+        else:
+            p = Project(path=path)
+            self.projects[path] = p
+        self._recent.append(path)
+        p.introspection = self.introspection
         self.current_project = p
-        return self.projects[path]
+        p.open(on_parsed=partial(self._on_project_parsed, on_opened))
+        return p
+
+    def _on_project_parsed(self, on_opened, project):
+        self.evict_projects()
+        if on_opened is not None:
+            on_opened(project)
+
+    def evict_projects(self):
+        '''Unloads and removes the least recently used projects, until
+        :data:`projects` fits :data:`max_projects` and
+        :data:`max_projects_size`
+        '''
+        current = self.current_project.path
+        while True:
+            candidates = [p for p in self._recent if p != current]
+            size = sum(self.projects[p].estimated_size for p in self._recent)
+            if not candidates or (len(self._recent) <= self.max_projects and
+                                  size <= self.max_projects_size):
+                return
+            path = candidates[0]
+            self._recent.remove(path)
+            self._unload(self.projects.pop(path))
 
     def close_current_project(self):
         '''Closes a project, setting saved as True and new_project as False,
-        and removing it from current_project
+        and removing it from current_project. The project is kept loaded in
+        :data:`projects`
         :param project: instance of pro
         '''
         self.current_project.saved = True
         self.current_project.new_project = False
         self.current_project = Project()
+        self.evict_projects()
+
+    def _unload(self, project):
+        '''Unloads the modules, Factory classes and kv rules of project, and
+        logs the memory still retained by the unloaded modules
+        '''
+        if not project.path:
+            return
+        project.unload()
+        report = project_modules.report()
+        if report['retained']:
+            Logger.info(
+                'Project: %d unloaded modules still referenced, %d bytes' %
+                (len(report['retained']), report['retained_size']))
@@ -0,0 +1,204 @@
+'''Tracks what each project loads into the interpreter: the KDImport modules
+added to sys.modules, the widget classes registered in the Factory by these
+modules and the kv files loaded by the Builder.
+
+Everything is owned by a project path, and unloaded when the project is
+parsed again, closed or evicted from the projects kept in memory. Factory
+ignores a class declared again with the same name, so the classes of a module
+must be unregistered before it is loaded again. The module and kv file names
+include the project path, but projects with widget classes with the same
+names can't be loaded at the same time: loading one unloads the other.
+'''
+import inspect
+import gc
+import sys
+import weakref
+
+from kivy.factory import Factory
+from kivy.lang import Builder
+
+
+def unload_kv_rules(filename):
+    '''Removes the rules, templates and dynamic classes of the kv source
+    loaded with filename. Like Builder.unload_file, without resolving
+    filename as a resource: the sources of the projects are loaded with the
+    name of their file, that could match a file of the designer
+    '''
+    Builder.rules = [x for x in Builder.rules
+                     if x[1].ctx.filename != filename]
+    Builder._clear_matchcache()
+    Builder.templates = dict((k, v) for k, v in Builder.templates.items()
+                             if v[2] != filename)
+    if filename in Builder.files:
+        Builder.files.remove(filename)
+    Factory.unregister_from_filename(filename)
+
+
+class _Owned(object):
+
+    def __init__(self):
+        self.modules = {}  # module name: module
+        self.classes = {}  # module name: [(class name, class)]
+        self.kv_files = set()
+
+
+def module_size(module):
+    '''Returns an approximation, in bytes, of the memory used by the module
+    namespace, without following references
+    '''
+    namespace = vars(module)
+    return sys.getsizeof(namespace) + sum(
+        sys.getsizeof(value) for value in list(namespace.values()))
+
+
+class ProjectModules(object):
+    '''Registry of the modules, Factory classes and kv files loaded by each
+    project
+    '''
+
+    def __init__(self):
+        self._owners = {}  # owner: _Owned
+        # (owner, module name, weakref) of the unloaded modules
+        self._unloaded = []
+
+    def _owned(self, owner):
+        if owner not in self._owners:
+            self._owners[owner] = _Owned()
+        return self._owners[owner]
+
+    def add_module(self, owner, name, module):
+        '''Adds module to sys.modules as name, and tracks the classes it
+        registered in the Factory
+        '''
+        self.unload_module(owner, name)
+        owned = self._owned(owner)
+        sys.modules[name] = module
+        # classes ignored by the Factory, as another project has a class
+        # with the same name
+        for class_name, cls in inspect.getmembers(module, inspect.isclass):
+            info = Factory.classes.get(class_name)
+            if cls.__module__ != name or info is None or info['cls'] is cls:
+                continue
+            other = self._class_owner(class_name, info['cls'])
+            if other is not None and other != owner:
+                self.unload(other)
+                Factory.register(class_name, cls=cls)
+        owned.modules[name] = module
+        owned.classes[name] = [
+            (class_name, info['cls'])
+            for class_name, info in list(Factory.classes.items())
+            if getattr(info['cls'], '__module__', None) == name]
+
+    def unload_module(self, owner, name):
+        '''Removes the module name of owner from sys.modules and its classes
+        from the Factory
+        '''
+        owned = self._owners.get(owner)
+        if owned is None or name not in owned.modules:
+            return
+        module = owned.modules.pop(name)
+        for class_name, cls in owned.classes.pop(name):
+            info = Factory.classes.get(class_name)
+            if info is not None and info['cls'] is cls:
+                Factory.unregister(class_name)
+        if sys.modules.get(name) is module:
+            del sys.modules[name]
+        # the modules freed since the last unload are dropped, the list only
+        # grows with the modules still referenced
+        self._unloaded = [u for u in self._unloaded if u[2]() is not None]
+        self._unloaded.append((owner, name, weakref.ref(module)))
+
+    def _class_owner(self, class_name, cls):
+        for owner, owned in self._owners.items():
+            for classes in owned.classes.values():
+                if (class_name, cls) in classes:
+                    return owner
+        return None
+
+    def unload_conflicts(self, owner, module_names, kv_files):
+        '''Unloads the other owners with modules or kv files with the same
+        names, which would be replaced or mixed with the ones of owner.
+        Returns the owners unloaded
+        '''
+        module_names = set(module_names)
+        kv_files = set(kv_files)
+        others = [other for other, owned in self._owners.items()
+                  if other != owner and (module_names & set(owned.modules) or
+                                         kv_files & owned.kv_files)]
+        for other in others:
+            self.unload(other)
+        return others
+
+    def is_loaded(self, owner):
+        '''Returns True if owner loaded something that was not unloaded
+        '''
+        return owner in self._owners
+
+    def size(self, owner):
+        '''Returns the approximated size, in bytes, of the modules of owner
+        '''
+        owned = self._owners.get(owner)
+        if owned is None:
+            return 0
+        return sum(module_size(m) for m in owned.modules.values())
+
+    def add_kv_file(self, owner, filename):
+        '''Tracks a kv file loaded by Builder.load_string with filename
+        '''
+        self._owned(owner).kv_files.add(filename)
+
+    def unload_kv_file(self, owner, filename):
+        '''Removes the rules and dynamic classes of the kv file filename
+        '''
+        owned = self._owners.get(owner)
+        if owned is None or filename not in owned.kv_files:
+            return
+        owned.kv_files.discard(filename)
+        if not any(filename in o.kv_files for o in self._owners.values()):
+            unload_kv_rules(filename)
+
+    def unload(self, owner):
+        '''Unloads everything owner loaded
+        '''
+        owned = self._owners.get(owner)
+        if owned is None:
+            return
+        for name in list(owned.modules):
+            self.unload_module(owner, name)
+        for filename in list(owned.kv_files):
+            self.unload_kv_file(owner, filename)
+        del self._owners[owner]
+
+    def report(self, collect=True):
+        '''Returns a dict with, for each owner, the number of modules, Factory
+        classes and kv files loaded, and the unloaded modules that are still
+        referenced, with their approximated size in bytes
+        '''
+        if collect:
+            gc.collect()
+        unloaded = []
+        retained = []
+        for owner, name, ref in self._unloaded:
+            module = ref()
+            if module is None:
+                continue
+            unloaded.append((owner, name, ref))
+            retained.append({'owner': owner, 'module': name,
+                             'size': module_size(module)})
+        self._unloaded = unloaded
+
+        owners = {}
+        for owner, owned in self._owners.items():
+            owners[owner] = {
+                'modules': len(owned.modules),
+                'classes': sum(len(c) for c in owned.classes.values()),
+                'kv_files': len(owned.kv_files),
+                'size': self.size(owner)}
+        return {'owners': owners, 'retained': retained,
+                'retained_size': sum(r['size'] for r in retained)}
+
+
+project_modules = ProjectModules()
+'''Registry used by all the projects, as sys.modules, Factory and Builder
+are shared
+'''
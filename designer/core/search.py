@@ -0,0 +1,475 @@
+'''Text search used by the find tools.
+'''
+import collections
+import re
+import threading
+from bisect import bisect_left, bisect_right
+
+from designer.core.file_writer import (
+    atomic_write,
+    content_hash,
+    remove_temp,
+    replace_file,
+    write_temp,
+)
+from designer.core.project_manager import IGNORED_EXTS, IGNORED_PATHS
+from designer.utils.worker import Worker, current_job
+
+
+PATTERN_CACHE_SIZE = 32
+'''Number of compiled search patterns kept in memory
+'''
+
+MAX_RESULTS = 1000
+'''Maximum number of matches returned by a project search
+'''
+
+SEARCH_THREADS = 4
+'''Number of threads used by the project search
+'''
+
+FILES_PER_JOB = 16
+'''Number of files searched by each job of the project search
+'''
+
+_patterns = {}
+
+
+def compile_pattern(query, use_regex=False, case=False, whole_word=False):
+    '''Returns the compiled regular expression to the search query.
+    Patterns are cached, so it is cheap to call it on every keypress.
+    Raises re.error if the regex is invalid
+    '''
+    key = (query, use_regex, case, whole_word)
+    pattern = _patterns.get(key)
+    if pattern is None:
+        expr = query if use_regex else re.escape(query)
+        if whole_word:
+            expr = r'\b(?:%s)\b' % expr
+        flags = re.MULTILINE
+        if not case:
+            flags |= re.IGNORECASE
+        pattern = re.compile(expr, flags)
+        if len(_patterns) >= PATTERN_CACHE_SIZE:
+            _patterns.clear()
+        _patterns[key] = pattern
+    return pattern
+
+
+def _common_prefix(a, b):
+    '''Length of the common prefix of the strings a and b, using binary
+    search over slices, so the comparison runs in C
+    '''
+    lo = 0
+    hi = min(len(a), len(b))
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if a[lo:mid] == b[lo:mid]:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+def _common_suffix(a, b, limit):
+    '''Length of the common suffix of the strings a and b, up to limit
+    '''
+    la = len(a)
+    lb = len(b)
+    lo = 0
+    hi = limit
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if a[la - mid:la - lo] == b[lb - mid:lb - lo]:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+class BufferSearch(object):
+    '''Search engine over a text buffer. It keeps a table with the offset of
+    each line, updated incrementally with :meth:`update`, and caches the
+    matches of the last query until the text changes.
+    '''
+
+    def __init__(self, text=u''):
+        self.text = u''
+        self.version = 0
+        self._line_offsets = [0]
+        self._matches_key = None
+        self._matches = []
+        self._starts = []
+        self.update(text)
+
+    def update(self, text):
+        '''Set the buffer text. Only the lines between the first and the last
+        changed character have their offsets computed again
+        '''
+        old = self.text
+        if text == old:
+            return
+        prefix = _common_prefix(old, text)
+        suffix = _common_suffix(old, text,
+                                min(len(old), len(text)) - prefix)
+        delta = len(text) - len(old)
+        offsets = self._line_offsets
+
+        # lines starting in the changed range are replaced
+        first = bisect_right(offsets, prefix)
+        last = bisect_right(offsets, len(old) - suffix)
+        new_offsets = []
+        pos = text.find(u'\n', prefix, len(text) - suffix)
+        while pos != -1:
+            new_offsets.append(pos + 1)
+            pos = text.find(u'\n', pos + 1, len(text) - suffix)
+        offsets[first:] = new_offsets + [o + delta for o in offsets[last:]]
+
+        self.text = text
+        self.version += 1
+
+    @property
+    def line_count(self):
+        return len(self._line_offsets)
+
+    def line_offset(self, line):
+        '''Returns the offset of the first character of line
+        '''
+        return self._line_offsets[line]
+
+    def line_col(self, offset):
+        '''Returns (line, column) of the text offset
+        '''
+        line = bisect_right(self._line_offsets, offset) - 1
+        return line, offset - self._line_offsets[line]
+
+    def find_all(self, query, use_regex=False, case=False, whole_word=False):
+        '''Returns a list with (start, end) offsets of all matches.
+        Returns an empty list if the query is empty or an invalid regex
+        '''
+        key = (query, use_regex, case, whole_word, self.version)
+        if key == self._matches_key:
+            return self._matches
+        matches = []
+        if query:
+            try:
+                pattern = compile_pattern(query, use_regex, case, whole_word)
+            except re.error:
+                pattern = None
+            if pattern is not None:
+                matches = [m.span() for m in pattern.finditer(self.text)
+                           if m.end() > m.start()]
+        self._matches_key = key
+        self._matches = matches
+        self._starts = [m[0] for m in matches]
+        return matches
+
+    def count(self, query, use_regex=False, case=False, whole_word=False):
+        '''Returns the number of matches
+        '''
+        return len(self.find_all(query, use_regex, case, whole_word))
+
+    def find_next(self, offset, query, use_regex=False, case=False,
+                  whole_word=False, wrap=True):
+        '''Returns (start, end) of the first match starting at offset or
+        after it, or None.
+        '''
+        matches = self.find_all(query, use_regex, case, whole_word)
+        if not matches:
+            return None
+        i = bisect_left(self._starts, offset)
+        if i == len(matches):
+            if not wrap:
+                return None
+            i = 0
+        return matches[i]
+
+    def find_prev(self, offset, query, use_regex=False, case=False,
+                  whole_word=False, wrap=True):
+        '''Returns (start, end) of the last match starting before offset,
+        or None.
+        '''
+        matches = self.find_all(query, use_regex, case, whole_word)
+        if not matches:
+            return None
+        i = bisect_left(self._starts, offset) - 1
+        if i < 0:
+            if not wrap:
+                return None
+            i = len(matches) - 1
+        return matches[i]
+
+    def index_of(self, match):
+        '''Returns the position of match in the list of matches of the last
+        query, or -1
+        '''
+        i = bisect_left(self._starts, match[0])
+        if i < len(self._matches) and self._matches[i] == match:
+            return i
+        return -1
+
+    def matches_between(self, start, end):
+        '''Returns the matches of the last query that start between start and
+        end offsets
+        '''
+        i = bisect_left(self._starts, start)
+        j = bisect_left(self._starts, end)
+        return self._matches[i:j]
+
+
+FileMatch = collections.namedtuple('FileMatch',
+                                   ('line', 'start', 'end', 'text'))
+'''A match found in a file. line is the line number starting in 0, start and
+end are the offsets of the match in the file and text is the line content
+'''
+
+
+def is_ignored_path(project_path, path):
+    '''Returns True if path should not be searched, using the same rules of
+    :class:`~designer.core.project_manager.ProjectWatcher`
+    '''
+    rel_path = path.replace(project_path, '')
+    if '__pycache__' in rel_path:
+        return True
+    for ign in IGNORED_PATHS:
+        if rel_path.startswith(ign):
+            return True
+    return path.endswith(IGNORED_EXTS)
+
+
+def read_file(path):
+    '''Returns the bytes of the file path, or None if it can not be read
+    '''
+    try:
+        with open(path, 'rb') as f:
+            return f.read()
+    except (IOError, OSError):
+        return None
+
+
+def decode_text(data):
+    '''Returns the bytes data decoded as utf-8 text, or None if data is
+    binary
+    '''
+    if data is None or b'\0' in data[:8192]:
+        return None
+    try:
+        return data.decode('utf-8')
+    except UnicodeDecodeError:
+        return None
+
+
+def read_text_file(path):
+    '''Returns the content of a utf-8 text file, or None if the file is
+    binary or can not be read
+    '''
+    return decode_text(read_file(path))
+
+
+def search_text(text, pattern, limit=None):
+    '''Returns a list of :class:`FileMatch` with the matches of the compiled
+    pattern in text, up to limit matches
+    '''
+    matches = []
+    line = 0
+    line_start = 0
+    pos = 0
+    for m in pattern.finditer(text):
+        start, end = m.span()
+        if start == end:
+            continue
+        line += text.count(u'\n', pos, start)
+        pos = start
+        line_start = text.rfind(u'\n', 0, start) + 1
+        line_end = text.find(u'\n', start)
+        if line_end == -1:
+            line_end = len(text)
+        matches.append(FileMatch(line, start, end,
+                                 text[line_start:line_end]))
+        if limit is not None and len(matches) >= limit:
+            break
+    return matches
+
+
+class SearchRequest(object):
+    '''A running project search. The matches are sent to on_progress grouped
+    by file as they are found:
+
+        on_progress(request, path, matches)
+        on_result(request, total)
+
+    :data:`truncated` is True if the search stopped at max_results
+    '''
+
+    def __init__(self, pattern, max_results, on_progress=None,
+                 on_result=None):
+        self.pattern = pattern
+        self.max_results = max_results
+        self.on_progress = on_progress
+        self.on_result = on_result
+        self.total = 0
+        self.truncated = False
+        self.cancelled = False
+        self.done = False
+        self.jobs = []
+        self._lock = threading.Lock()
+
+    def cancel(self):
+        '''Stop the search. No more callbacks are called
+        '''
+        self.cancelled = True
+        for job in self.jobs:
+            job.cancel()
+
+    def _reserve(self, count):
+        '''Reserve space for count results, returns how many can be used.
+        Called from the search threads
+        '''
+        with self._lock:
+            allowed = max(0, min(count, self.max_results - self.total))
+            self.total += allowed
+            if allowed < count:
+                self.truncated = True
+            return allowed
+
+    def _on_file(self, job, value):
+        if self.on_progress is not None and not self.cancelled:
+            self.on_progress(self, *value)
+
+    def _on_job_done(self, job, value):
+        if self.cancelled or self.done:
+            return
+        if all(j.done for j in self.jobs):
+            self.done = True
+            if self.on_result is not None:
+                self.on_result(self, self.total)
+
+
+class ProjectSearch(object):
+    '''Find and replace in the files of a project, using a pool of
+    background threads. Starting a new search cancels the previous one.
+    '''
+
+    def __init__(self, num_threads=SEARCH_THREADS):
+        super(ProjectSearch, self).__init__()
+        self.worker = Worker(name='ProjectSearch', num_threads=num_threads)
+        self.request = None
+
+    def cancel(self):
+        '''Cancel the running search
+        '''
+        if self.request is not None:
+            self.request.cancel()
+            self.request = None
+
+    def search(self, files, query, use_regex=False, case=False,
+               whole_word=False, max_results=MAX_RESULTS, buffers=None,
+               on_progress=None, on_result=None):
+        '''Search query in files. Returns a :class:`SearchRequest`.
+        Raises re.error if the query is an invalid regex
+        :param files: list of file paths
+        :param buffers: dict with the text of files opened in the editor,
+            used instead of the content on disk
+        '''
+        self.cancel()
+        pattern = compile_pattern(query, use_regex, case, whole_word)
+        request = SearchRequest(pattern, max_results, on_progress, on_result)
+        self.request = request
+        buffers = dict(buffers or {})
+        files = list(files)
+        for i in range(0, len(files), FILES_PER_JOB):
+            request.jobs.append(self.worker.submit(
+                self._search_files, request, files[i:i + FILES_PER_JOB],
+                buffers, on_progress=request._on_file,
+                on_result=request._on_job_done,
+                on_error=request._on_job_done))
+        if not request.jobs:
+            request.done = True
+            if on_result is not None:
+                on_result(request, 0)
+        return request
+
+    def _search_files(self, request, files, buffers):
+        job = current_job()
+        for path in files:
+            if request.cancelled or request.truncated:
+                return
+            text = buffers.get(path)
+            if text is None:
+                text = read_text_file(path)
+            if not text:
+                continue
+            matches = search_text(text, request.pattern,
+                                  request.max_results)
+            if not matches:
+                continue
+            allowed = request._reserve(len(matches))
+            if allowed:
+                job.emit((path, matches[:allowed]))
+
+    def replace(self, files, query, replacement, use_regex=False, case=False,
+                whole_word=False, on_write=None, on_result=None,
+                on_error=None):
+        '''Replace query in files, in background. The new contents are
+        written to temporary files first, and only if all of them succeed
+        the original files are replaced. on_result receives a dict with the
+        number of replacements of each file.
+        on_write is called with (path, hash) before a file is replaced.
+        Raises re.error if the query is an invalid regex
+        '''
+        pattern = compile_pattern(query, use_regex, case, whole_word)
+        return self.worker.submit(self.replace_files, list(files), pattern,
+                                  replacement, use_regex, on_write,
+                                  on_result=on_result, on_error=on_error)
+
+    @staticmethod
+    def replace_text(text, pattern, replacement, use_regex=False):
+        '''Returns (new_text, number of replacements)
+        '''
+        if not use_regex:
+            return pattern.subn(lambda m: replacement, text)
+        return pattern.subn(replacement, text)
+
+    def replace_files(self, files, pattern, replacement, use_regex=False,
+                      on_write=None):
+        '''Replace in all files, or in none of them. The files are written
+        atomically, keeping their line breaks, and restored to their
+        original bytes if one of them can't be replaced
+        '''
+        pending = []
+        counts = {}
+        try:
+            for path in files:
+                old_data = read_file(path)
+                text = decode_text(old_data)
+                if not text:
+                    continue
+                new_text, count = self.replace_text(text, pattern,
+                                                    replacement, use_regex)
+                if count:
+                    data = new_text.encode('utf-8')
+                    pending.append((path, write_temp(path, data),
+                                    content_hash(data), old_data))
+                    counts[path] = count
+        except Exception:
+            for path, tmp_path, digest, old_data in pending:
+                remove_temp(tmp_path)
+            raise
+
+        replaced = []
+        try:
+            for path, tmp_path, digest, old_data in pending:
+                if on_write is not None:
+                    on_write(path, digest)
+                replace_file(tmp_path, path)
+                replaced.append((path, old_data))
+        except Exception:
+            for path, tmp_path, digest, old_data in pending:
+                remove_temp(tmp_path)
+            # restore the files already replaced
+            for path, old_data in replaced:
+                if on_write is not None:
+                    on_write(path, content_hash(old_data))
+                atomic_write(path, old_data)
+            raise
+        return counts
@@ -0,0 +1,229 @@
+'''Index of the symbols defined in the project files: KV rules, dynamic
+classes, ids and event handlers, and Python classes and methods.
+The files are parsed in background and the index is updated incrementally
+with the files changed in the project.
+'''
+import ast
+import collections
+import os
+import re
+
+from designer.core.search import read_text_file
+from designer.utils.worker import Worker, current_job
+
+
+KV_RULE = 'kv_rule'
+KV_DYNAMIC_CLASS = 'kv_dynamic_class'
+KV_ROOT_RULE = 'kv_root_rule'
+KV_ID = 'kv_id'
+KV_HANDLER = 'kv_handler'
+PY_CLASS = 'py_class'
+PY_METHOD = 'py_method'
+
+SOURCE_EXTS = ('.kv', '.py', '.py2', '.py3')
+
+KV_KINDS = (KV_RULE, KV_DYNAMIC_CLASS, KV_ROOT_RULE, KV_ID, KV_HANDLER)
+PY_KINDS = (PY_CLASS, PY_METHOD)
+
+Symbol = collections.namedtuple(
+    'Symbol', ('kind', 'name', 'path', 'line', 'col', 'parent', 'refs'))
+'''A symbol definition. line starts in 0. parent is the name of the
+rule or class containing the symbol. refs is a tuple with the names of the
+methods called by a KV event handler
+'''
+
+_KV_RULE_RE = re.compile(r'^<([^>]+)>\s*:')
+_KV_ROOT_RE = re.compile(r'^([A-Z][\w]*)\s*:\s*$')
+_KV_ID_RE = re.compile(r'^(\s+)id\s*:\s*([\w]+)')
+_KV_HANDLER_RE = re.compile(r'^(\s+)(on_[\w]+)\s*:(.*)$')
+_KV_CALL_RE = re.compile(r'\.([A-Za-z_][\w]*)\s*\(')
+
+
+def parse_kv_symbols(path, text):
+    '''Returns the list of symbols defined in the kv source text
+    '''
+    symbols = []
+    rule = None
+    for lineno, line in enumerate(text.splitlines()):
+        match = _KV_RULE_RE.match(line)
+        if match:
+            col = line.find('<') + 1
+            for name in match.group(1).split(','):
+                name = name.strip().lstrip('-')
+                if not name:
+                    continue
+                kind = KV_DYNAMIC_CLASS if '@' in name else KV_RULE
+                name = name.split('@')[0]
+                symbols.append(Symbol(kind, name, path, lineno,
+                                      line.find(name, col - 1), None, ()))
+                rule = name
+            continue
+        match = _KV_ROOT_RE.match(line)
+        if match:
+            rule = match.group(1)
+            symbols.append(Symbol(KV_ROOT_RULE, rule, path, lineno, 0, None,
+                                  ()))
+            continue
+        match = _KV_ID_RE.match(line)
+        if match:
+            symbols.append(Symbol(KV_ID, match.group(2), path, lineno,
+                                  line.find(match.group(2),
+                                            len(match.group(1))),
+                                  rule, ()))
+            continue
+        match = _KV_HANDLER_RE.match(line)
+        if match:
+            refs = tuple(_KV_CALL_RE.findall(match.group(3)))
+            symbols.append(Symbol(KV_HANDLER, match.group(2), path, lineno,
+                                  len(match.group(1)), rule, refs))
+    return symbols
+
+
+def parse_py_symbols(path, text):
+    '''Returns the list of classes and methods defined in the python source
+    text. Returns an empty list if the source has syntax errors
+    '''
+    try:
+        tree = ast.parse(text, os.path.basename(path))
+    except (SyntaxError, ValueError, TypeError):
+        return []
+    symbols = []
+    for node in ast.walk(tree):
+        if not isinstance(node, ast.ClassDef):
+            continue
+        symbols.append(Symbol(PY_CLASS, node.name, path, node.lineno - 1,
+                              node.col_offset, None, ()))
+        for item in node.body:
+            if isinstance(item, ast.FunctionDef):
+                symbols.append(Symbol(PY_METHOD, item.name, path,
+                                      item.lineno - 1, item.col_offset,
+                                      node.name, ()))
+    return symbols
+
+
+def parse_symbols(path, text=None):
+    '''Returns the symbols defined in the file path. If text is None, the
+    file is read from the disk
+    '''
+    ext = os.path.splitext(path)[1]
+    if ext not in SOURCE_EXTS:
+        return []
+    if text is None:
+        text = read_text_file(path)
+        if text is None:
+            return []
+    if ext == '.kv':
+        return parse_kv_symbols(path, text)
+    return parse_py_symbols(path, text)
+
+
+class SymbolIndex(object):
+    '''SymbolIndex keeps the symbols of each project file and a map of
+       symbols by name, so lookups don't need to loop over the project.
+       Files are parsed by a background worker and the index is only updated
+       in the main thread.
+    '''
+
+    def __init__(self):
+        self.worker = Worker(name='SymbolIndex')
+        self._files = {}
+        self._by_name = {}
+
+    def build(self, files):
+        '''Index all files in background
+        '''
+        self.clear()
+        return self.worker.submit(self._parse_files, list(files), True,
+                                  key='build', on_result=self._on_parsed)
+
+    def update(self, files):
+        '''Index again the files changed. Removed files are removed from the
+        index
+        '''
+        return self.worker.submit(self._parse_files, list(files), False,
+                                  on_result=self._on_parsed)
+
+    def update_text(self, path, text):
+        '''Index a file from the text in the editor, in the main thread
+        '''
+        self._set_file_symbols(path, parse_symbols(path, text))
+
+    def clear(self):
+        '''Remove all symbols
+        '''
+        self.worker.cancel_all()
+        self._files = {}
+        self._by_name = {}
+
+    def _parse_files(self, files, replace_all):
+        job = current_job()
+        result = {}
+        for path in files:
+            if job.cancelled:
+                break
+            if os.path.splitext(path)[1] not in SOURCE_EXTS:
+                continue
+            if os.path.isfile(path):
+                result[path] = parse_symbols(path)
+            else:
+                result[path] = None
+        return replace_all, result
+
+    def _on_parsed(self, job, value):
+        replace_all, result = value
+        if replace_all:
+            self._files = {}
+            self._by_name = {}
+        for path, symbols in result.items():
+            self._set_file_symbols(path, symbols)
+
+    def _set_file_symbols(self, path, symbols):
+        '''Replace the symbols of path. Removes the file if symbols is None
+        '''
+        by_name = self._by_name
+        for symbol in self._files.pop(path, ()):
+            same_name = by_name.get(symbol.name)
+            if same_name is not None:
+                same_name.remove(symbol)
+                if not same_name:
+                    del by_name[symbol.name]
+        if symbols is None:
+            return
+        self._files[path] = symbols
+        for symbol in symbols:
+            by_name.setdefault(symbol.name, []).append(symbol)
+
+    def lookup(self, name, kinds=None):
+        '''Returns the list of symbols named name, filtered by kinds
+        '''
+        symbols = self._by_name.get(name, [])
+        if kinds is None:
+            return list(symbols)
+        return [s for s in symbols if s.kind in kinds]
+
+    def definition(self, name, path='', line=None):
+        '''Returns the best definition to the word name used in the file path
+        at the line. KV files prefer Python definitions and vice versa;
+        ids are searched in the same file
+        '''
+        symbols = self._by_name.get(name)
+        if not symbols:
+            return None
+        is_kv = path.endswith('.kv')
+        if is_kv:
+            order = (PY_CLASS, PY_METHOD, KV_ID, KV_RULE, KV_DYNAMIC_CLASS,
+                     KV_ROOT_RULE)
+        else:
+            order = (KV_RULE, KV_DYNAMIC_CLASS, KV_ROOT_RULE, PY_CLASS,
+                     PY_METHOD)
+        for kind in order:
+            for symbol in symbols:
+                if symbol.kind != kind:
+                    continue
+                if kind == KV_ID and symbol.path != path:
+                    continue
+                if symbol.path == path and symbol.line == line:
+                    # the word is the definition itself
+                    continue
+                return symbol
+        return None
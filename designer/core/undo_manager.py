@@ -62,6 +62,7 @@ class WidgetDragOperation(OperationBase):
 
     def __init__(self, widget, cur_parent, prev_parent, prev_index,
                  playground, extra_args):
+        super(WidgetDragOperation, self).__init__('drag')
         self.widget = widget
         self.cur_parent = cur_parent
         self.prev_parent = prev_parent
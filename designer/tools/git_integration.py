@@ -1,27 +1,26 @@
 import os
 import subprocess
-import threading
+from functools import partial
 from io import open
 
 from designer.components.designer_content import DesignerCloseableTab
+from designer.components.diff_view import DiffView
+from designer.core.git_status import merge_status, read_status
 from designer.uix.action_items import (
     DesignerActionSubMenu,
     DesignerSubActionButton,
 )
 from designer.uix.input_dialog import InputDialog
-from designer.uix.py_code_input import PyScrollView
 from designer.uix.settings import SettingListContent
 from designer.utils.utils import (
     FakeSettingList,
     get_current_project,
     get_designer,
     get_kd_dir,
-    ignore_proj_watcher,
     show_alert,
     show_message,
 )
-from git import GitCommandError, RemoteProgress, Repo
-from git.exc import InvalidGitRepositoryError
+from designer.utils.worker import Worker
 from kivy.core.window import Window
 from kivy.properties import (
     BooleanProperty,
@@ -29,44 +28,11 @@ from kivy.properties import (
     ObjectProperty,
     StringProperty,
 )
-from kivy.uix.label import Label
 from kivy.uix.popup import Popup
-from pygments.lexers.diff import DiffLexer
 
 
-class GitRemoteProgress(RemoteProgress):
-
-    label = None
-    text = ''
-
-    def __init__(self):
-        super(GitRemoteProgress, self).__init__()
-        self.label = Label(text='')
-        self.label.padding = [10, 10]
-
-    def update(self, op_code, cur_count, max_count=None, message=''):
-        self.text = 'Progress: %.2f (%d of %d)\n%s' % (
-            cur_count / (max_count or 100.0),
-            cur_count,
-            (max_count or 100),
-            message.replace(',', '').strip()
-        )
-
-    def update_text(self, *args):
-        '''Update the label text
-        '''
-        if self.text:
-            self.label.text = self.text
-
-    def start(self):
-        '''Start the label updating in a separated thread
-        '''
-        Clock.schedule_interval(self.update_text, 0.2)
-
-    def stop(self):
-        '''Start the label updating in a separated thread
-        '''
-        Clock.unschedule(self.update_text)
+#: More changed paths than this are checked with a full status
+MAX_STATUS_PATHS = 500
 
 
 class DesignerGit(DesignerActionSubMenu):
@@ -89,8 +55,15 @@ class DesignerGit(DesignerActionSubMenu):
        to None.
     '''
 
+    status = ObjectProperty(None, allownone=True)
+    '''Cached :class:`~designer.core.git_status.GitStatus` of the
+    repository. Refreshed in background when the project files change.
+        :data:`status` is a :class:`~kivy.properties.ObjectProperty`,
+        defaults to None.
+    '''
+
     diff_code_input = ObjectProperty(None)
-    '''Instance of PyCodeInput with Git diff
+    '''Tab with the :class:`~designer.components.diff_view.DiffView`
     :data:`diff_code_input` is a :class:`~kivy.properties.ObjectProperty`,
         defaults to None.
     '''
@@ -99,27 +72,159 @@ class DesignerGit(DesignerActionSubMenu):
 
     def __init__(self, **kwargs):
         super(DesignerGit, self).__init__(**kwargs)
+        self.worker = Worker(name='DesignerGit')
+        self._status_stale = True
+        self._status_generation = 0
+        self._pending_paths = None
+        self._status_callbacks = []
+        self._trigger_refresh_status = Clock.create_trigger(
+            self.refresh_status, 0.5)
         self._update_menu()
 
     def load_repo(self, path):
-        '''Load a git/non-git repo from path
+        '''Load a git/non-git repo from path in background
         :param path: project path
         '''
         self.path = path
+        self.repo = None
+        self.is_repo = False
+        self.status = None
+        self._status_callbacks = []
+        self._pending_paths = None
+        self.worker.cancel_all()
+        self._update_menu()
+        self.worker.submit(self._open_repo, path, key='load',
+                           on_result=self._on_repo_loaded)
+
+    def _open_repo(self, path):
+        '''Opens the repository and reads its status. Runs in the worker
+        '''
+        # GitPython is only imported when a project is opened
+        from git import Repo
+        from git.exc import InvalidGitRepositoryError, NoSuchPathError
         try:
-            self.repo = Repo(path)
+            repo = Repo(path)
+        except (InvalidGitRepositoryError, NoSuchPathError):
+            return None
+        if os.name == 'posix':
+            script = os.path.join(get_kd_dir(),
+                                  'tools', 'ssh-agent', 'ssh.sh')
+            repo.git.update_environment(GIT_SSH_COMMAND=script)
+        return repo, read_status(repo)
+
+    def _on_repo_loaded(self, job, value):
+        if value is not None:
+            self.repo, status = value
             self.is_repo = True
-            branch_name = self.repo.active_branch.name
-            self.dispatch('on_branch', branch_name)
-
-            if os.name == 'posix':
-                script = os.path.join(get_kd_dir(),
-                                      'tools', 'ssh-agent', 'ssh.sh')
-                self.repo.git.update_environment(GIT_SSH_COMMAND=script)
-        except InvalidGitRepositoryError:
-            self.is_repo = False
+            self._pending_paths = set()
+            self._set_status(status)
         self._update_menu()
 
+    def run_git(self, func, *args, **kwargs):
+        '''Run func(*args) in the git worker and returns the
+        :class:`~designer.utils.worker.Job`. The following keyword arguments
+        are accepted:
+
+            on_result, on_progress: main thread callbacks
+            title: title of the alert displayed if the command fails
+            error: message of the alert displayed if the command fails
+            modifies: True if the command changes the repository. The
+                project watcher is paused while it runs and the status is
+                refreshed when it finishes
+        '''
+        on_result = kwargs.pop('on_result', None)
+        on_progress = kwargs.pop('on_progress', None)
+        title = kwargs.pop('title', 'Git')
+        error = kwargs.pop('error', 'Git command failed!')
+        modifies = kwargs.pop('modifies', False)
+
+        watcher = get_designer().project_watcher
+        if modifies:
+            watcher.pause_watching()
+
+        def finish():
+            if modifies:
+                watcher.resume_watching()
+                self.update_status()
+
+        def _on_result(job, value):
+            finish()
+            if on_result is not None:
+                on_result(job, value)
+
+        def _on_error(job, e):
+            finish()
+            show_alert(title, error + '\n' + str(e))
+
+        return self.worker.submit(func, *args, on_result=_on_result,
+                                  on_error=_on_error, on_progress=on_progress)
+
+    def update_status(self, paths=None):
+        '''Mark the cached status as stale and refresh it in background.
+        Called with the change set of the project watcher. If paths is None
+        the whole repository is checked again
+        '''
+        if not self.is_repo:
+            return
+        self._status_stale = True
+        self._status_generation += 1
+        if paths is None:
+            self._pending_paths = None
+        elif self._pending_paths is not None:
+            root = self.repo.working_tree_dir
+            for path in paths:
+                path = os.path.relpath(path, root)
+                if not path.startswith('..'):
+                    self._pending_paths.add(path)
+            if len(self._pending_paths) > MAX_STATUS_PATHS:
+                self._pending_paths = None
+        self._trigger_refresh_status()
+
+    def refresh_status(self, *args):
+        '''Read the status of the paths changed since the last refresh in
+        background
+        '''
+        if self.repo is None:
+            return
+        paths = self._pending_paths
+        self._pending_paths = set()
+        if self.status is None or not paths:
+            paths = None
+        else:
+            paths = sorted(paths)
+        # jobs run in order, so partial updates are always merged over the
+        # previous status
+        self.worker.submit(read_status, self.repo, paths,
+                           on_result=partial(self._on_status,
+                                             self._status_generation, paths))
+
+    def _on_status(self, generation, paths, job, status):
+        if paths is not None and self.status is not None:
+            status = merge_status(self.status, status, paths)
+        # files changed while reading, the status is already stale
+        self._set_status(status, generation != self._status_generation)
+
+    def _set_status(self, status, stale=False):
+        self.status = status
+        self._status_stale = stale
+        self.dispatch('on_branch', status.description)
+        if stale:
+            return
+        callbacks = self._status_callbacks
+        self._status_callbacks = []
+        for callback in callbacks:
+            callback(status)
+
+    def get_status(self, callback):
+        '''Calls callback with the repository status. Uses the cached status
+        if it's up to date, otherwise waits for the background refresh
+        '''
+        if self.status is not None and not self._status_stale:
+            callback(self.status)
+            return
+        self._status_callbacks.append(callback)
+        self.refresh_status()
+
     def _update_menu(self, *args):
         '''Update the Git ActionSubMenu content.
         If a valid repo is open, git tools will be available.
@@ -185,18 +290,24 @@ class DesignerGit(DesignerActionSubMenu):
         else:
             return True
 
-    @ignore_proj_watcher
     def do_init(self, *args):
         '''Git init
         '''
-        try:
-            self.repo = Repo.init(self.path, mkdir=False)
-            self.repo.index.commit('Init commit')
+        def init(path):
+            from git import Repo
+            repo = Repo.init(path, mkdir=False)
+            repo.index.commit('Init commit')
+            return repo
+
+        def on_init(job, repo):
+            self.repo = repo
             self.is_repo = True
             self._update_menu()
+            self.update_status()
             show_message('Git repo initialized', 5, 'info')
-        except:
-            show_alert('Git Init', 'Failted to initialize repo!')
+
+        self.run_git(init, self.path, on_result=on_init, title='Git Init',
+                     error='Failted to initialize repo!', modifies=True)
 
     def do_commit(self, *args):
         '''Git commit
@@ -213,30 +324,43 @@ class DesignerGit(DesignerActionSubMenu):
         d.popup.open()
         return True
 
-    @ignore_proj_watcher
     def _perform_do_commit(self, input, *args):
         '''Perform the git commit with data from InputDialog
         '''
         message = input.get_user_input()
-        if self.repo.is_dirty():
-            try:
-                self.repo.git.commit('-am', message)
+        repo = self.repo
+
+        def commit():
+            if not repo.is_dirty():
+                return False
+            repo.git.commit('-am', message)
+            return True
+
+        def on_commit(job, committed):
+            if committed:
                 show_message('Commit: ' + message, 5, 'info')
-            except GitCommandError as e:
-                show_alert('Git Commit', 'Failed to commit!\n' + str(e))
-        else:
-            show_alert('Git Commit', 'There is nothing to commit')
+            else:
+                show_alert('Git Commit', 'There is nothing to commit')
 
+        self.run_git(commit, on_result=on_commit, title='Git Commit',
+                     error='Failed to commit!', modifies=True)
         get_designer().close_popup()
 
-    @ignore_proj_watcher
     def do_add(self, *args):
         '''Git select files from a list to add
         '''
         d = get_designer()
         if d.popup:
             return False
-        files = self.repo.untracked_files
+        self.get_status(self._show_add_popup)
+
+    def _show_add_popup(self, status):
+        '''Displays the untracked files of the status to be added
+        '''
+        d = get_designer()
+        if d.popup:
+            return
+        files = status.untracked
         if not files:
             show_alert('Git Add', 'All files are already indexed by Git')
             return
@@ -261,17 +385,17 @@ class DesignerGit(DesignerActionSubMenu):
         d.popup = popup
         popup.open()
 
-    @ignore_proj_watcher
     def _perform_do_add(self, instance, selected_files, *args):
         '''Add the selected files to git index
         '''
-        try:
-            self.repo.index.add(selected_files)
+        def on_add(job, value):
             show_message('%d file(s) added to Git index' %
                          len(selected_files), 5, 'info')
-            get_designer().close_popup()
-        except GitCommandError as e:
-            show_alert('Git Add', 'Failed to add files to Git!\n' + str(e))
+
+        self.run_git(self.repo.index.add, selected_files, on_result=on_add,
+                     title='Git Add', error='Failed to add files to Git!',
+                     modifies=True)
+        get_designer().close_popup()
 
     def do_branches(self, *args):
         '''Shows a list of git branches and allow to change the current one
@@ -279,9 +403,17 @@ class DesignerGit(DesignerActionSubMenu):
         d = get_designer()
         if d.popup:
             return False
-        branches = []
-        for b in self.repo.heads:
-            branches.append(b.name)
+
+        def list_branches():
+            return [b.name for b in self.repo.heads]
+
+        self.run_git(list_branches, on_result=self._show_branches_popup,
+                     title='Git Branches', error='Failed to list branches!')
+
+    def _show_branches_popup(self, job, branches):
+        d = get_designer()
+        if d.popup:
+            return
 
         # create the popup
         fake_setting = FakeSettingList()
@@ -301,12 +433,12 @@ class DesignerGit(DesignerActionSubMenu):
         content.bind(on_apply=self._perform_do_branches,
                      on_cancel=d.close_popup)
 
-        content.selected_items = [self.repo.active_branch.name]
+        if self.status is not None:
+            content.selected_items = [self.status.branch]
         content.show_items()
         d.popup = popup
         popup.open()
 
-    @ignore_proj_watcher
     def _perform_do_branches(self, instance, branches, *args):
         '''If the branch name exists, try to checkout. If a new name, create
         the branch and checkout.
@@ -314,26 +446,28 @@ class DesignerGit(DesignerActionSubMenu):
         '''
         get_designer().close_popup()
 
-        if self.repo.is_dirty():
-            show_alert('Git checkout',
-                       'Please, commit your changes before '
-                       'switch branches.')
-            return
-
         if not branches:
             return
 
         branch = branches[0]
-        try:
-            if branch in self.repo.heads:
-                self.repo.heads[branch].checkout()
-            else:
-                self.repo.create_head(branch)
-                self.repo.heads[branch].checkout()
-            branch_name = self.repo.active_branch.name
-            self.dispatch('on_branch', branch_name)
-        except GitCommandError as e:
-            show_alert('Git Branches', 'Failed to switch branch!\n' + str(e))
+        repo = self.repo
+
+        def checkout():
+            if repo.is_dirty():
+                return False
+            if branch not in repo.heads:
+                repo.create_head(branch)
+            repo.heads[branch].checkout()
+            return True
+
+        def on_checkout(job, switched):
+            if not switched:
+                show_alert('Git checkout',
+                           'Please, commit your changes before '
+                           'switch branches.')
+
+        self.run_git(checkout, on_result=on_checkout, title='Git Branches',
+                     error='Failed to switch branch!', modifies=True)
 
     def on_branch(self, *args):
         '''Dispatch the branch name
@@ -341,42 +475,23 @@ class DesignerGit(DesignerActionSubMenu):
         pass
 
     def do_diff(self, *args):
-        '''Open a CodeInput with git diff
+        '''Open a DiffView with the changed files. The diff of each file is
+        read when it's selected
         '''
-        diff = self.repo.git.diff()
-        if not diff:
-            diff = 'Empty diff'
-
         d = get_designer()
         panel = d.designer_content.tab_pannel
-        inputs = d.code_inputs
-
-        # check if diff is visible on tabbed panel.
-        # if so, update the text content
-        for i, code_input in enumerate(panel.tab_list):
-            if code_input == self.diff_code_input:
-                panel.switch_to(panel.tab_list[len(panel.tab_list) - i - 2])
-                code_input.content.code_input.text = diff
-                return
 
         # if not displayed, create or add it to the screen
         if self.diff_code_input is None:
             panel_item = DesignerCloseableTab(title='Git diff')
             panel_item.bind(on_close=panel.on_close_tab)
-            scroll = PyScrollView()
-            _py_code_input = scroll.code_input
-            _py_code_input.text = diff
-            _py_code_input.path = ''
-            _py_code_input.readonly = True
-            _py_code_input.lexer = DiffLexer()
-            _py_code_input.saved = True
-            panel_item.content = scroll
+            panel_item.content = DiffView()
             panel_item.rel_path = ''
             self.diff_code_input = panel_item
-        else:
-            self.diff_code_input.content.code_input.text = diff
-        panel.add_widget(self.diff_code_input)
-        panel.switch_to(panel.tab_list[0])
+        if self.diff_code_input not in panel.tab_list:
+            panel.add_widget(self.diff_code_input)
+        panel.switch_to(self.diff_code_input)
+        self.diff_code_input.content.load()
 
     def do_push(self, *args):
         '''Open a list of remotes to push repository data.
@@ -419,10 +534,11 @@ class DesignerGit(DesignerActionSubMenu):
         popup.open()
 
     def _perform_do_push(self, instance, remotes, *args):
-        '''Try to perform a push
+        '''Try to perform a push in the git worker
         '''
         remote = remotes[0]
         remote_repo = self.repo.remotes[remote]
+        from designer.tools.git_progress import GitRemoteProgress
         progress = GitRemoteProgress()
 
         status = Popup(title='Git push progress',
@@ -431,27 +547,22 @@ class DesignerGit(DesignerActionSubMenu):
                        size=(500, 200))
         status.open()
 
-        @ignore_proj_watcher
-        def push(*args):
-            '''Do a push in a separated thread
-            '''
-            try:
-                remote_repo.push(self.repo.active_branch.name,
-                                 progress=progress)
-
-                def set_progress_done(*args):
-                    progress.label.text = 'Completed!'
-
-                Clock.schedule_once(set_progress_done, 1)
-                progress.stop()
-                show_message('Git remote push completed!', 5, 'info')
-            except GitCommandError as e:
-                progress.label.text = 'Failed to push!\n' + str(e)
-                show_message('Failed to push', 5, 'error')
+        def push():
+            remote_repo.push(self.repo.active_branch.name, progress=progress)
+
+        def on_push(job, value):
+            self.update_status()
+            progress.label.text = 'Completed!'
+            show_message('Git remote push completed!', 5, 'info')
+            get_designer().close_popup()
+
+        def on_error(job, e):
+            progress.label.text = 'Failed to push!\n' + str(e)
+            show_message('Failed to push', 5, 'error')
             get_designer().close_popup()
 
-        progress.start()
-        threading.Thread(target=push).start()
+        self.worker.submit(push, on_result=on_push, on_error=on_error,
+                           on_progress=progress.update_text)
 
     def do_pull(self, *args):
         '''Open a list of remotes to pull remote data.
@@ -494,10 +605,11 @@ class DesignerGit(DesignerActionSubMenu):
         popup.open()
 
     def _perform_do_pull(self, instance, remotes, *args):
-        '''Try to perform a pull
+        '''Try to perform a pull in the git worker
         '''
         remote = remotes[0]
         remote_repo = self.repo.remotes[remote]
+        from designer.tools.git_progress import GitRemoteProgress
         progress = GitRemoteProgress()
 
         status = Popup(title='Git pull progress',
@@ -506,22 +618,23 @@ class DesignerGit(DesignerActionSubMenu):
                        size=(500, 200))
         status.open()
 
-        @ignore_proj_watcher
-        def pull(*args):
-            '''Do a pull in a separated thread
-            '''
-            try:
-                remote_repo.pull(progress=progress)
-
-                def set_progress_done(*args):
-                    progress.label.text = 'Completed!'
-
-                Clock.schedule_once(set_progress_done, 1)
-                progress.stop()
-                show_message('Git remote pull completed!', 5)
-            except GitCommandError as e:
-                progress.label.text = 'Failed to pull!\n' + str(e)
+        watcher = get_designer().project_watcher
+        watcher.pause_watching()
+
+        def pull():
+            remote_repo.pull(progress=progress)
+
+        def on_pull(job, value):
+            watcher.resume_watching()
+            self.update_status()
+            progress.label.text = 'Completed!'
+            show_message('Git remote pull completed!', 5)
+            get_designer().close_popup()
+
+        def on_error(job, e):
+            watcher.resume_watching()
+            progress.label.text = 'Failed to pull!\n' + str(e)
             get_designer().close_popup()
 
-        progress.start()
-        threading.Thread(target=pull).start()
+        self.worker.submit(pull, on_result=on_pull, on_error=on_error,
+                           on_progress=progress.update_text)
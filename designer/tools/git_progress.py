@@ -0,0 +1,32 @@
+from designer.utils.worker import current_job
+from git import RemoteProgress
+from kivy.uix.label import Label
+
+
+class GitRemoteProgress(RemoteProgress):
+    '''Reports the progress of a remote operation running in the git worker
+    to the job on_progress callback
+    '''
+
+    label = None
+
+    def __init__(self):
+        super(GitRemoteProgress, self).__init__()
+        self.label = Label(text='')
+        self.label.padding = [10, 10]
+
+    def update(self, op_code, cur_count, max_count=None, message=''):
+        job = current_job()
+        if job is None:
+            return
+        job.emit('Progress: %.2f (%d of %d)\n%s' % (
+            cur_count / (max_count or 100.0),
+            cur_count,
+            (max_count or 100),
+            message.replace(',', '').strip()
+        ))
+
+    def update_text(self, job, text):
+        '''Update the label text. Called in the main thread
+        '''
+        self.label.text = text
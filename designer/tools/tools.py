@@ -4,8 +4,9 @@ import shutil
 import sys
 
 from designer.uix.confirmation_dialog import ConfirmationDialog
-from designer.utils import constants
+from designer.utils import constants, trace
 from designer.utils.utils import (
+    get_config_dir,
     get_current_project,
     get_designer,
     get_kd_data_dir,
@@ -184,6 +185,23 @@ __pycache__/'''
         f = open(gitignore_path, 'w').write(gitignore)
         status.show_message('.gitignore created successfully', 5, 'info')
 
+    def export_trace(self):
+        '''Export the recorded trace to a Chrome trace file, in the
+        kivy-designer config dir
+        '''
+        if not trace.enabled:
+            show_alert('Export Trace', 'Tracing is disabled.\n\nEnable it on '
+                       '\'File\' -> \'Settings\'')
+            return False
+
+        name = datetime.datetime.now().strftime(
+            "trace_%m-%d-%Y_%H-%M-%S.json")
+        path = os.path.join(get_config_dir(), name)
+        count = trace.export(path)
+        self.designer.statusbar.show_message(
+            '%d trace events saved at %s' % (count, path), 5, 'info')
+        return True
+
     def buildozer_init(self):
         '''Checks if the .spec exists or not; and when possible, calls
             _perform_buildozer_init
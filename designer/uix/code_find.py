@@ -1,4 +1,5 @@
-from kivy.properties import BooleanProperty, ObjectProperty, StringProperty
+from kivy.properties import AliasProperty, BooleanProperty, \
+    NumericProperty, ObjectProperty, StringProperty
 from kivy.uix.boxlayout import BoxLayout
 
 
@@ -26,6 +27,30 @@ class CodeInputFind(BoxLayout):
         :data:`case_sensitive` is a :class:`~kivy.properties.BooleanProperty`
     '''
 
+    matches = NumericProperty(0)
+    '''Number of occurrences of the query in the current file
+        :data:`matches` is a :class:`~kivy.properties.NumericProperty`
+    '''
+
+    current_match = NumericProperty(-1)
+    '''Index of the selected occurrence, -1 if there is no selection
+        :data:`current_match` is a
+        :class:`~kivy.properties.NumericProperty`
+    '''
+
+    def _get_status(self):
+        if not self.query:
+            return ''
+        if self.current_match < 0:
+            return '%d matches' % self.matches
+        return '%d of %d' % (self.current_match + 1, self.matches)
+
+    status = AliasProperty(_get_status, None,
+                           bind=('query', 'matches', 'current_match'))
+    '''Text describing the matches of the query
+        :data:`status` is a :class:`~kivy.properties.AliasProperty`
+    '''
+
     __events__ = ('on_close', 'on_next', 'on_prev', )
 
     def on_touch_down(self, touch):
@@ -1,9 +1,25 @@
-import re
+import os
+from bisect import bisect_right
+from collections import deque
+from functools import partial
 
-from designer.utils.utils import get_current_project, get_designer, show_alert
+from designer.core.highlighter import LineHighlighter
+from designer.core.search import BufferSearch
+from designer.utils.utils import (
+    get_current_project,
+    get_designer,
+    show_alert,
+    show_message,
+)
 from kivy import Config
+from kivy.cache import Cache
+from kivy.clock import Clock
+from kivy.core.text.markup import MarkupLabel as Label
+from kivy.graphics import Color, Rectangle
 from kivy.properties import BooleanProperty, StringProperty
 from kivy.uix.codeinput import CodeInput
+from kivy.uix.scrollview import ScrollView
+from kivy.uix.textinput import FL_IS_LINEBREAK
 from kivy.utils import get_color_from_hex
 from pygments import styles
 
@@ -43,6 +59,16 @@ class DesignerCodeInput(CodeInput):
     '''
 
     def __init__(self, **kwargs):
+        self._highlighter = LineHighlighter()
+        self._row_markups = None
+        self._highlight_options = None
+        self._trigger_highlight = Clock.create_trigger(
+            self._continue_highlight)
+        self._search = BufferSearch()
+        self._search_dirty = True
+        self._row_offsets = None
+        self._highlight_query = None
+        self._current_match = None
         super(DesignerCodeInput, self).__init__(**kwargs)
         parser = Config.get_configparser('DesignerSettings')
         if parser:
@@ -65,6 +91,172 @@ class DesignerCodeInput(CodeInput):
     def on_show_edit(self, *args):
         pass
 
+    def _configure_highlighter(self):
+        '''Update the highlighter with the current style. Returns True if
+        all lines must be rendered again
+        '''
+        options = (self.password, dict(self._get_line_options()))
+        changed = self._highlighter.configure(
+            self.lexer, self.formatter, self.text_color, self.tab_width)
+        if options != self._highlight_options:
+            self._highlight_options = options
+            changed = True
+        return changed
+
+    def _sync_highlighter(self):
+        '''Make sure the highlighter has the same lines of the widget
+        '''
+        self._configure_highlighter()
+        if len(self._highlighter.lines) != len(self._lines):
+            self._highlighter.update(self._lines)
+
+    def _create_line_label(self, text, hint=False):
+        '''Override of CodeInput's _create_line_label. Uses the markup from
+        the incremental highlighter when available, and the markup as cache
+        key, so lines with the same text and lexer state share the texture
+        '''
+        ntext = text.replace(u'\n', u'').replace(u'\t', u' ' * self.tab_width)
+        if self.password and not hint:  # Don't replace hint_text with *
+            ntext = u'*' * len(ntext)
+        markup = None
+        if not hint and self._row_markups:
+            markup = self._row_markups.popleft()
+        if markup is None:
+            markup = self._get_bbcode(ntext)
+        kw = self._get_line_options()
+        cid = u'{}\0{}\0{}'.format(markup, self.password, kw)
+        texture = Cache.get('textinput.label', cid)
+
+        if texture is None:
+            label = Label(text=markup, **kw)
+            label.refresh()
+            texture = label.texture
+            Cache.append('textinput.label', cid, texture)
+            label.text = ''
+        return texture
+
+    def _call_with_markups(self, rows, func, *args):
+        '''Call func using the highlighted markup of rows to create the
+        line labels
+        '''
+        hl = self._highlighter
+        self._row_markups = deque(hl.markup(r) if r < len(hl.lines) else None
+                                  for r in rows)
+        try:
+            return func(*args)
+        finally:
+            self._row_markups = None
+
+    def _refresh_rows(self, rows):
+        '''Create the labels again for rows whose highlight changed after an
+        edit in a previous line
+        '''
+        labels = self._lines_labels
+        lines = self._lines
+        for row in rows:
+            if row < len(labels):
+                labels[row] = self._call_with_markups(
+                    (row, ), self._create_line_label, lines[row])
+        if rows:
+            self._trigger_update_graphics()
+        if self._highlighter.pending:
+            self._trigger_highlight()
+
+    def _continue_highlight(self, *args):
+        '''Highlight the lines left by the last edit, a few lines per frame
+        '''
+        self._sync_highlighter()
+        self._refresh_rows(self._highlighter.resume())
+
+    def _set_line_text(self, line_num, text):
+        self._row_offsets = None
+        self._sync_highlighter()
+        changed = self._highlighter.splice(line_num, line_num + 1, [text])
+        self._call_with_markups(
+            (line_num, ), super(DesignerCodeInput, self)._set_line_text,
+            line_num, text)
+        self._refresh_rows(changed)
+
+    def _delete_line(self, idx):
+        self._row_offsets = None
+        self._sync_highlighter()
+        changed = self._highlighter.splice(idx, idx + 1, [])
+        super(DesignerCodeInput, self)._delete_line(idx)
+        self._refresh_rows(changed)
+
+    def _refresh_text(self, text, *largs):
+        '''Override of TextInput's _refresh_text. Only the lines that differ
+        from the current ones are highlighted and rendered again
+        '''
+        _super = super(DesignerCodeInput, self)._refresh_text
+        hl = self._highlighter
+        # the lines are rebuilt, also when wrapped again after a resize
+        self._row_offsets = None
+        if len(largs) > 1:
+            mode, start, finish, _lines, _lines_flags, len_lines = largs
+            self._sync_highlighter()
+            changed = []
+            if mode == 'insert' or finish > start:
+                changed = hl.splice(start, finish + 1, _lines)
+            self._call_with_markups(range(start, start + len(_lines)),
+                                    _super, text, *largs)
+            self._refresh_rows(changed)
+            return
+
+        cursor = self.cursor_index()
+        old_lines = self._lines
+        old_flags = self._lines_flags
+        _lines, _lines_flags = self._split_smart(text)
+        if self._configure_highlighter() or not old_lines or \
+                len(old_lines) != len(self._lines_labels) or \
+                len(old_lines) != len(old_flags):
+            hl.reset(_lines)
+            self._call_with_markups(range(len(_lines)), _super, text)
+            self._refresh_rows([])
+            return
+
+        # find the range of lines that changed, a line that is no longer the
+        # first one only changes by its flag
+        n_old = len(old_lines)
+        n_new = len(_lines)
+        first = 0
+        limit = min(n_old, n_new)
+        while first < limit and old_lines[first] == _lines[first] and \
+                old_flags[first] == _lines_flags[first]:
+            first += 1
+        if first == n_old:
+            # lines appended at the end: TextInput can't insert after its
+            # last line, so the last line is rendered again
+            first -= 1
+        elif first and first < limit and \
+                old_flags[first] != _lines_flags[first]:
+            # TextInput keeps the old flag of the first line replaced
+            first -= 1
+        last = 0
+        limit -= first
+        while last < limit and \
+                old_lines[n_old - last - 1] == _lines[n_new - last - 1] and \
+                old_flags[n_old - last - 1] == _lines_flags[n_new - last - 1]:
+            last += 1
+        if first + last == n_new:
+            # at least one line must be rendered
+            if first:
+                first -= 1
+            else:
+                last -= 1
+        end = n_old - last
+        if len(hl.lines) != n_old:
+            hl.update(old_lines)
+        changed = hl.splice(first, end, _lines[first:n_new - last])
+        self._call_with_markups(
+            range(first, n_new - last), _super, text, 'insert', first,
+            end - 1, _lines[first:n_new - last],
+            _lines_flags[first:n_new - last],
+            n_new - last - first)
+        self._lines_flags = _lines_flags
+        self.cursor = self.get_cursor_from_index(cursor)
+        self._refresh_rows(changed)
+
     def on_touch_down(self, touch):
         '''Override of CodeInput's on_touch_down event.
            Used to emit on_show_edit
@@ -75,6 +267,65 @@ class DesignerCodeInput(CodeInput):
 
         return super(DesignerCodeInput, self).on_touch_down(touch)
 
+    def keyboard_on_key_down(self, window, keycode, text, modifiers):
+        '''Override of keyboard_on_key_down. F12 goes to the definition of
+        the word under the cursor
+        '''
+        if keycode[0] == 293:
+            self.go_to_definition()
+            return True
+        return super(DesignerCodeInput, self).keyboard_on_key_down(
+            window, keycode, text, modifiers)
+
+    def word_at_cursor(self):
+        '''Returns the identifier under the cursor
+        '''
+        text = self.text
+        index = self.cursor_index()
+        start = index
+        while start > 0 and (text[start - 1].isalnum()
+                             or text[start - 1] == '_'):
+            start -= 1
+        end = index
+        while end < len(text) and (text[end].isalnum() or text[end] == '_'):
+            end += 1
+        return text[start:end]
+
+    def go_to_definition(self):
+        '''Open the file with the definition of the word under the cursor,
+        using the project symbol index. From KV files it goes to the Python
+        classes and methods, from Python files to the KV rules
+        '''
+        name = self.word_at_cursor()
+        if not name:
+            return None
+        # cursor_row is the row displayed, the symbols use the text lines
+        line = self.get_search().line_col(self.cursor_index())[0]
+        d = get_designer()
+        symbol = d.symbol_index.definition(name, self.path, line)
+        if symbol is None:
+            show_message('Definition of "%s" not found' % name, 5, 'info')
+            return None
+        if symbol.path != self.path:
+            project = get_current_project()
+            d.designer_content.tab_pannel.open_file(
+                symbol.path, os.path.relpath(symbol.path, project.path),
+                on_load=partial(self._select_symbol, symbol))
+            return None
+        return self._select_symbol(symbol, self)
+
+    def _select_symbol(self, symbol, code_input):
+        '''Select the symbol name in code_input
+        '''
+        if code_input is None:
+            return None
+        search = code_input.get_search()
+        if symbol.line >= search.line_count:
+            return None
+        start = search.line_offset(symbol.line) + symbol.col
+        code_input.focus = True
+        return code_input.select_match((start, start + len(symbol.name)))
+
     def do_focus(self, *args):
         '''Force the focus on this widget
         '''
@@ -88,102 +339,185 @@ class DesignerCodeInput(CodeInput):
     def on_text(self, *args):
         '''Listen text changes
         '''
+        self._search_dirty = True
+        self._row_offsets = None
         if self.focus:
             self.saved = False
             d = get_designer()
             get_current_project().saved = False
 
+    def get_search(self):
+        '''Returns the :class:`~designer.core.search.BufferSearch` updated
+        with the current text
+        '''
+        if self._search_dirty:
+            self._search.update(self.text)
+            self._search_dirty = False
+        return self._search
+
+    def _get_row_offsets(self):
+        '''Returns a list with the text index of the first character of
+        each row, used to convert an index to the cursor position without
+        looping over all lines
+        '''
+        if self._row_offsets is None:
+            offsets = []
+            index = 0
+            for line, flag in zip(self._lines, self._lines_flags):
+                if flag & FL_IS_LINEBREAK:
+                    index += 1
+                offsets.append(index)
+                index += len(line)
+            self._row_offsets = offsets
+        return self._row_offsets
+
+    def _cursor_from_index(self, index):
+        '''Same as get_cursor_from_index, using the rows offsets table
+        '''
+        offsets = self._get_row_offsets()
+        if not offsets:
+            return 0, 0
+        row = max(0, bisect_right(offsets, index) - 1)
+        return index - offsets[row], row
+
+    def select_match(self, match):
+        '''Move the cursor to the match and select it
+        '''
+        if match is None:
+            return None
+        self._current_match = match
+        self.cursor = self._cursor_from_index(match[0])
+        self.select_text(*match)
+        self._scroll_to_row(self.cursor_row)
+        self._trigger_update_graphics()
+        return match
+
+    def _scroll_to_row(self, row):
+        '''If the widget is inside of a ScrollView, scroll it to display
+        the row
+        '''
+        scroll = self.parent
+        while scroll is not None and not isinstance(scroll, ScrollView):
+            scroll = scroll.parent
+        if scroll is None:
+            return
+        dy = self.line_height + self.line_spacing
+        y = self.top - self.padding[1] + self.scroll_y - row * dy
+        wy = self.to_window(self.x, y)[1]
+        sy = scroll.to_window(scroll.x, scroll.y)[1]
+        if sy + dy <= wy <= sy + scroll.height:
+            return
+        distance = wy - (sy + scroll.height / 2.)
+        scroll_y = scroll.convert_distance_to_scroll(0, distance)[1]
+        scroll.scroll_y = min(1, max(0, scroll.scroll_y + scroll_y))
+
+    def find(self, search, use_regex=False, case=False):
+        '''Select the first occurrence of the string starting at the cursor
+        position. Used to search while the query is typed
+        '''
+        return self.select_match(self.get_search().find_next(
+            self.cursor_index(), search, use_regex, case))
+
     def find_next(self, search, use_regex=False, case=False):
         '''Find the next occurrence of the string according to the cursor
         position
         '''
-        text = self.text
-        if not case:
-            text = text.upper()
-            search = search.upper()
-        lines = text.splitlines()
-
-        col = self.cursor_col
-        row = self.cursor_row
-
-        found = -1
-        size = 0  # size of string before selection
-        line = None
-        search_size = len(search)
-
-        for i, line in enumerate(lines):
-            if i >= row:
-                if use_regex:
-                    if i == row:
-                        line_find = line[col + 1:]
-                    else:
-                        line_find = line[:]
-                    found = re.search(search, line_find)
-                    if found:
-                        search_size = len(found.group(0))
-                        found = found.start()
-                    else:
-                        found = -1
-                else:
-                    # if on current line, consider col
-                    if i == row:
-                        found = line.find(search, col + 1)
-                    else:
-                        found = line.find(search)
-                # has found the string. found variable indicates the initial po
-                if found != -1:
-                    self.cursor = (found, i)
-                    break
-            size += len(line)
-
-        if found != -1:
-            pos = text.find(line) + found
-            self.select_text(pos, pos + search_size)
+        return self.select_match(self.get_search().find_next(
+            self.cursor_index() + 1, search, use_regex, case))
 
     def find_prev(self, search, use_regex=False, case=False):
         '''Find the previous occurrence of the string according to the cursor
         position
         '''
-        text = self.text
-        if not case:
-            text = text.upper()
-            search = search.upper()
-        lines = text.splitlines()
-
-        col = self.cursor_col
-        row = self.cursor_row
-        lines = lines[:row + 1]
-        lines.reverse()
-        line_number = len(lines)
-
-        found = -1
-        line = None
-        search_size = len(search)
-
-        for i, line in enumerate(lines):
-            i = line_number - i - 1
-            if use_regex:
-                if i == row:
-                    line_find = line[:col]
-                else:
-                    line_find = line[:]
-                found = re.search(search, line_find)
-                if found:
-                    search_size = len(found.group(0))
-                    found = found.start()
-                else:
-                    found = -1
+        return self.select_match(self.get_search().find_prev(
+            self.cursor_index(), search, use_regex, case))
+
+    def count_matches(self, search, use_regex=False, case=False):
+        '''Returns the number of occurrences of the string
+        '''
+        return self.get_search().count(search, use_regex, case)
+
+    def current_match_index(self):
+        '''Returns the position of the selected match in the list of
+        matches of the last search, or -1
+        '''
+        if self._current_match is None:
+            return -1
+        return self.get_search().index_of(self._current_match)
+
+    def highlight_matches(self, search, use_regex=False, case=False):
+        '''Highlight all occurrences of the string
+        '''
+        self._highlight_query = (search, use_regex, case)
+        self._trigger_update_graphics()
+
+    def clear_highlights(self):
+        '''Remove the highlight of the matches
+        '''
+        self._highlight_query = None
+        self._current_match = None
+        self.canvas.after.remove_group('find')
+
+    def _update_graphics(self, *largs):
+        super(DesignerCodeInput, self)._update_graphics(*largs)
+        self._draw_highlights()
+
+    def _visible_rows(self):
+        '''Returns the first and last rows displayed on the screen
+        '''
+        dy = self.line_height + self.line_spacing
+        top = self.top - self.padding[1] + self.scroll_y
+        y_min, y_max = self.y, self.top
+        scroll = self.parent
+        while scroll is not None and not isinstance(scroll, ScrollView):
+            scroll = scroll.parent
+        if scroll is not None:
+            y_min = max(y_min, self.to_widget(
+                *scroll.to_window(scroll.x, scroll.y))[1])
+            y_max = min(y_max, self.to_widget(
+                *scroll.to_window(scroll.right, scroll.top))[1])
+        last_row = len(self._lines) - 1
+        first = min(last_row, max(0, int((top - y_max) / dy)))
+        last = min(last_row, max(0, int((top - y_min) / dy) + 1))
+        return first, last
+
+    def _draw_highlights(self):
+        '''Draw a rectangle over the visible matches of
+        :meth:`highlight_matches`
+        '''
+        canvas = self.canvas.after
+        canvas.remove_group('find')
+        if not self._highlight_query or not self._lines:
+            return
+        search = self.get_search()
+        if not search.find_all(*self._highlight_query):
+            return
+        first, last = self._visible_rows()
+        offsets = self._get_row_offsets()
+        lines = self._lines
+        matches = search.matches_between(offsets[first],
+                                         offsets[last] + len(lines[last]) + 1)
+
+        dy = self.line_height + self.line_spacing
+        x = self.x + self.padding[0] - self.scroll_x
+        top = self.top - self.padding[1] + self.scroll_y
+        for match in matches:
+            if match == self._current_match:
+                canvas.add(Color(1, .6, 0, .5, group='find'))
             else:
-                # if on current line, consider col
-                if i == row:
-                    found = line[:col].find(search)
-                else:
-                    found = line.find(search)
-            # has found the string. found variable indicates the initial po
-            if found != -1:
-                self.cursor = (found, i)
-                break
-
-        if found != -1:
-            pos = text.find(line) + found
-            self.select_text(pos, pos + search_size)
+                canvas.add(Color(1, 1, 0, .3, group='find'))
+            start_col, start_row = self._cursor_from_index(match[0])
+            end_col, end_row = self._cursor_from_index(match[1])
+            for row in range(start_row, min(end_row, last) + 1):
+                line = lines[row]
+                beg = start_col if row == start_row else 0
+                end = end_col if row == end_row else len(line)
+                if beg >= end:
+                    continue
+                x1 = x + self._get_text_width(line[:beg], self.tab_width,
+                                              self._label_cached)
+                x2 = x + self._get_text_width(line[:end], self.tab_width,
+                                              self._label_cached)
+                canvas.add(Rectangle(
+                    pos=(x1, top - row * dy - self.line_height),
+                    size=(x2 - x1, self.line_height), group='find'))
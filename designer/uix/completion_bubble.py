@@ -128,6 +128,19 @@ class CompletionBubble(Bubble):
         if force_scroll:
             self.list_view.scroll_to(0)
 
+    def add_completions(self, completions):
+        '''Append completions to the visible list. Used to display the
+        completions while they are being computed
+        '''
+        if not self.list_view:
+            self.show_completions(list(completions))
+            return
+        data = self.adapter.data
+        if len(data) == 1 and not data[0].complete:
+            # removes the "No suggestions" item
+            data = []
+        self.adapter.data = data + list(completions)
+
     def on_selection_change(self, *args):
         pass
 
@@ -0,0 +1,133 @@
+from designer.core.mapped_file import MappedFile
+from designer.utils.utils import get_designer
+from kivy.clock import Clock
+from kivy.metrics import sp
+from kivy.properties import (
+    BooleanProperty,
+    NumericProperty,
+    StringProperty,
+)
+from kivy.uix.label import Label
+from kivy.uix.relativelayout import RelativeLayout
+from kivy.uix.scrollview import ScrollView
+
+
+class LargeFileLine(Label):
+    '''Label used to display a line in
+    :class:`~designer.uix.large_file_view.LargeFileView`
+    '''
+    pass
+
+
+class LargeFileView(ScrollView):
+    '''Read-only viewer for files too large to be edited in a CodeInput.
+       The file is mapped in memory and only the lines visible on the screen
+       are read and displayed.
+    '''
+
+    path = StringProperty('')
+    '''Path of the file
+        :data:`path` is a :class:`~kivy.properties.StringProperty`
+    '''
+
+    line_count = NumericProperty(0)
+    '''Number of lines of the file
+        :data:`line_count` is a :class:`~kivy.properties.NumericProperty`
+    '''
+
+    line_height = NumericProperty(sp(18))
+    '''Height of each line
+        :data:`line_height` is a :class:`~kivy.properties.NumericProperty`
+    '''
+
+    loading = BooleanProperty(False)
+    '''Indicates if the lines are being indexed
+        :data:`loading` is a :class:`~kivy.properties.BooleanProperty`
+    '''
+
+    def __init__(self, **kwargs):
+        self.container = RelativeLayout(size_hint=(1, None))
+        self._file = None
+        self._index_job = None
+        self._labels = {}
+        self._free_labels = []
+        self._trigger_refresh = Clock.create_trigger(self.refresh)
+        super(LargeFileView, self).__init__(**kwargs)
+        self.add_widget(self.container)
+        self.container.bind(width=self._trigger_refresh)
+        self.bind(scroll_y=self._trigger_refresh,
+                  size=self._trigger_refresh,
+                  line_count=self._trigger_refresh)
+
+    def open(self, path):
+        '''Map the file and index its lines in background
+        '''
+        self.close()
+        self.path = path
+        self._file = MappedFile(path)
+        self.loading = True
+        self._index_job = get_designer().io_worker.submit(
+            self._file.build_index, on_result=self._on_indexed)
+
+    def _on_indexed(self, job, line_count):
+        if job is not self._index_job:
+            # the file was closed or opened again
+            return
+        self._index_job = None
+        self.loading = False
+        self.line_count = line_count
+
+    def close(self):
+        '''Unmap the file
+        '''
+        if self._index_job is not None:
+            self._index_job.cancel()
+            self._index_job = None
+            self.loading = False
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self.line_count = 0
+
+    def scroll_to_line(self, line):
+        '''Scroll the view to display the line at the top
+        '''
+        max_offset = self.container.height - self.height
+        if max_offset <= 0:
+            return
+        offset = self.container.height - line * self.line_height - self.height
+        self.scroll_y = min(1, max(0, offset / max_offset))
+
+    def refresh(self, *args):
+        '''Read and display the lines visible on the screen
+        '''
+        lh = self.line_height
+        container = self.container
+        count = self.line_count if self._file is not None else 0
+        height = max(count * lh, self.height)
+        container.height = height
+        y0 = self.scroll_y * max(0, height - self.height)
+        first = max(0, int((height - y0 - self.height) / lh))
+        last = min(count - 1, int((height - y0) / lh))
+
+        labels = self._labels
+        for index in list(labels):
+            if index < first or index > last:
+                label = labels.pop(index)
+                container.remove_widget(label)
+                self._free_labels.append(label)
+
+        digits = len(str(count))
+        for index in range(first, last + 1):
+            label = labels.get(index)
+            if label is None:
+                if self._free_labels:
+                    label = self._free_labels.pop()
+                else:
+                    label = LargeFileLine(size_hint=(None, None))
+                labels[index] = label
+                container.add_widget(label)
+                label.text = u'%*d  %s' % (digits, index + 1,
+                                           self._file.line(index))
+            label.pos = (0, height - (index + 1) * lh)
+            label.size = (container.width, lh)
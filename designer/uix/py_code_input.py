@@ -1,4 +1,3 @@
-import jedi
 from designer.uix.code_input import DesignerCodeInput
 from designer.uix.completion_bubble import CompletionBubble
 from kivy.app import App
@@ -62,6 +61,8 @@ class PyScrollView(ScrollView):
         self.bubble.bind(on_cancel=self.cancel_completion)
         self.bubble.bind(on_complete=self.on_complete)
         self.root = App.get_running_app().root
+        self._completion_job = None
+        self._completion_cursor = None
 
         if self.use_autocompletion:
             self.code_input.bind(focus=self.on_code_input_focus)
@@ -78,17 +79,52 @@ class PyScrollView(ScrollView):
             Window.bind(on_keyboard=self.on_keyboard)
         else:
             Window.unbind(on_keyboard=self.on_keyboard)
+            self._cancel_completion_request()
 
     def on_keyboard(self, instance, key, scancode, codepoint, modifier):
         if key == 32 and modifier == ['ctrl']:
-            code = self.code_input
-            src = code.text
-            line = code.cursor_row + 1
-            col = code.cursor_col
-            script = jedi.Script(src, line, col)
-            completions = script.completions()
+            self.request_completion()
+
+    def request_completion(self):
+        '''Request the completions of the current cursor position to the
+        background completion worker. The results are displayed as they
+        arrive
+        '''
+        code = self.code_input
+        self._cancel_completion_request()
+        self._completion_cursor = code.cursor
+        self._completion_job = self.root.code_completion.complete(
+            code.text, code.cursor_row + 1, code.cursor_col, code.path,
+            on_progress=self._on_completion_batch,
+            on_result=self._on_completion_finished)
+
+    def _cancel_completion_request(self):
+        '''Cancel the running completion request, if any
+        '''
+        if self._completion_job is not None:
+            self._completion_job.cancel()
+            self._completion_job = None
+
+    def _on_completion_batch(self, job, completions):
+        '''Callback to a batch of completions received from the worker
+        '''
+        if self.code_input.cursor != self._completion_cursor:
+            # the user kept typing, these completions are outdated
+            self._cancel_completion_request()
+            return
+        if self.is_bubble_visible:
+            self.bubble.add_completions(completions)
+        else:
             self.show_completion(completions)
 
+    def _on_completion_finished(self, job, total):
+        '''Callback to the end of completion request
+        '''
+        self._completion_job = None
+        if not total and not self.is_bubble_visible and \
+                self.code_input.cursor == self._completion_cursor:
+            self.show_completion([])
+
     def on_complete(self, instance, completion):
         '''Add the completion to the current cursor position
         '''
@@ -109,6 +145,7 @@ class PyScrollView(ScrollView):
     def cancel_completion(self, *args):
         '''Event handler to cancel the completion
         '''
+        self._cancel_completion_request()
         if self.bubble.parent is not None:
             self.bubble.show_completions([])
             self.bubble.parent.remove_widget(self.bubble)
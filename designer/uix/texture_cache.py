@@ -0,0 +1,95 @@
+from kivy.clock import Clock
+from kivy.graphics import (
+    ClearBuffers,
+    ClearColor,
+    Color,
+    Fbo,
+    Rectangle,
+    Translate,
+)
+
+
+class WidgetTextureCache(object):
+    '''Replaces the canvas of a widget by a texture of it while its parent is
+       transformed, so moving or zooming the parent draws a single rectangle
+       instead of all the instructions of the widget tree.
+       :param widget: widget to draw in the texture
+       :param delay: seconds without :meth:`hold` calls before the canvas of
+            the widget is drawn again
+    '''
+
+    def __init__(self, widget, delay=0.3):
+        self.widget = widget
+        self._fbo = None
+        self._instructions = None
+        self._canvas_index = -1
+        self._release_trigger = Clock.create_trigger(self.release, delay)
+
+    @property
+    def active(self):
+        '''True while the texture is drawn instead of the widget canvas
+        '''
+        return self._instructions is not None
+
+    def hold(self):
+        '''Draws the texture instead of the widget canvas, until
+           :meth:`hold` is not called for delay seconds
+        '''
+        if not self.active and not self.capture():
+            return
+        self._instructions[1].pos = self.widget.pos
+        self._release_trigger.cancel()
+        self._release_trigger()
+
+    def capture(self):
+        '''Renders the widget in the texture and draws it in place of the
+           widget canvas. Returns False if the widget could not be replaced
+        '''
+        widget = self.widget
+        parent = widget.parent
+        if parent is None or widget.width < 1 or widget.height < 1:
+            return False
+        index = parent.canvas.indexof(widget.canvas)
+        if index < 0:
+            return False
+
+        size = (int(widget.width), int(widget.height))
+        if self._fbo is None or self._fbo.size != size:
+            self._fbo = Fbo(size=size, with_stencilbuffer=True)
+        fbo = self._fbo
+        fbo.clear()
+        with fbo:
+            ClearColor(0, 0, 0, 0)
+            ClearBuffers()
+            Translate(-widget.x, -widget.y, 0)
+        parent.canvas.remove(widget.canvas)
+        fbo.add(widget.canvas)
+        fbo.draw()
+        fbo.remove(widget.canvas)
+
+        color = Color(1, 1, 1, 1)
+        rect = Rectangle(texture=fbo.texture, pos=widget.pos, size=size)
+        parent.canvas.insert(index, rect)
+        parent.canvas.insert(index, color)
+        self._instructions = (color, rect)
+        self._canvas_index = index
+        return True
+
+    def release(self, *args):
+        '''Draws the widget canvas again in place of the texture
+        '''
+        self._release_trigger.cancel()
+        if not self.active:
+            return
+        parent = self.widget.parent
+        color, rect = self._instructions
+        self._instructions = None
+        if parent is None:
+            return
+        index = parent.canvas.indexof(color)
+        if index < 0:
+            index = self._canvas_index
+        parent.canvas.remove(color)
+        parent.canvas.remove(rect)
+        if parent.canvas.indexof(self.widget.canvas) < 0:
+            parent.canvas.insert(index, self.widget.canvas)
@@ -0,0 +1,111 @@
+'''Timeline of the startup of Kivy Designer, enabled with the
+--profile-startup command line option. Records the imports of new modules
+and the construction of the subsystems, and prints the timeline when the
+start page is displayed.
+
+This module must not import Kivy, so it can be enabled before Kivy is
+imported.
+'''
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import builtins
+except ImportError:
+    import __builtin__ as builtins
+
+
+#: Imports faster than this (in seconds) are not displayed
+MIN_IMPORT_TIME = 0.002
+
+enabled = False
+
+_start_time = None
+_events = []  # (start, duration, depth, name)
+_local = threading.local()
+_original_import = None
+
+
+def _depth():
+    return getattr(_local, 'depth', 0)
+
+
+def _timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+    if level == 0 and name in sys.modules:
+        return _original_import(name, globals, locals, fromlist, level)
+    depth = _depth()
+    _local.depth = depth + 1
+    start = time.time()
+    try:
+        return _original_import(name, globals, locals, fromlist, level)
+    finally:
+        _local.depth = depth
+        duration = time.time() - start
+        if duration >= MIN_IMPORT_TIME:
+            _events.append((start, duration, depth,
+                            'import %s%s' % ('.' * level, name)))
+
+
+def enable():
+    '''Start recording the timeline
+    '''
+    global enabled, _start_time, _original_import
+    if enabled:
+        return
+    enabled = True
+    _start_time = time.time()
+    _original_import = builtins.__import__
+    builtins.__import__ = _timed_import
+
+
+def disable():
+    '''Stop recording the timeline
+    '''
+    global enabled
+    if not enabled:
+        return
+    enabled = False
+    builtins.__import__ = _original_import
+
+
+@contextmanager
+def span(name):
+    '''Records the time spent in the block as name
+    '''
+    if not enabled:
+        yield
+        return
+    depth = _depth()
+    _local.depth = depth + 1
+    start = time.time()
+    try:
+        yield
+    finally:
+        _local.depth = depth
+        _events.append((start, time.time() - start, depth, name))
+
+
+def mark(name):
+    '''Records a point of the timeline
+    '''
+    if enabled:
+        _events.append((time.time(), 0, _depth(), name))
+
+
+def report(stream=None):
+    '''Stop recording and print the timeline
+    '''
+    if not enabled:
+        return
+    disable()
+    stream = stream or sys.stderr
+    stream.write('Startup timeline (start, duration):\n')
+    for start, duration, depth, name in sorted(_events,
+                                               key=lambda e: (e[0], e[2])):
+        stream.write('%9.1f ms %8.1f ms  %s%s\n' % (
+            (start - _start_time) * 1000, duration * 1000,
+            '  ' * depth, name))
+    stream.write('Total: %.1f ms\n' % ((time.time() - _start_time) * 1000))
+    del _events[:]
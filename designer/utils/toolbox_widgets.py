@@ -46,3 +46,7 @@ toolbox_widgets = [
     ('StencilView', 'behavior'),
 ]
 
+
+#: Names of the complex widgets, to check the category without looping over
+#: toolbox_widgets
+complex_widgets = frozenset(w[0] for w in toolbox_widgets if w[1] == 'complex')
@@ -0,0 +1,202 @@
+'''Lightweight tracing of the slow paths of Kivy Designer. Spans and counters
+are recorded in a ring buffer and can be exported to the Chrome trace event
+format, to be opened in chrome://tracing or https://ui.perfetto.dev
+
+    with trace.span('Project.parse', files=3):
+        ...
+
+    @trace.traced('WidgetsTree.refresh')
+    def _refresh(self, *args):
+        ...
+
+    # an operation completed in a callback
+    save_span = trace.begin('Project.save')
+    ...
+    save_span.end()
+
+When tracing is disabled, :func:`span` returns a shared no-op context manager
+and :func:`traced` only checks a flag before calling the function.
+
+This module doesn't import Kivy, spans can be recorded from any thread.
+'''
+import json
+import os
+import threading
+import time
+from collections import deque
+from functools import wraps
+
+
+#: Default number of events kept by the ring buffer
+DEFAULT_CAPACITY = 10000
+
+enabled = False
+
+# (phase, name, start, duration, thread id, args)
+_events = deque(maxlen=DEFAULT_CAPACITY)
+_last = {}
+_listeners = []
+_lock = threading.Lock()
+
+
+class _NullSpan(object):
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def end(self):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span(object):
+
+    __slots__ = ('name', 'args', 'start')
+
+    def __init__(self, name, args):
+        self.name = name
+        self.args = args
+        self.start = 0
+
+    def __enter__(self):
+        self.start = time.time()
+        return self
+
+    def __exit__(self, *args):
+        duration = time.time() - self.start
+        _record('X', self.name, self.start, duration, self.args)
+        _last[self.name] = duration
+        for listener in _listeners:
+            listener(self.name, duration)
+        return False
+
+    def end(self):
+        self.__exit__()
+
+
+def _record(phase, name, start, duration, args):
+    with _lock:
+        _events.append((phase, name, start, duration,
+                        threading.current_thread().ident, args))
+
+
+def enable(capacity=None):
+    '''Start recording. capacity is the number of events kept, the oldest
+    events are dropped when the buffer is full
+    '''
+    global enabled, _events
+    capacity = capacity or DEFAULT_CAPACITY
+    if capacity != _events.maxlen:
+        with _lock:
+            _events = deque(_events, maxlen=capacity)
+    enabled = True
+
+
+def disable():
+    '''Stop recording. The recorded events are kept until :func:`clear`
+    '''
+    global enabled
+    enabled = False
+
+
+def clear():
+    '''Drop the recorded events
+    '''
+    with _lock:
+        _events.clear()
+    _last.clear()
+
+
+def span(name, **args):
+    '''Returns a context manager recording the time spent in the block.
+    args are displayed with the span in the trace viewer
+    '''
+    if not enabled:
+        return _NULL_SPAN
+    return _Span(name, args)
+
+
+def begin(name, **args):
+    '''Starts a span, recorded when its end() method is called. Used for
+    operations completed later, in a callback or in another thread
+    '''
+    if not enabled:
+        return _NULL_SPAN
+    return _Span(name, args).__enter__()
+
+
+def traced(name):
+    '''Decorator recording each call of the function as a span
+    '''
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not enabled:
+                return func(*args, **kwargs)
+            with _Span(name, None):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def counter(name, **values):
+    '''Records the values of a counter, displayed as a graph in the trace
+    viewer
+    '''
+    if enabled:
+        _record('C', name, time.time(), 0, values)
+
+
+def last_duration(name):
+    '''Returns the duration in seconds of the last span called name, or None
+    '''
+    return _last.get(name)
+
+
+def add_listener(listener):
+    '''Call listener(name, duration) when a span ends. The listener is called
+    in the thread of the span
+    '''
+    if listener not in _listeners:
+        _listeners.append(listener)
+
+
+def remove_listener(listener):
+    if listener in _listeners:
+        _listeners.remove(listener)
+
+
+def events():
+    '''Returns the recorded events in the Chrome trace event format
+    '''
+    with _lock:
+        recorded = list(_events)
+    pid = os.getpid()
+    result = []
+    for phase, name, start, duration, tid, args in recorded:
+        event = {'name': name, 'ph': phase, 'ts': int(start * 1e6),
+                 'pid': pid, 'tid': tid}
+        if phase == 'X':
+            event['dur'] = int(duration * 1e6)
+        if args:
+            event['args'] = args
+        result.append(event)
+    return result
+
+
+def export(path):
+    '''Write the recorded events to path as a Chrome trace JSON file.
+    Returns the number of events written
+    '''
+    trace_events = events()
+    with open(path, 'w') as f:
+        json.dump({'traceEvents': trace_events, 'displayTimeUnit': 'ms'}, f,
+                  default=str)
+    return len(trace_events)
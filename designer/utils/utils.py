@@ -202,7 +202,7 @@ def ignore_proj_watcher(f):
 
 def get_app_widget(target, **default_args):
     '''Creates a widget instance by it's name and module
-    :param target: instance of designer.project_manager.AppWidget
+    :param target: instance of designer.core.app_widget_registry.AppWidget
     '''
     d = get_designer()
     if target.is_dynamic:
@@ -0,0 +1,204 @@
+'''Background workers used to keep slow operations out of the Kivy main
+   thread. Jobs are executed by daemon threads and their results are
+   delivered back to the main thread through the :class:`~kivy.clock.Clock`.
+'''
+import threading
+import traceback
+from functools import partial
+
+from kivy.clock import Clock
+from kivy.logger import Logger
+from six.moves import queue
+
+
+_local = threading.local()
+
+
+def current_job():
+    '''Returns the :class:`Job` being executed by the calling worker thread,
+    or None if called outside of a worker.
+    '''
+    return getattr(_local, 'job', None)
+
+
+class Job(object):
+    '''A unit of work submitted to a :class:`Worker`.
+    Callbacks are always called in the main thread, with the job as the
+    first argument:
+
+        on_result(job, result)
+        on_error(job, exception)
+        on_progress(job, value)
+
+    A cancelled job is skipped if it has not started yet, and never
+    delivers its callbacks.
+    '''
+
+    def __init__(self, func, args=(), kwargs=None, on_result=None,
+                 on_error=None, on_progress=None, key=None):
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs or {}
+        self.on_result = on_result
+        self.on_error = on_error
+        self.on_progress = on_progress
+        self.key = key
+        self.cancelled = False
+        self.done = False
+        self.result = None
+        self.error = None
+        self._event = threading.Event()
+
+    def cancel(self):
+        '''Cancel the job. Running jobs should check :attr:`cancelled` to
+        stop as soon as possible
+        '''
+        self.cancelled = True
+
+    def emit(self, value):
+        '''Deliver a partial result to on_progress in the main thread.
+        Should be called from the job function.
+        '''
+        if self.cancelled or self.on_progress is None:
+            return
+        Clock.schedule_once(partial(self._deliver, self.on_progress, value))
+
+    def wait(self, timeout=None):
+        '''Blocks until the job is finished. Returns the job result.
+        Useful when there is no Kivy loop running (tests and command line)
+        '''
+        self._event.wait(timeout)
+        return self.result
+
+    def run(self):
+        '''Executes the job function. Called by the worker thread
+        '''
+        if self.cancelled:
+            self._finish()
+            return
+        _local.job = self
+        try:
+            self.result = self.func(*self.args, **self.kwargs)
+        except Exception as e:
+            self.error = e
+            Logger.debug('Worker: job %r failed\n%s' %
+                         (self.func, traceback.format_exc()))
+        finally:
+            _local.job = None
+            self._finish()
+
+        if self.error is not None:
+            if self.on_error is not None:
+                Clock.schedule_once(
+                    partial(self._deliver, self.on_error, self.error))
+        elif self.on_result is not None:
+            Clock.schedule_once(
+                partial(self._deliver, self.on_result, self.result))
+
+    def _finish(self):
+        self.done = True
+        self._event.set()
+
+    def _deliver(self, callback, value, *args):
+        if not self.cancelled:
+            callback(self, value)
+
+
+class Worker(object):
+    '''Executes jobs in background threads. With num_threads == 1 jobs are
+    executed in the order they were submitted.
+    '''
+
+    def __init__(self, name='Worker', num_threads=1):
+        self.name = name
+        self.num_threads = num_threads
+        self._queue = queue.Queue()
+        self._threads = []
+        self._keys = {}
+        self._running = set()
+        self._lock = threading.Lock()
+
+    def _start(self):
+        if self._threads:
+            return
+        for i in range(self.num_threads):
+            t = threading.Thread(target=self._run,
+                                 name='%s-%d' % (self.name, i))
+            t.daemon = True
+            t.start()
+            self._threads.append(t)
+
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                break
+            with self._lock:
+                self._running.add(job)
+            job.run()
+            with self._lock:
+                self._running.discard(job)
+                if job.key is not None and self._keys.get(job.key) is job:
+                    del self._keys[job.key]
+
+    def submit(self, func, *args, **kwargs):
+        '''Schedules func(*args, **kwargs) to run in the worker.
+        The following keyword arguments are reserved:
+
+            on_result, on_error, on_progress: main thread callbacks
+            key: if set, a previous job with the same key is cancelled.
+                 Used to drop superseded requests.
+
+        Returns a :class:`Job`
+        '''
+        on_result = kwargs.pop('on_result', None)
+        on_error = kwargs.pop('on_error', None)
+        on_progress = kwargs.pop('on_progress', None)
+        key = kwargs.pop('key', None)
+        job = Job(func, args, kwargs, on_result=on_result,
+                  on_error=on_error, on_progress=on_progress, key=key)
+        if job.key is not None:
+            with self._lock:
+                previous = self._keys.get(job.key)
+                if previous is not None:
+                    previous.cancel()
+                self._keys[job.key] = job
+        self._start()
+        self._queue.put(job)
+        return job
+
+    def cancel(self, key):
+        '''Cancel the job with the key. Returns True if a pending or running
+        job was cancelled
+        '''
+        with self._lock:
+            job = self._keys.pop(key, None)
+        if job is None or job.done:
+            return False
+        job.cancel()
+        return True
+
+    def cancel_all(self):
+        '''Cancel all pending jobs and the running ones
+        '''
+        with self._lock:
+            self._keys = {}
+            running = list(self._running)
+        for job in running:
+            job.cancel()
+        while True:
+            try:
+                job = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if job is not None:
+                job.cancel()
+                job._finish()
+
+    def stop(self):
+        '''Cancel pending jobs and stop the threads
+        '''
+        self.cancel_all()
+        for t in self._threads:
+            self._queue.put(None)
+        self._threads = []
@@ -0,0 +1,3 @@
+'''Benchmarks of the slow paths of Kivy Designer, run headlessly against
+generated projects. See :mod:`tests.benchmarks.run`
+'''
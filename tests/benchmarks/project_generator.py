@@ -0,0 +1,69 @@
+'''Generates synthetic Kivy projects used by the benchmarks.
+
+A project has py_classes widget classes, declared in widgets.py, and
+kv_files kv files. The classes are distributed over the kv files, and each
+class rule is a tree of BoxLayouts with the given depth, each layout having
+width children. The leaves are Buttons.
+'''
+import os
+
+
+#: Name of the class of the n-th widget
+CLASS_NAME = 'BenchWidget%d'
+
+
+def generate_tree(depth, width, indent=1):
+    '''Returns the kv lines of a tree of BoxLayouts
+    '''
+    prefix = '    ' * indent
+    if depth == 0:
+        return [prefix + 'Button:', prefix + "    text: 'button'"]
+    lines = [prefix + 'BoxLayout:',
+             prefix + "    orientation: '%s'" %
+             ('vertical' if indent % 2 else 'horizontal')]
+    for _ in range(width):
+        lines.extend(generate_tree(depth - 1, width, indent + 1))
+    return lines
+
+
+def generate_py(py_classes):
+    '''Returns the source of widgets.py
+    '''
+    lines = ['from kivy.app import App',
+             'from kivy.uix.boxlayout import BoxLayout',
+             '']
+    for i in range(py_classes):
+        lines.extend(['', 'class %s(BoxLayout):' % (CLASS_NAME % i),
+                      '    pass', ''])
+    lines.extend(['', 'class BenchApp(App):', '    pass', ''])
+    return '\n'.join(lines)
+
+
+def generate_kv(classes, depth, width):
+    '''Returns the source of a kv file with the rules of classes
+    '''
+    lines = []
+    for i in classes:
+        lines.append('<%s>:' % (CLASS_NAME % i))
+        lines.extend(generate_tree(depth, width))
+        lines.append('')
+    return '\n'.join(lines)
+
+
+def generate_project(path, kv_files=10, py_classes=20, depth=3, width=3):
+    '''Writes a synthetic project in the folder path. Returns the list of
+    kv files
+    '''
+    if not os.path.exists(path):
+        os.makedirs(path)
+    with open(os.path.join(path, 'widgets.py'), 'w') as f:
+        f.write(generate_py(py_classes))
+
+    kv_paths = []
+    for n in range(kv_files):
+        kv_path = os.path.join(path, 'bench%d.kv' % n)
+        classes = range(n, py_classes, kv_files)
+        with open(kv_path, 'w') as f:
+            f.write(generate_kv(classes, depth, width))
+        kv_paths.append(kv_path)
+    return kv_paths
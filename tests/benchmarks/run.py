@@ -0,0 +1,311 @@
+'''Runs the benchmarks of the slow paths of Kivy Designer against a generated
+project, and stores the results as JSON to compare them between commits:
+
+    python -m tests.benchmarks.run --output before.json
+    git checkout my-branch
+    python -m tests.benchmarks.run --output after.json --compare before.json
+
+The benchmarks run headlessly, with the minimal stand-in of the Designer of
+:mod:`tests.helpers`.
+'''
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+from timeit import default_timer
+
+# Kivy must not parse the arguments of the benchmarks
+os.environ.setdefault('KIVY_NO_ARGS', '1')
+
+from designer.core.project_manager import Project
+from kivy import __version__ as kivy_version
+from kivy.uix.button import Button
+
+from tests.helpers import (
+    install_designer,
+    open_generated_project,
+    uninstall_designer,
+    unload_kv_files,
+)
+
+
+#: Names of the benchmarks, in the order they run
+BENCHMARKS = (
+    'project_open',
+    'project_parse',
+    'reload_kv',
+    'widgets_tree_refresh',
+    'set_property_value',
+    'add_widget_to_parent',
+    'shift_widget',
+)
+
+#: A benchmark is reported as a regression when its fastest run is slower
+#: than the compared fastest run by this factor. The fastest run is the least
+#: affected by the noise of the machine
+REGRESSION_FACTOR = 1.2
+
+
+def measure(func, repeat, setup=None):
+    '''Returns the durations of repeat calls of func. setup is called before
+    each call, and is not measured
+    '''
+    durations = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = default_timer()
+        func()
+        durations.append(default_timer() - start)
+    return durations
+
+
+def summarize(durations):
+    '''Returns the statistics of a list of durations, in seconds
+    '''
+    durations = sorted(durations)
+    count = len(durations)
+    middle = count // 2
+    if count % 2:
+        median = durations[middle]
+    else:
+        median = (durations[middle - 1] + durations[middle]) / 2.0
+    return {'runs': count, 'min': durations[0], 'max': durations[-1],
+            'median': median, 'mean': sum(durations) / count}
+
+
+class BenchmarkSuite(object):
+    '''Generates a project in path, and times the benchmarked paths on it.
+    The parameters are the ones of
+    :func:`~tests.benchmarks.project_generator.generate_project`
+    '''
+
+    def __init__(self, path, kv_files=10, py_classes=20, depth=3, width=3,
+                 repeat=5):
+        self.path = path
+        self.params = {'kv_files': kv_files, 'py_classes': py_classes,
+                       'depth': depth, 'width': width, 'repeat': repeat}
+        self.repeat = repeat
+        self.designer = None
+        self.project = None
+        self.kv_paths = []
+        self._previous_apps = None
+
+    @property
+    def playground(self):
+        return self.designer.ui_creator.playground
+
+    @property
+    def kv_code_input(self):
+        return self.designer.ui_creator.kv_code_input
+
+    def setup(self):
+        self.designer, self._previous_apps = install_designer()
+        self.project, self.kv_paths = open_generated_project(
+            self.designer, self.path, kv_files=self.params['kv_files'],
+            py_classes=self.params['py_classes'],
+            depth=self.params['depth'], width=self.params['width'])
+        self.kv_text = self.kv_code_input.text
+
+    def teardown(self):
+        self._unload_kv()
+        if self.designer is not None:
+            uninstall_designer(self.designer, self._previous_apps)
+
+    def run(self, names=BENCHMARKS):
+        '''Runs the benchmarks names. Returns a dict name: statistics
+        '''
+        results = {}
+        self.setup()
+        try:
+            for name in names:
+                durations = getattr(self, 'bench_' + name)()
+                results[name] = summarize(durations)
+        finally:
+            self.teardown()
+        return results
+
+    def _unload_kv(self):
+        # parsing a project again loads the rules of its kv files again
+        unload_kv_files(self.kv_paths)
+
+    def _reset_kv_text(self):
+        if self.kv_code_input.text != self.kv_text:
+            self.kv_code_input.text = self.kv_text
+
+    def _tree_layout(self):
+        # the BoxLayout declared in the rule of the displayed widget
+        return self.playground.root.children[0]
+
+    def bench_project_open(self):
+        def open_project():
+            project = Project(path=self.path)
+            self.designer.project_manager.current_project = project
+            project.open()
+
+        durations = measure(open_project, self.repeat, self._unload_kv)
+        self.designer.project_manager.current_project = self.project
+        return durations
+
+    def bench_project_parse(self):
+        return measure(self.project.parse, self.repeat, self._unload_kv)
+
+    def bench_reload_kv(self):
+        return measure(
+            lambda: self.playground.on_reload_kv(self.kv_code_input,
+                                                 self.kv_text, False),
+            self.repeat)
+
+    def bench_widgets_tree_refresh(self):
+        return measure(self.designer.ui_creator.widgets_tree._refresh,
+                       self.repeat)
+
+    def bench_set_property_value(self):
+        widget = self._tree_layout()
+        while widget.children:
+            widget = widget.children[-1]
+        values = iter(range(self.repeat))
+
+        def set_property_value():
+            value = 'bench %d' % next(values)
+            widget.text = value
+            self.kv_code_input.set_property_value(widget, 'text', value,
+                                                  'StringProperty')
+
+        return measure(set_property_value, self.repeat)
+
+    def bench_add_widget_to_parent(self):
+        target = self._tree_layout()
+        added = []
+
+        def setup():
+            for widget in added:
+                target.remove_widget(widget)
+            del added[:]
+            self._reset_kv_text()
+
+        def add_widget():
+            widget = Button(text='added')
+            added.append(widget)
+            self.playground.add_widget_to_parent(
+                widget, target, kv_str="Button:\n    text: 'added'")
+
+        durations = measure(add_widget, self.repeat, setup)
+        setup()
+        return durations
+
+    def bench_shift_widget(self):
+        target = self._tree_layout()
+        widget = target.children[-1]
+        from_index = len(target.children) - 1
+
+        def setup():
+            target.remove_widget(widget)
+            target.add_widget(widget, from_index)
+            self._reset_kv_text()
+            # moves the first widget of the layout to the end
+            target.remove_widget(widget)
+            target.add_widget(widget, 0)
+
+        durations = measure(
+            lambda: self.kv_code_input.shift_widget(widget, from_index),
+            self.repeat, setup)
+        target.remove_widget(widget)
+        target.add_widget(widget, from_index)
+        self._reset_kv_text()
+        return durations
+
+
+def git_commit():
+    '''Returns the commit of the working tree, or None
+    '''
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', 'HEAD'],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            stderr=subprocess.STDOUT).decode('utf-8').strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, previous, factor=REGRESSION_FACTOR):
+    '''Returns a list of (name, min, previous min, ratio, regressed) for the
+    benchmarks of results also in previous
+    '''
+    comparison = []
+    for name in BENCHMARKS:
+        if name not in results or name not in previous:
+            continue
+        fastest = results[name]['min']
+        previous_fastest = previous[name]['min']
+        ratio = fastest / previous_fastest if previous_fastest else 1.0
+        comparison.append((name, fastest, previous_fastest, ratio,
+                           ratio > factor))
+    return comparison
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Benchmarks the slow paths of Kivy Designer')
+    parser.add_argument('--kv-files', type=int, default=10)
+    parser.add_argument('--py-classes', type=int, default=20)
+    parser.add_argument('--depth', type=int, default=3,
+                        help='depth of the widget tree of each rule')
+    parser.add_argument('--width', type=int, default=3,
+                        help='number of children of each layout')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--benchmark', action='append', choices=BENCHMARKS,
+                        help='benchmark to run, all by default')
+    parser.add_argument('--output', help='write the results to this file')
+    parser.add_argument('--compare',
+                        help='results file of a previous run to compare with')
+    parser.add_argument('--threshold', type=float, default=REGRESSION_FACTOR,
+                        help='slowdown factor reported as a regression')
+    args = parser.parse_args(argv)
+
+    path = tempfile.mkdtemp(prefix='kd_bench_')
+    try:
+        suite = BenchmarkSuite(path, args.kv_files, args.py_classes,
+                               args.depth, args.width, args.repeat)
+        results = suite.run(args.benchmark or BENCHMARKS)
+    finally:
+        shutil.rmtree(path, ignore_errors=True)
+
+    for name in BENCHMARKS:
+        if name in results:
+            stats = results[name]
+            print('%-22s median %9.2f ms  min %9.2f ms' % (
+                name, stats['median'] * 1000, stats['min'] * 1000))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'commit': git_commit(),
+                       'python': platform.python_version(),
+                       'kivy': kivy_version,
+                       'params': suite.params,
+                       'results': results}, f, indent=2, sort_keys=True)
+
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)
+        if previous.get('params') != suite.params:
+            print('Warning: the compared results used other parameters')
+        regressed = False
+        print('\nFastest runs compared with %s' % (
+            previous.get('commit') or args.compare))
+        for name, fastest, previous_fastest, ratio, regression in compare(
+                results, previous['results'], args.threshold):
+            regressed = regressed or regression
+            print('%-22s %9.2f ms -> %9.2f ms  x%.2f%s' % (
+                name, previous_fastest * 1000, fastest * 1000, ratio,
+                '  REGRESSION' if regression else ''))
+        return 1 if regressed else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
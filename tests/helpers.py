@@ -0,0 +1,181 @@
+'''
+Helpers shared by the tests and the benchmarks: a minimal stand-in of the
+Designer, with the parts used by the project manager, the playground, the kv
+lang area, the widgets tree and the undo manager, installed as the root of
+an app that is never run.
+'''
+import shutil
+import tempfile
+import unittest
+
+from designer.components.kv_lang_area import KVLangArea
+from designer.components.playground import Playground
+from designer.components.widgets_tree import WidgetsTree
+from designer.core.edit_journal import EditJournal
+from designer.core.project_manager import (
+    Project,
+    ProjectManager,
+    kv_filename,
+)
+from designer.core.project_modules import unload_kv_rules
+from designer.core.undo_manager import UndoManager
+from designer.uix.sandbox import DesignerSandbox
+from designer.utils.worker import Worker
+from kivy.app import App
+from kivy.factory import Factory
+from kivy.lang import global_idmap
+from kivy.uix.treeview import TreeView
+
+from tests.benchmarks.project_generator import CLASS_NAME, generate_project
+
+
+class StubStatusBar(object):
+    '''Status bar of the stand-in. Messages are dropped
+    '''
+
+    def show_message(self, *args, **kwargs):
+        pass
+
+    def update_info(self, *args, **kwargs):
+        pass
+
+
+class StubErrorConsole(object):
+
+    text = ''
+
+
+class StubUICreator(object):
+
+    def __init__(self, playground, kv_code_input, widgets_tree):
+        self.playground = playground
+        self.kv_code_input = kv_code_input
+        self.widgets_tree = widgets_tree
+        self.error_console = StubErrorConsole()
+
+
+class StubDesigner(object):
+    '''Provides the parts of :class:`~designer.app.Designer` used by the
+    tests and the benchmarks
+    '''
+
+    def __init__(self):
+        self.popup = None
+        self.statusbar = StubStatusBar()
+        self.project_manager = ProjectManager()
+        self.undo_manager = UndoManager()
+        self.io_worker = Worker(name='StubDesigner')
+        self.edit_journal = EditJournal(self.io_worker)
+
+        playground = Playground()
+        playground.undo_manager = self.undo_manager
+        playground.sandbox = DesignerSandbox()
+        # newer Kivy versions start the Factory of a sandbox empty, and look
+        # up the classes of the kv rules in it
+        playground.sandbox._context['Factory'].classes.update(
+            Factory.classes)
+        playground.add_widget(playground.sandbox)
+        kv_code_input = KVLangArea(playground=playground)
+        playground.kv_code_input = kv_code_input
+        widgets_tree = WidgetsTree(playground=playground)
+        widgets_tree.tree = TreeView(hide_root=True)
+        playground.widgettree = widgets_tree
+        self.ui_creator = StubUICreator(playground, kv_code_input,
+                                        widgets_tree)
+
+    def close_popup(self, *args):
+        pass
+
+    def close(self):
+        self.io_worker.stop()
+
+
+class StubApp(App):
+    '''Running app of the stand-in, never run
+    '''
+
+    def focus_widget(self, widget, *args):
+        pass
+
+
+def _set_kv_app(app):
+    '''Sets the app used by the kv rules. Kivy keeps the first running app
+    it finds in a proxy
+    '''
+    proxy = global_idmap['app']
+    previous = object.__getattribute__(proxy, '_obj')
+    object.__setattr__(proxy, '_obj', app)
+    return previous
+
+
+def install_designer():
+    '''Sets a :class:`StubApp` with a :class:`StubDesigner` root as the
+    running app. Returns (designer, previous apps), to be given to
+    :func:`uninstall_designer`
+    '''
+    app = StubApp()
+    previous_apps = (App._running_app, _set_kv_app(app))
+    App._running_app = app
+    app.root = StubDesigner()
+    return app.root, previous_apps
+
+
+def uninstall_designer(designer, previous_apps):
+    '''Stops designer and sets the previous apps back
+    '''
+    designer.close()
+    App._running_app, kv_app = previous_apps
+    _set_kv_app(kv_app)
+
+
+def open_generated_project(designer, path, **params):
+    '''Generates a project in path, with the parameters of
+    :func:`~tests.benchmarks.project_generator.generate_project`, opens it
+    and displays its first widget in the playground.
+    Returns (project, list of kv files)
+    '''
+    kv_paths = generate_project(path, **params)
+    project = Project(path=path)
+    designer.project_manager.current_project = project
+    project.open()
+    designer.ui_creator.playground.load_widget(CLASS_NAME % 0)
+    return project, kv_paths
+
+
+def unload_kv_files(kv_paths):
+    '''Unloads the rules of the kv files, loaded again by each parse
+    '''
+    for kv_path in kv_paths:
+        unload_kv_rules(kv_filename(kv_path))
+
+
+class DesignerTestCase(unittest.TestCase):
+    '''Runs each test with a :class:`StubDesigner` and a temporary directory
+    :data:`dir`
+    '''
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.designer, self._previous_apps = install_designer()
+        self.project = None
+        self.kv_paths = []
+
+    def tearDown(self):
+        unload_kv_files(self.kv_paths)
+        uninstall_designer(self.designer, self._previous_apps)
+        shutil.rmtree(self.dir)
+
+    @property
+    def playground(self):
+        return self.designer.ui_creator.playground
+
+    @property
+    def kv_code_input(self):
+        return self.designer.ui_creator.kv_code_input
+
+    def open_project(self, **params):
+        '''Opens a generated project, see :func:`open_generated_project`
+        '''
+        self.project, self.kv_paths = open_generated_project(
+            self.designer, self.dir, **params)
+        return self.project
@@ -0,0 +1,64 @@
+'''
+File responsible for testing the registry of project widgets
+'''
+import unittest
+
+from nose.tools import assert_equal
+
+from designer.core.app_widget_registry import (
+    CLASS,
+    DYNAMIC,
+    ROOT,
+    AppWidgetRegistry,
+)
+
+
+class AppWidgetRegistryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.changes = []
+        self.registry = AppWidgetRegistry(on_change=self.changes.append)
+
+    def names(self, records):
+        return [r.name for r in records]
+
+    def test_indexes(self):
+        r = self.registry
+        r.update('Root', kv_path='main.kv', is_root=True)
+        r.update('Item', py_path='main.py', module_name='main')
+        r.update('Item', kv_path='main.kv')
+        r.update('Label@Button', kv_path='other.kv', is_dynamic=True)
+        assert_equal(r.keys(), ['Root', 'Item', 'Label@Button'])
+        assert_equal(r['Item'].module_name, 'main')
+        assert_equal(self.names(r.by_file('main.kv')), ['Root', 'Item'])
+        assert_equal(self.names(r.by_file('main.py')), ['Item'])
+        assert_equal(self.names(r.by_kind(ROOT)), ['Root'])
+        assert_equal(self.names(r.by_kind(DYNAMIC)), ['Label@Button'])
+        assert_equal(self.names(r.by_kind(CLASS)), ['Item'])
+
+        r.update('Item', kv_path='other.kv')
+        assert_equal(self.names(r.by_file('main.kv')), ['Root'])
+        del r['Label@Button']
+        assert_equal(self.names(r.by_file('other.kv')), ['Item'])
+        assert_equal(r.by_kind(DYNAMIC), [])
+        assert_equal(len(r), 2)
+
+    def test_batch(self):
+        r = self.registry
+        with r.batch():
+            r.update('A')
+            with r.batch():
+                r.update('B')
+            r.clear()
+            r.update('C')
+        assert_equal(len(self.changes), 1)
+        with r.batch():
+            pass
+        assert_equal(len(self.changes), 1)
+        r.update('D')
+        assert_equal(len(self.changes), 2)
+        assert_equal(r.keys(), ['C', 'D'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+'''
+File responsible for testing the benchmark harness on a small project
+'''
+import os
+import shutil
+import tempfile
+import unittest
+
+from nose.tools import assert_equal
+
+from tests.benchmarks.project_generator import generate_project
+from tests.benchmarks.run import BENCHMARKS, BenchmarkSuite, compare
+
+
+class BenchmarksTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_generate_project(self):
+        kv_paths = generate_project(self.dir, kv_files=2, py_classes=3,
+                                    depth=2, width=2)
+        assert_equal(sorted(os.listdir(self.dir)),
+                     ['bench0.kv', 'bench1.kv', 'widgets.py'])
+        with open(kv_paths[0]) as f:
+            kv = f.read()
+        assert_equal(kv.count('<BenchWidget'), 2)
+        assert_equal(kv.count('Button:'), 8)
+
+    def test_run(self):
+        suite = BenchmarkSuite(self.dir, kv_files=2, py_classes=2, depth=2,
+                               width=2, repeat=2)
+        results = suite.run()
+        assert_equal(sorted(results), sorted(BENCHMARKS))
+        for stats in results.values():
+            assert_equal(stats['runs'], 2)
+
+        slower = dict((name, dict(stats, min=stats['min'] * 2))
+                      for name, stats in results.items())
+        regressions = [c[0] for c in compare(slower, results) if c[-1]]
+        assert_equal(sorted(regressions), sorted(BENCHMARKS))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+'''
+File responsible for testing the completions computed in background
+'''
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+
+from nose.tools import assert_equal
+
+from designer.core.completion import CodeCompletion
+
+
+class CodeCompletionTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.py = os.path.join(self.dir, 'main.py')
+        with open(self.py, 'w') as f:
+            f.write('import os\nimport json\nimport not_a_module\n')
+        self.completion = CodeCompletion()
+
+    def tearDown(self):
+        self.completion.worker.stop()
+        shutil.rmtree(self.dir)
+
+    def test_complete(self):
+        job = self.completion.complete('import os\nos.pat', 2, 6)
+        assert job.wait(30) > 0
+
+    def test_prewarm(self):
+        block = threading.Event()
+        self.completion.worker.submit(block.wait, 5)
+        prewarm = self.completion.load_project(self.dir, [self.py])
+        job = self.completion.complete('import os\nos.pat', 2, 6)
+        # the completion is not queued behind the prewarming
+        assert_equal(prewarm.cancelled, True)
+        block.set()
+        assert job.wait(30) > 0
+        state = self.completion._prewarm_state
+        assert_equal(state.project_path, self.dir)
+        for _ in range(300):
+            if len(state.done) == 3:
+                break
+            time.sleep(0.1)
+        assert_equal(state.done, set(['json', 'not_a_module', 'os']))
+
+        self.completion.unload_project()
+        assert_equal(self.completion._prewarm_state, None)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,166 @@
+'''
+File responsible for testing the edit journal used to recover unsaved changes
+'''
+import os
+import shutil
+import tempfile
+import unittest
+
+from nose.tools import assert_equal
+
+from designer.core.edit_journal import (
+    JOURNAL_FILE,
+    EditJournal,
+    apply_edit,
+    compact,
+    merge_edits,
+    read_entries,
+    recover_files,
+    text_delta,
+)
+from designer.core.undo_manager import OperationBase, UndoManager
+from designer.utils.worker import Worker
+from kivy.event import EventDispatcher
+from kivy.properties import StringProperty
+
+from tests.helpers import install_designer, uninstall_designer
+
+
+class FakeCodeInput(EventDispatcher):
+    text = StringProperty('')
+    path = StringProperty('')
+
+
+class TextOperation(OperationBase):
+
+    def __init__(self, code, old_text, new_text):
+        super(TextOperation, self).__init__('text')
+        self.code = code
+        self.old_text = old_text
+        self.new_text = new_text
+
+    def do_undo(self):
+        self.code.text = self.old_text
+
+    def do_redo(self):
+        self.code.text = self.new_text
+
+
+class TextDeltaTest(unittest.TestCase):
+
+    def test_delta(self):
+        for old, new in (('abc', 'abxc'), ('abc', 'ac'), ('abc', 'abc'),
+                         ('', 'new'), ('aaa', 'aaaa'), ('abc', 'xyz')):
+            delta = text_delta(old, new)
+            assert_equal(apply_edit(old, delta), new)
+        assert_equal(text_delta('abc', 'abxc'), (2, 2, 'x'))
+        assert_equal(text_delta('abc', 'ac'), (1, 2, ''))
+
+    def test_merge(self):
+        text = 'hello world'
+        edits = [(5, 5, ','), (6, 6, ' big'), (9, 10, ''), (0, 1, 'H')]
+        expected = text
+        for edit in edits:
+            expected = apply_edit(expected, edit)
+        merged = [edits[0]]
+        for edit in edits[1:]:
+            result = merge_edits(merged[-1], edit)
+            if result is None:
+                merged.append(edit)
+            else:
+                merged[-1] = result
+        assert_equal(len(merged), 2)
+        for edit in merged:
+            text = apply_edit(text, edit)
+        assert_equal(text, expected)
+
+    def test_compact(self):
+        entries = [
+            {'op': 'open', 'path': 'a.py', 'hash': 'old'},
+            {'op': 'edit', 'path': 'a.py', 'start': 0, 'end': 0, 'text': 'x'},
+            {'op': 'open', 'path': 'a.py', 'hash': 'h'},
+            {'op': 'edit', 'path': 'a.py', 'start': 0, 'end': 0, 'text': 'a'},
+            {'op': 'edit', 'path': 'a.py', 'start': 1, 'end': 1, 'text': 'b'},
+            {'op': 'undo', 'type': 'widget'},
+            {'op': 'open', 'path': 'b.py', 'hash': 'h'},
+        ]
+        assert_equal(compact(entries), [
+            {'op': 'open', 'path': 'a.py', 'hash': 'h'},
+            {'op': 'edit', 'path': 'a.py', 'start': 0, 'end': 0,
+             'text': 'ab'}])
+
+
+class EditJournalTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, 'main.py')
+        with open(self.path, 'w') as f:
+            f.write('import os\n')
+        self.journal = EditJournal(Worker('JournalTest'))
+
+    def tearDown(self):
+        self.journal.close()
+        self.journal.worker.stop()
+        shutil.rmtree(self.dir)
+
+    def test_recover(self):
+        journal = self.journal
+        assert_equal(journal.open(self.dir), False)
+        code = FakeCodeInput(path=self.path, text='import os\n')
+        journal.track(code)
+        code.text = 'import os\nimport sys\n'
+        code.text = 'import os\nimport re\n'
+        # simulates a crash: the journal is not discarded
+        journal._file.close()
+        journal._file = None
+
+        assert_equal(journal.open(self.dir), True)
+        assert_equal(
+            recover_files(self.dir, journal.recover_path),
+            {self.path: 'import os\nimport re\n'})
+        journal.discard_recovery()
+        assert_equal(os.path.exists(journal.recover_path), False)
+
+    def test_recover_undo(self):
+        journal = self.journal
+        journal.open(self.dir)
+        code = FakeCodeInput(path=self.path, text='import os\n')
+        journal.track(code)
+        # the UndoManager marks the current project as modified
+        self.addCleanup(uninstall_designer, *install_designer())
+        undo_manager = UndoManager()
+        code.text = 'import os\nimport re\n'
+        undo_manager.push_operation(TextOperation(code, 'import os\n',
+                                                  code.text))
+        undo_manager.do_undo()
+        journal._file.close()
+        journal._file = None
+
+        journal.open(self.dir)
+        # the undone text is not recovered
+        assert_equal(recover_files(self.dir, journal.recover_path),
+                     {self.path: 'import os\n'})
+
+    def test_untracked(self):
+        journal = self.journal
+        journal.open(self.dir)
+        code = FakeCodeInput(path=self.path, text='import os\n')
+        journal.track(code)
+        journal.untrack(code)
+        code.text = 'changed'
+        assert_equal(read_entries(os.path.join(self.dir, JOURNAL_FILE)), [])
+
+    def test_close_discards(self):
+        journal = self.journal
+        journal.open(self.dir)
+        code = FakeCodeInput(path=self.path, text='import os\n')
+        journal.track(code)
+        code.text = 'changed'
+        journal.close()
+        assert_equal(os.path.exists(os.path.join(self.dir, JOURNAL_FILE)),
+                     False)
+
+
+if __name__ == '__main__':
+    unittest.main()
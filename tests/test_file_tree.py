@@ -0,0 +1,46 @@
+'''
+File responsible for testing the FileTree used by the Project Tree
+'''
+import os
+import unittest
+
+from nose.tools import assert_equal
+
+from designer.core.file_tree import FileTree
+
+
+ROOT = os.path.join(os.sep, 'project')
+
+
+def path(*components):
+    return os.path.join(ROOT, *components)
+
+
+class FileTreeTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tree = FileTree()
+        self.tree.reset(ROOT, [path('main.py'), path('lib', 'b.py'),
+                               path('lib', 'a.kv'), path('lib', 'sub', 'c')])
+
+    def _names(self):
+        return [n.name for n in self.tree.rows()]
+
+    def test_rows(self):
+        assert_equal(len(self.tree), 6)
+        assert_equal(self._names(), ['project', 'lib', 'main.py'])
+        self.tree.set_open(self.tree.get(path('lib')), True)
+        assert_equal(self._names(), ['project', 'lib', 'sub', 'a.kv', 'b.py',
+                                     'main.py'])
+        assert_equal(self.tree.get(path('lib', 'a.kv')).depth, 2)
+
+    def test_add_remove(self):
+        assert_equal(self.tree.add_file(path('main.py')), None)
+        assert_equal(self.tree.add_file(os.path.join(os.sep, 'other')), None)
+        self.tree.add_file(path('a.py'))
+        assert_equal(self._names(), ['project', 'lib', 'a.py', 'main.py'])
+        self.tree.remove(path('lib', 'sub', 'c'))
+        assert_equal(path('lib', 'sub') in self.tree, False)
+        self.tree.remove(path('lib'))
+        assert_equal(self._names(), ['project', 'a.py', 'main.py'])
+        assert_equal(len(self.tree), 2)
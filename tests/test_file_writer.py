@@ -0,0 +1,76 @@
+'''
+File responsible for testing the atomic writes used to save the project
+'''
+import os
+import shutil
+import tempfile
+import unittest
+
+from nose.tools import assert_equal
+
+from designer.core.file_writer import (
+    TEMP_EXT,
+    atomic_write,
+    content_hash,
+    encode_text,
+    file_hash,
+    write_files,
+)
+
+
+class FileWriterTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, 'main.py')
+        with open(self.path, 'wb') as f:
+            f.write(encode_text(u'old\n'))
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def _read(self):
+        with open(self.path, 'rb') as f:
+            return f.read()
+
+    def test_atomic_write(self):
+        os.chmod(self.path, 0o640)
+        atomic_write(self.path, b'new')
+        assert_equal(self._read(), b'new')
+        assert_equal(os.stat(self.path).st_mode & 0o777, 0o640)
+        assert_equal(os.listdir(self.dir), ['main.py'])
+
+    def test_write_changed(self):
+        calls = []
+        hashes, written = write_files(
+            [(self.path, u'new\n')],
+            on_write=lambda path, digest: calls.append((path, digest)))
+        digest = content_hash(encode_text(u'new\n'))
+        assert_equal(written, [self.path])
+        assert_equal(hashes, {self.path: digest})
+        assert_equal(calls, [(self.path, digest)])
+        assert_equal(file_hash(self.path), digest)
+        assert_equal([f for f in os.listdir(self.dir) if f.endswith(TEMP_EXT)],
+                     [])
+
+    def test_skip_unchanged(self):
+        hashes, written = write_files([(self.path, u'old\n')])
+        assert_equal(written, [])
+        hashes, written = write_files([(self.path, u'new\n')])
+        assert_equal(written, [self.path])
+
+    def test_modified_on_disk(self):
+        write_files([(self.path, u'new\n')])
+        # modified by another program since the last save
+        with open(self.path, 'wb') as f:
+            f.write(b'other\n')
+        hashes, written = write_files([(self.path, u'new\n')])
+        assert_equal(written, [self.path])
+        assert_equal(self._read(), encode_text(u'new\n'))
+
+    def test_file_hash_missing(self):
+        assert_equal(file_hash(os.path.join(self.dir, 'missing')), None)
+
+
+if __name__ == '__main__':
+    unittest.main()
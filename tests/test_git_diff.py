@@ -0,0 +1,27 @@
+'''
+File responsible for testing the lazy git diff helpers
+'''
+import unittest
+
+from nose.tools import assert_equal
+
+from designer.core.git_diff import DiffFile, DiffPager, parse_numstat
+
+
+class GitDiffTest(unittest.TestCase):
+
+    def test_parse_numstat(self):
+        files = parse_numstat('3\t1\tmain.py\0-\t-\timage.png\0'
+                              '2\t0\t\0old.kv\0new.kv\0')
+        assert_equal(files, [DiffFile('main.py', 3, 1, None),
+                             DiffFile('image.png', None, None, None),
+                             DiffFile('new.kv', 2, 0, 'old.kv')])
+
+    def test_pager(self):
+        pager = DiffPager('\n'.join(str(i) for i in range(25)), 10)
+        assert_equal(pager.next_page().splitlines()[-1], '9')
+        assert_equal(pager.remaining, 15)
+        pager.next_page()
+        assert_equal(pager.next_page(), '20\n21\n22\n23\n24')
+        assert_equal(pager.remaining, 0)
+        assert_equal(pager.next_page(), '')
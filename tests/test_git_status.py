@@ -0,0 +1,37 @@
+'''
+File responsible for testing the git status parser
+'''
+import unittest
+
+from nose.tools import assert_equal
+
+from designer.core.git_status import merge_status, parse_status
+
+
+class GitStatusTest(unittest.TestCase):
+
+    def test_parse_status(self):
+        status = parse_status('## master...origin/master [ahead 2, behind 1]'
+                              '\0 M main.py\0A  new.kv\0R  b.py\0a.py\0'
+                              '?? other file.txt\0')
+        assert_equal((status.branch, status.tracking, status.ahead,
+                      status.behind), ('master', 'origin/master', 2, 1))
+        assert_equal(status.modified, ['main.py'])
+        assert_equal(status.staged, ['b.py', 'new.kv'])
+        assert_equal(status.untracked, ['other file.txt'])
+        assert_equal(status.is_dirty, True)
+        assert_equal(status.description, 'master +2 -1')
+
+    def test_clean(self):
+        status = parse_status('## No commits yet on master\0?? a.py\0')
+        assert_equal(status.branch, 'master')
+        assert_equal(status.tracking, None)
+        assert_equal(status.is_dirty, False)
+
+    def test_merge_status(self):
+        status = parse_status('## master\0 M a.py\0?? lib/b.py\0'
+                              '?? lib/c.py\0 M d.kv\0')
+        update = parse_status('## master [ahead 1]\0A  lib/c.py\0')
+        status = merge_status(status, update, ['lib', 'a.py'])
+        assert_equal(status.files, {'lib/c.py': 'A ', 'd.kv': ' M'})
+        assert_equal(status.ahead, 1)
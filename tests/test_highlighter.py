@@ -0,0 +1,71 @@
+'''
+File responsible for testing the incremental LineHighlighter
+'''
+import unittest
+
+from nose.tools import assert_equal
+from pygments.formatters import BBCodeFormatter
+from pygments.lexers import PythonLexer
+
+from designer.core.highlighter import LineHighlighter
+
+
+SOURCE = '''import os
+
+
+def foo(a):
+    """Docstring
+    with [brackets]
+    """
+    return os.path.join(a, '[b]')
+'''.splitlines()
+
+
+class LineHighlighterTest(unittest.TestCase):
+
+    def setUp(self):
+        self.formatter = BBCodeFormatter()
+        self.lexer = PythonLexer()
+
+    def _new_highlighter(self, lines, lines_per_step=200):
+        hl = LineHighlighter(self.lexer, self.formatter, '#000000', 4,
+                             lines_per_step=lines_per_step)
+        hl.reset(lines)
+        return hl
+
+    def _assert_same_markup(self, hl):
+        ref = self._new_highlighter(hl.lines)
+        for row in range(len(hl.lines)):
+            assert_equal(hl.markup(row), ref.markup(row))
+
+    def test_brackets(self):
+        hl = self._new_highlighter(SOURCE)
+        assert_equal('[brackets]' in hl.markup(5), False)
+        assert_equal('&bl;brackets&br;' in hl.markup(5), True)
+
+    def test_state_propagation(self):
+        hl = self._new_highlighter(SOURCE)
+        docstring = hl.markup(5)
+        # removes the docstring opening, the next lines are code now
+        changed = hl.splice(4, 5, ['    Docstring'])
+        assert_equal(5 in changed, True)
+        assert_equal(hl.markup(5) != docstring, True)
+        self._assert_same_markup(hl)
+
+    def test_resume(self):
+        lines = SOURCE * 50
+        hl = self._new_highlighter(lines, lines_per_step=10)
+        hl.splice(0, 0, ['"""'])
+        assert_equal(hl.pending, True)
+        while hl.pending:
+            hl.resume()
+        self._assert_same_markup(hl)
+
+    def test_update(self):
+        hl = self._new_highlighter(SOURCE)
+        lines = list(SOURCE)
+        lines[7] = '    return a'
+        lines.insert(1, 'import sys')
+        hl.update(lines)
+        assert_equal(hl.lines, lines)
+        self._assert_same_markup(hl)
@@ -0,0 +1,68 @@
+'''
+File responsible for testing the loading of the project python files in the
+introspection worker process
+'''
+import multiprocessing
+import os
+import shutil
+import tempfile
+import unittest
+
+from nose.tools import assert_equal
+
+from designer.core import introspection
+from designer.core.introspection import IntrospectionWorker
+from designer.core.project_manager import py_module_name
+
+FILES = {
+    'main.py': 'from kivy.uix.boxlayout import BoxLayout\n\n\n'
+               'class Root(BoxLayout):\n    pass\n\n\n'
+               'class Data(object):\n    pass\n',
+    'broken.py': 'raise ValueError("broken")\n',
+    # the calls at the module level are removed, not the assignments
+    'crash.py': 'import os\nexit_code = os._exit(1)\n',
+    'slow.py': 'import time\nslept = time.sleep(30)\n',
+}
+
+
+class IntrospectionTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        for name, content in FILES.items():
+            with open(os.path.join(self.dir, name), 'w') as f:
+                f.write(content)
+        self.worker = IntrospectionWorker(timeout=2)
+
+    def tearDown(self):
+        self.worker.stop()
+        shutil.rmtree(self.dir)
+
+    def introspect(self, *names):
+        paths = [os.path.join(self.dir, name) for name in names]
+        return self.worker.introspect(self.dir, paths)
+
+    def test_introspect(self):
+        main, broken = self.introspect('main.py', 'broken.py')
+        assert_equal(main['module_name'],
+                     py_module_name(self.dir, main['path']))
+        assert main['module_name'].endswith('Main')
+        assert_equal(main['widgets'], ['Root'])
+        assert_equal(main['error'], None)
+        assert_equal(broken['error'], 'broken')
+        assert_equal(self.worker.running, True)
+
+    def test_restart(self):
+        crash, slow, main = self.introspect('crash.py', 'slow.py', 'main.py')
+        assert crash['error'].startswith('The designer worker process')
+        assert_equal(slow['error'], 'slow.py took more than 2 seconds to load')
+        assert_equal(main['widgets'], ['Root'])
+
+    def test_spawn(self):
+        # the designer process is not forked from the io worker thread
+        if hasattr(multiprocessing, 'get_context'):
+            assert_equal(introspection._context.get_start_method(), 'spawn')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+'''
+File responsible for testing the MappedFile used to display large files
+'''
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+from nose.tools import assert_equal
+
+from designer.core.mapped_file import MappedFile
+
+
+class MappedFileTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.files = []
+
+    def tearDown(self):
+        for f in self.files:
+            f.close()
+        shutil.rmtree(self.dir)
+
+    def _open(self, data):
+        path = os.path.join(self.dir, 'file.txt')
+        with open(path, 'wb') as f:
+            f.write(data)
+        mapped = MappedFile(path)
+        self.files.append(mapped)
+        return mapped
+
+    def test_lines(self):
+        mapped = self._open(b'first\r\nsecond\n\nlast\n')
+        assert_equal(mapped.build_index(), 4)
+        assert_equal(mapped.line(0), u'first')
+        assert_equal(mapped.line(1), u'second')
+        assert_equal(mapped.line(2), u'')
+        assert_equal(mapped.line(3), u'last')
+
+    def test_without_last_line_break(self):
+        mapped = self._open(u'a\n\xe9t\xe9'.encode('utf-8'))
+        assert_equal(mapped.build_index(), 2)
+        assert_equal(mapped.line(1), u'\xe9t\xe9')
+
+    def test_long_line(self):
+        mapped = self._open(b'x' * 100 + b'\nend')
+        mapped.build_index()
+        assert_equal(mapped.line(0, max_bytes=10), u'x' * 10)
+        assert_equal(mapped.line(1), u'end')
+
+    def test_close_while_indexing(self):
+        mapped = self._open(b'line\n' * 500000)
+        thread = threading.Thread(target=mapped.build_index)
+        thread.start()
+        mapped.close()
+        thread.join()
+        assert_equal(mapped.closed, True)
+        assert_equal(mapped.build_index(), 0)
+
+    def test_empty(self):
+        mapped = self._open(b'')
+        assert_equal(mapped.build_index(), 1)
+        assert_equal(mapped.line(0), u'')
+
+
+if __name__ == '__main__':
+    unittest.main()
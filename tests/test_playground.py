@@ -2,7 +2,27 @@ import unittest
 
 from nose.tools import assert_equal
 
-from designer.components.playground import Playground
+from designer.components.playground import Playground, PlaygroundDragElement
+from kivy.factory import Factory
+from kivy.lang import Builder
+
+from tests.benchmarks.project_generator import CLASS_NAME
+from tests.helpers import DesignerTestCase
+
+
+def layout_tree(widget):
+    for child in widget.walk(restrict=True):
+        if hasattr(child, 'do_layout'):
+            child.do_layout()
+
+
+class MoveTouch(object):
+
+    def __init__(self, pos):
+        self.pos = self.x, self.y = pos
+
+    def ungrab(self, widget):
+        self.grab_current = None
 
 
 class PlaygroundTest(unittest.TestCase):
@@ -23,3 +43,118 @@ class PlaygroundTest(unittest.TestCase):
         ]
         for t in tests:
             assert_equal(g(t[0], t[1]), t[2])
+
+    def test_cache_texture(self):
+        self.play.sandbox = Factory.FloatLayout()
+        self.play.add_widget(self.play.sandbox)
+        self.play.sandbox.add_widget(Factory.Button())
+        self.play.scale = 0.5
+        assert_equal(self.play.texture_cache.active, False)
+        self.play.cache_texture = True
+        self.play.scale = 0.75
+        assert_equal(self.play.texture_cache.active, True)
+        self.play.cache_texture = False
+        assert_equal(self.play.texture_cache.active, False)
+
+
+class ToolboxWidgetPoolTest(DesignerTestCase):
+
+    def test_take(self):
+        pool = self.playground.widget_pool
+        widget, child = pool.take('Button')
+        assert_equal(widget._KD_KV_STR, "Button:\n    text: 'Button'")
+        assert_equal(child.size_hint, [None, None])
+        pool.refill()
+        pooled = pool.take('Button')
+        assert pooled[0] is not widget
+        pool.refill()
+        assert pool.take('Button')[0] is not pooled[0]
+
+    def test_project_rules(self):
+        pool = self.playground.widget_pool
+        pool.take('Button')
+        pool.refill()
+        Builder.load_string('<Button>:\n    font_size: 33\n',
+                            filename='kd_test_rules.kv')
+        self.addCleanup(Builder.unload_file, 'kd_test_rules.kv')
+        self.designer.project_manager.current_project.rules_revision += 1
+        # the pooled instance was created without the rule
+        assert_equal(pool.take('Button')[0].font_size, 33)
+        pool.refill()
+        assert_equal(pool.take('Button')[0].font_size, 33)
+
+
+class PlaygroundRootCacheTest(DesignerTestCase):
+
+    def setUp(self):
+        super(PlaygroundRootCacheTest, self).setUp()
+        self.open_project(kv_files=2, py_classes=2, depth=1, width=1)
+        self.play = self.playground
+
+    def show(self, n):
+        self.play._perform_load_widget(CLASS_NAME % n)
+        return self.play.root
+
+    def test_switch_roots(self):
+        root0 = self.play.root
+        root1 = self.show(1)
+        assert self.show(0) is root0
+        assert self.show(1) is root1
+
+        # the rules changed, the cached roots are outdated
+        kv_path = self.kv_paths[1]
+        self.project.parse_kv(self.kv_code_input.text + '\n<Label>:\n',
+                              kv_path)
+        assert self.show(0) is not root0
+
+        self.play.root_cache_size = 0
+        root0 = self.play.root
+        self.show(1)
+        assert self.show(0) is not root0
+
+
+class PlaygroundDragTest(DesignerTestCase):
+
+    def setUp(self):
+        super(PlaygroundDragTest, self).setUp()
+        self.open_project(kv_files=1, py_classes=1, depth=2, width=3)
+        self.play = self.playground
+        self.play.root.size = 400, 300
+        layout_tree(self.play.root)
+        self.drag = PlaygroundDragElement(playground=self.play,
+                                          widget=Factory.Button())
+
+    def test_drop_zones(self):
+        root = self.play.root
+        assert_equal(len(self.play.drop_zones(self.drag.widget)), 5)
+        for x in range(int(root.x) - 10, int(root.right) + 10, 7):
+            for y in range(int(root.y) - 10, int(root.top) + 10, 7):
+                pos = root.to_window(x, y)
+                assert self.drag.find_playground_target(*pos) is \
+                    self.play.try_place_widget(self.drag.widget, *pos)
+
+    def test_coalesced_moves(self):
+        for pos in ((10, 10), (20, 20), (30, 30)):
+            touch = MoveTouch(pos)
+            touch.grab_current = self.drag
+            assert_equal(self.drag.on_touch_move(touch), True)
+        self.drag._move_trigger.cancel()
+        # the moves of the frame are processed once, with the last position
+        assert self.drag._move_touch is touch
+        self.drag._perform_move()
+        assert_equal(self.drag.center_x, 30)
+        assert_equal(self.drag._move_touch, None)
+
+    def test_drop_pending_move(self):
+        root = self.play.root
+        # the rules of designer.kv, when loaded, move the playground
+        self.play.pos = 0, 0
+        self.play.size = 800, 600
+        touch = MoveTouch(root.to_window(*root.center))
+        touch.grab_current = self.drag
+        self.drag.on_touch_move(touch)
+        # released in the same frame: the pending move sets the target
+        self.drag.on_touch_up(touch)
+        assert_equal(self.drag._move_touch, None)
+        assert self.drag.widget.parent is not None
+        assert self.drag.widget in list(root.walk(restrict=True))
@@ -0,0 +1,80 @@
+'''
+File responsible for testing the previews of the playground root at several
+sizes
+'''
+import unittest
+
+from nose.tools import assert_equal
+
+from designer.components.playground_preview import PreviewRenderer
+
+from tests.benchmarks.project_generator import CLASS_NAME
+from tests.helpers import DesignerTestCase
+
+
+class PreviewRendererTest(DesignerTestCase):
+
+    def setUp(self):
+        super(PreviewRendererTest, self).setUp()
+        self.open_project(kv_files=1, py_classes=1, depth=1, width=2)
+        self.renderer = PreviewRenderer(
+            budget=10, playground=self.playground,
+            sizes=[(200, 100), (100, 200)])
+        self.rendered = []
+        self.renderer.bind(on_preview=lambda renderer, preview:
+                           self.rendered.append(preview.size))
+
+    def render(self):
+        del self.rendered[:]
+        self.renderer.update()
+        self.renderer.render()
+        return self.rendered
+
+    def test_render(self):
+        assert_equal(self.render(), [(200, 100), (100, 200)])
+        preview = self.renderer.previews[(100, 200)]
+        assert_equal(preview.texture.size, (100, 200))
+        assert_equal(preview.widget.size, [100, 200])
+        assert preview.widget is not self.playground.root
+        assert_equal(self.render(), [])
+
+        # only the sizes drawn differently are rendered again
+        kv = self.kv_code_input.text.replace(
+            '<%s>:' % (CLASS_NAME % 0),
+            '<%s>:\n    opacity: 1 if self.width > 150 else 0.5' %
+            (CLASS_NAME % 0))
+        self.kv_code_input.text = kv
+        self.project.parse_kv(kv, self.kv_paths[0])
+        assert_equal(self.render(), [(100, 200)])
+        assert_equal(self.renderer.previews[(100, 200)].widget.opacity, 0.5)
+
+        self.renderer.sizes = [(100, 200), (300, 300)]
+        assert_equal(self.render(), [(300, 300)])
+        assert_equal(sorted(self.renderer.previews), [(100, 200), (300, 300)])
+
+    def edit_rule(self, lines):
+        name = '<%s>:' % (CLASS_NAME % 0)
+        kv = self.kv_code_input.text.replace(
+            name, '\n'.join([name] + ['    ' + line for line in lines]))
+        self.kv_code_input.text = kv
+        self.project.parse_kv(kv, self.kv_paths[0])
+
+    def test_canvas_edit(self):
+        self.render()
+        # the canvas instructions change, not the widget properties
+        for canvas in ('canvas', 'canvas.before'):
+            self.edit_rule([canvas + ':',
+                            '    Color:',
+                            '        rgba: 1, 0, 0, 1',
+                            '    Rectangle:',
+                            '        pos: self.pos',
+                            '        size: self.size'])
+            assert_equal(self.render(), [(200, 100), (100, 200)])
+        self.edit_rule(['canvas.after:',
+                        '    Color:',
+                        '        rgba: 0, 1, 0, 1'])
+        assert_equal(self.render(), [(200, 100), (100, 200)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+'''
+File responsible for testing the headless check of the project files
+'''
+import os
+import shutil
+import tempfile
+import unittest
+
+from nose.tools import assert_equal
+
+from designer.core.project_checker import check_projects
+
+
+FILES = {
+    'main.py': 'from kivy.uix.boxlayout import BoxLayout\n\n\n'
+               'class Root(BoxLayout):\n    pass\n',
+    'root.kv': '<Root>:\n    Button:\n        on_press: app.go()\n',
+    'broken.py': 'def broken(:\n',
+    'broken.kv': '<Broken>:\n    text: (1\n',
+    'README.md': 'not checked',
+}
+
+
+class ProjectCheckerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        for name, content in FILES.items():
+            with open(os.path.join(self.dir, name), 'w') as f:
+                f.write(content)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def check(self, jobs):
+        report = check_projects([self.dir], jobs=jobs)
+        assert_equal(report['ok'], False)
+        files = dict((r['path'], r) for r in report['projects'][0]['files'])
+        assert_equal(sorted(files),
+                     ['broken.kv', 'broken.py', 'main.py', 'root.kv'])
+        assert_equal(files['main.py']['widgets'], ['Root'])
+        assert_equal(files['root.kv']['widgets'], ['Root'])
+        assert_equal(files['root.kv']['ok'], True)
+        assert_equal(files['broken.py']['errors'][0]['type'], 'SyntaxError')
+        assert_equal(files['broken.py']['errors'][0]['line'], 1)
+        assert_equal(files['broken.kv']['ok'], False)
+
+    def test_check(self):
+        self.check(jobs=1)
+
+    def test_check_pool(self):
+        self.check(jobs=2)
+
+
+if __name__ == '__main__':
+    unittest.main()
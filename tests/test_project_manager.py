@@ -0,0 +1,140 @@
+'''
+File responsible for testing the projects kept loaded by the ProjectManager
+'''
+import os
+import unittest
+
+from nose.tools import assert_equal
+
+from designer.core.project_modules import project_modules
+from designer.core.symbol_index import SymbolIndex
+from designer.uix.code_input import DesignerCodeInput
+from designer.utils import trace
+from designer.utils.worker import Job
+
+from tests.helpers import DesignerTestCase
+
+PY = '''from kivy.uix.boxlayout import BoxLayout
+
+
+class KDTestProject%(n)s(BoxLayout):
+    pass
+'''
+KV = '''KDTestProject%(n)s:
+    Button:
+        text: 'project %(n)s'
+'''
+
+
+class ProjectManagerTest(DesignerTestCase):
+
+    def setUp(self):
+        super(ProjectManagerTest, self).setUp()
+        self.manager = self.designer.project_manager
+        self.manager.max_projects = 2
+
+    def tearDown(self):
+        for project in self.manager.projects.values():
+            project.unload()
+        super(ProjectManagerTest, self).tearDown()
+
+    def create(self, n, name=None, widget=None):
+        name = name or 'project%s' % n
+        path = os.path.join(self.dir, 'dir%s' % n)
+        os.mkdir(path)
+        for ext, src in (('.py', PY), ('.kv', KV)):
+            with open(os.path.join(path, name + ext), 'w') as f:
+                f.write(src % {'n': n if widget is None else widget})
+        return path
+
+    def test_reopen(self):
+        p0, p1 = self.create(0), self.create(1)
+        project = self.manager.open_project(p0)
+        root = project.app_widgets['KDTestProject0'].instance
+        self.manager.open_project(p1)
+        assert_equal(project.is_parsed(), True)
+        self.manager.open_project(p0)
+        assert project.app_widgets['KDTestProject0'].instance is root
+
+        # modified files are parsed again
+        with open(os.path.join(p0, 'project0.kv'), 'a') as f:
+            f.write('\n')
+        self.manager.open_project(p0)
+        assert project.app_widgets['KDTestProject0'].instance is not root
+
+    def test_evict(self):
+        paths = [self.create(n) for n in range(3)]
+        for path in paths:
+            self.manager.open_project(path)
+        assert_equal(sorted(self.manager.projects), paths[1:])
+        assert_equal(project_modules.is_loaded(paths[0]), False)
+        assert_equal(project_modules.is_loaded(paths[1]), True)
+
+        self.manager.max_projects_size = 1
+        self.manager.evict_projects()
+        assert_equal(list(self.manager.projects), paths[2:])
+
+    def test_same_file_names(self):
+        p0, p1 = self.create(0, name='main'), self.create(1, name='main')
+        project = self.manager.open_project(p0)
+        other = self.manager.open_project(p1)
+        assert_equal(project.is_parsed(), True)
+        assert_equal(other.is_parsed(), True)
+        assert 'KDTestProject0' in project.app_widgets
+        assert 'KDTestProject1' in other.app_widgets
+
+    def test_conflict(self):
+        p0, p1 = self.create(0), self.create(1, widget=0)
+        project = self.manager.open_project(p0)
+        self.manager.open_project(p1)
+        assert_equal(project.is_parsed(), False)
+        assert_equal(project_modules.is_loaded(p0), False)
+
+    def test_introspection(self):
+        jobs = []
+
+        def submit(func, *args, **kwargs):
+            jobs.append(Job(func, args, on_result=kwargs['on_result']))
+            return jobs[-1]
+
+        class FakeIntrospection(object):
+            def introspect(self, project_path, paths):
+                return [{'path': path, 'widgets': ['KDTestProject0'],
+                         'error': None} for path in paths]
+
+        self.designer.io_worker.submit = submit
+        self.manager.introspection = FakeIntrospection()
+        opened = []
+        project = self.manager.open_project(self.create(0),
+                                            on_opened=opened.append)
+        # introspected in background
+        assert_equal(opened, [])
+        assert_equal(project.is_parsed(), False)
+        job = jobs[0]
+        job.on_result(job, job.func(*job.args))
+        assert_equal(opened, [project])
+        assert_equal(project.is_parsed(), True)
+        assert 'KDTestProject0' in project.app_widgets
+
+    def test_saved_while_modified(self):
+        p0 = self.create(0)
+        project = self.manager.open_project(p0)
+        self.designer.symbol_index = SymbolIndex()
+        path = os.path.join(p0, 'project0.py')
+        saved = DesignerCodeInput(path=path)
+        saved.text = u'saved'
+        edited = DesignerCodeInput(path=path + '3')
+        edited.text = u'edited'
+        saved.saved = edited.saved = False
+        results = []
+        project._on_saved(
+            [(saved, saved.path, u'saved'), (edited, edited.path, u'old')],
+            lambda *args: results.append(args), trace.begin('save'), None,
+            ({saved.path: 'a', edited.path: 'b'}, [saved.path]))
+        assert_equal(results, [(True, [edited.path])])
+        assert_equal((saved.saved, edited.saved), (True, False))
+        assert_equal(project.saved, False)
+
+
+if __name__ == '__main__':
+    unittest.main()
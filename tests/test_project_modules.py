@@ -0,0 +1,89 @@
+'''
+File responsible for testing the unloading of the modules, Factory classes
+and kv rules of the projects
+'''
+import gc
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+from nose.tools import assert_equal
+
+from designer.core.project_manager import load_py
+from designer.core.project_modules import ProjectModules
+from kivy.factory import Factory
+from kivy.lang import Builder
+
+PY = '''from kivy.uix.widget import Widget
+
+
+class KDTestWidget%s(Widget):
+    pass
+'''
+KV = '''<KDTestRule@Widget>:
+    size_hint: None, None
+'''
+NAME = 'KDImportTestModule'
+
+
+class ProjectModulesTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, 'widgets.py')
+        self.modules = ProjectModules()
+
+    def tearDown(self):
+        self.modules.unload('project')
+        shutil.rmtree(self.dir)
+
+    def load(self, version):
+        with open(self.path, 'w') as f:
+            f.write(PY % version)
+        self.modules.unload_module('project', NAME)
+        self.modules.add_module('project', NAME, load_py(self.path, NAME))
+
+    def test_modules(self):
+        self.load('')
+        old_cls = Factory.get('KDTestWidget')
+        self.load('')
+        assert Factory.get('KDTestWidget') is not old_cls
+        self.load('2')
+        assert_equal('KDTestWidget' in Factory.classes, False)
+        report = self.modules.report()
+        assert_equal(report['owners']['project']['classes'], 1)
+        assert_equal(report['retained'], [])
+
+        retained = sys.modules[NAME]
+        self.modules.unload('project')
+        assert_equal(NAME in sys.modules, False)
+        assert_equal('KDTestWidget2' in Factory.classes, False)
+        report = self.modules.report()
+        assert_equal(report['owners'], {})
+        assert_equal([r['module'] for r in report['retained']], [NAME])
+        del retained
+        assert_equal(self.modules.report()['retained'], [])
+
+    def test_unloaded_modules(self):
+        for _ in range(10):
+            self.load('')
+            gc.collect()
+        # only the last unloaded module may still be referenced
+        assert len(self.modules._unloaded) <= 1
+
+    def test_kv_files(self):
+        Builder.load_string(KV, filename='kd_test.kv')
+        self.modules.add_kv_file('project', 'kd_test.kv')
+        self.modules.add_kv_file('other', 'kd_test.kv')
+        self.modules.unload('other')
+        assert_equal('KDTestRule' in Factory.classes, True)
+        self.modules.unload('project')
+        assert_equal('KDTestRule' in Factory.classes, False)
+        assert_equal([r for r in Builder.rules
+                      if r[1].ctx.filename == 'kd_test.kv'], [])
+
+
+if __name__ == '__main__':
+    unittest.main()
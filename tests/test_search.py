@@ -0,0 +1,133 @@
+'''
+File responsible for testing the search tools from designer/core/search.py
+'''
+import os
+import shutil
+import tempfile
+import unittest
+
+from nose.tools import assert_equal
+
+from designer.core.file_writer import file_hash
+from designer.core.search import (
+    BufferSearch,
+    ProjectSearch,
+    compile_pattern,
+    search_text,
+)
+
+
+TEXT = u'''from kivy.app import App
+from kivy.uix.button import Button
+
+
+class TestApp(App):
+    def build(self):
+        return Button(text='Button')
+'''
+
+
+class BufferSearchTest(unittest.TestCase):
+
+    def setUp(self):
+        self.search = BufferSearch(TEXT)
+
+    def test_find_all(self):
+        assert_equal(self.search.count('button'), 4)
+        assert_equal(self.search.count('button', case=True), 1)
+        assert_equal(self.search.count(r'\bApp\b', use_regex=True), 3)
+        assert_equal(self.search.count('(', use_regex=True), 0)
+
+    def test_find_next_prev(self):
+        first = TEXT.find('kivy')
+        second = TEXT.find('kivy', first + 1)
+        assert_equal(self.search.find_next(first + 1, 'kivy'),
+                     (second, second + 4))
+        assert_equal(self.search.find_prev(first, 'kivy'),
+                     (second, second + 4))
+        assert_equal(self.search.find_next(second + 1, 'kivy', wrap=False),
+                     None)
+
+    def test_update(self):
+        text = TEXT.replace('class TestApp', 'import os\n\nclass TestApp')
+        self.search.update(text)
+        assert_equal(self.search.line_count, text.count('\n') + 1)
+        offset = text.find('class')
+        assert_equal(self.search.line_col(offset),
+                     (text[:offset].count('\n'), 0))
+        assert_equal(self.search.find_next(0, 'import os'),
+                     (text.find('import os'), text.find('import os') + 9))
+
+
+class ProjectSearchTest(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.files = []
+        for name in ('main.py', 'other.py'):
+            path = os.path.join(self.path, name)
+            with open(path, 'w') as f:
+                f.write(TEXT)
+            self.files.append(path)
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def test_search_text(self):
+        matches = search_text(TEXT, compile_pattern('Button', case=True))
+        assert_equal([m.line for m in matches], [1, 6, 6])
+        assert_equal(matches[0].text, 'from kivy.uix.button import Button')
+        assert_equal(TEXT[matches[1].start:matches[1].end], 'Button')
+
+    def test_replace_files(self):
+        search = ProjectSearch()
+        written = {}
+        counts = search.replace_files(
+            self.files, compile_pattern('App', case=True, whole_word=True),
+            'MyApp', on_write=written.__setitem__)
+        assert_equal(counts, {self.files[0]: 2, self.files[1]: 2})
+        assert_equal(written, dict((path, file_hash(path))
+                                   for path in self.files))
+        with open(self.files[0]) as f:
+            assert_equal(f.read(), TEXT.replace('(App)', '(MyApp)')
+                         .replace('import App', 'import MyApp'))
+        assert_equal(sorted(os.listdir(self.path)), ['main.py', 'other.py'])
+
+    def test_replace_files_failed(self):
+        def on_write(path, digest):
+            if path == self.files[1]:
+                raise OSError('replace failed')
+
+        search = ProjectSearch()
+        with self.assertRaises(OSError):
+            search.replace_files(self.files, compile_pattern('App'), 'MyApp',
+                                 on_write=on_write)
+        # the first file, already replaced, is restored
+        for path in self.files:
+            with open(path) as f:
+                assert_equal(f.read(), TEXT)
+        assert_equal(sorted(os.listdir(self.path)), ['main.py', 'other.py'])
+
+    def test_replace_files_line_breaks(self):
+        data = TEXT.replace(u'\n', u'\r\n').encode('utf-8')
+        for path in self.files:
+            with open(path, 'wb') as f:
+                f.write(data)
+
+        def on_write(path, digest):
+            if path == self.files[1]:
+                raise OSError('replace failed')
+
+        search = ProjectSearch()
+        with self.assertRaises(OSError):
+            search.replace_files(self.files, compile_pattern('App'), 'MyApp',
+                                 on_write=on_write)
+        # restored to the same bytes
+        for path in self.files:
+            with open(path, 'rb') as f:
+                assert_equal(f.read(), data)
+
+        search.replace_files(self.files, compile_pattern('App', case=True),
+                             'MyApp')
+        with open(self.files[0], 'rb') as f:
+            assert_equal(f.read(), data.replace(b'App', b'MyApp'))
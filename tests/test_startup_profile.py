@@ -0,0 +1,41 @@
+'''
+File responsible for testing the startup timeline of --profile-startup
+'''
+import unittest
+
+from io import StringIO
+from nose.tools import assert_equal
+
+from designer.utils import startup_profile
+
+
+class StartupProfileTest(unittest.TestCase):
+
+    def tearDown(self):
+        startup_profile.disable()
+
+    def test_disabled(self):
+        with startup_profile.span('nothing'):
+            pass
+        stream = StringIO()
+        startup_profile.report(stream)
+        assert_equal(stream.getvalue(), '')
+
+    def test_report(self):
+        startup_profile.enable()
+        with startup_profile.span('outer'):
+            with startup_profile.span('inner'):
+                pass
+        startup_profile.mark('done')
+        stream = StringIO()
+        startup_profile.report(stream)
+        assert_equal(startup_profile.enabled, False)
+        lines = stream.getvalue().splitlines()
+        assert_equal(lines[1].endswith('  outer'), True)
+        assert_equal(lines[2].endswith('    inner'), True)
+        assert_equal(lines[3].endswith('  done'), True)
+        assert_equal(lines[-1].startswith('Total:'), True)
+
+
+if __name__ == '__main__':
+    unittest.main()
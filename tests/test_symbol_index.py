@@ -0,0 +1,77 @@
+'''
+File responsible for testing the project symbol index
+'''
+import unittest
+
+from nose.tools import assert_equal
+
+from designer.core.symbol_index import (
+    KV_ID,
+    KV_RULE,
+    PY_CLASS,
+    PY_METHOD,
+    SymbolIndex,
+    parse_kv_symbols,
+    parse_py_symbols,
+)
+
+
+KV = u'''<MyWidget>:
+    Button:
+        id: btn
+        on_press: root.do_something()
+
+<Item@Label>:
+    text: 'item'
+
+MyWidget:
+'''
+
+PY = u'''from kivy.uix.boxlayout import BoxLayout
+
+
+class MyWidget(BoxLayout):
+    def do_something(self):
+        pass
+'''
+
+
+class SymbolIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.index = SymbolIndex()
+        self.index.update_text('/p/main.kv', KV)
+        self.index.update_text('/p/main.py', PY)
+
+    def test_parse(self):
+        kv = [(s.kind, s.name, s.line) for s in
+              parse_kv_symbols('main.kv', KV)]
+        assert_equal(kv, [('kv_rule', 'MyWidget', 0), ('kv_id', 'btn', 2),
+                          ('kv_handler', 'on_press', 3),
+                          ('kv_dynamic_class', 'Item', 5),
+                          ('kv_root_rule', 'MyWidget', 8)])
+        py = [(s.kind, s.name, s.line, s.parent) for s in
+              parse_py_symbols('main.py', PY)]
+        assert_equal(py, [('py_class', 'MyWidget', 3, None),
+                          ('py_method', 'do_something', 4, 'MyWidget')])
+        assert_equal(parse_py_symbols('main.py', u'class ('), [])
+
+    def test_definition(self):
+        symbol = self.index.definition('MyWidget', '/p/main.kv', 0)
+        assert_equal((symbol.kind, symbol.path), (PY_CLASS, '/p/main.py'))
+        symbol = self.index.definition('do_something', '/p/main.kv', 3)
+        assert_equal((symbol.kind, symbol.line), (PY_METHOD, 4))
+        symbol = self.index.definition('MyWidget', '/p/main.py', 3)
+        assert_equal((symbol.kind, symbol.path), (KV_RULE, '/p/main.kv'))
+        symbol = self.index.definition('btn', '/p/main.kv', 3)
+        assert_equal((symbol.kind, symbol.line), (KV_ID, 2))
+        assert_equal(self.index.definition('btn', '/p/other.kv'), None)
+
+    def test_update(self):
+        self.index.update_text('/p/main.py', PY.replace('MyWidget', 'Other'))
+        assert_equal(self.index.lookup('MyWidget', (PY_CLASS, )), [])
+        assert_equal([s.path for s in self.index.lookup('Other')],
+                     ['/p/main.py'])
+        self.index._set_file_symbols('/p/main.kv', None)
+        assert_equal(self.index.lookup('btn'), [])
+        assert_equal(self.index.lookup('MyWidget'), [])
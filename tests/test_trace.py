@@ -0,0 +1,83 @@
+'''
+File responsible for testing the trace recorder and its Chrome trace export
+'''
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from nose.tools import assert_equal
+
+from designer.utils import trace
+
+
+class TraceTest(unittest.TestCase):
+
+    def setUp(self):
+        trace.clear()
+
+    def tearDown(self):
+        trace.disable()
+        trace.clear()
+
+    def test_disabled(self):
+        with trace.span('nothing'):
+            pass
+        trace.counter('nothing', value=1)
+        assert_equal(trace.events(), [])
+        assert_equal(trace.last_duration('nothing'), None)
+
+    def test_span(self):
+        trace.enable()
+
+        @trace.traced('traced')
+        def func(value):
+            return value * 2
+
+        with trace.span('outer', files=2):
+            assert_equal(func(2), 4)
+        trace.counter('files', kv=1, py=2)
+        events = trace.events()
+        assert_equal([(e['name'], e['ph']) for e in events],
+                     [('traced', 'X'), ('outer', 'X'), ('files', 'C')])
+        assert_equal(events[1]['args'], {'files': 2})
+        assert_equal(events[2]['args'], {'kv': 1, 'py': 2})
+        assert_equal(trace.last_duration('outer') >= 0, True)
+
+    def test_begin(self):
+        save_span = trace.begin('save')
+        trace.enable()
+        trace.begin('unused')
+        started = trace.begin('save', files=1)
+        save_span.end()
+        assert_equal(trace.events(), [])
+        started.end()
+        events = trace.events()
+        assert_equal([(e['name'], e['args']) for e in events],
+                     [('save', {'files': 1})])
+
+    def test_ring_buffer(self):
+        trace.enable(capacity=3)
+        for i in range(5):
+            trace.counter('count', value=i)
+        assert_equal([e['args']['value'] for e in trace.events()], [2, 3, 4])
+        trace.enable(capacity=trace.DEFAULT_CAPACITY)
+
+    def test_export(self):
+        trace.enable()
+        with trace.span('span'):
+            pass
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, 'trace.json')
+            assert_equal(trace.export(path), 1)
+            with open(path) as f:
+                data = json.load(f)
+            assert_equal(data['traceEvents'][0]['name'], 'span')
+        finally:
+            shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,14 +2,24 @@
 This file is responsible for testing custom UIX from designer/uix/*
 '''
 
+import os
+import tempfile
 import unittest
 
 from nose.tools import assert_equal
 from nose.tools import assert_not_equal
 
 from designer.components.kivy_console import KivyConsole
+from designer.core.symbol_index import PY_CLASS, Symbol
+from designer.uix import code_input, large_file_view
 from designer.uix.action_items import ActionCheckButton
+from designer.uix.code_input import DesignerCodeInput
+from designer.uix.large_file_view import LargeFileView
 from designer.uix.settings import SettingListCheckItem
+from designer.uix.texture_cache import WidgetTextureCache
+from designer.utils.worker import Job
+from kivy.uix.button import Button
+from kivy.uix.floatlayout import FloatLayout
 
 
 class UIXTest(unittest.TestCase):
@@ -50,6 +60,108 @@ class UIXTest(unittest.TestCase):
         check2.item_check._toggle_active()
         assert_not_equal(check1.active, check2.active)
 
+    def test_WidgetTextureCache(self):
+        parent = FloatLayout()
+        widget = Button(size_hint=(None, None), size=(50, 40))
+        parent.add_widget(widget)
+        cache = WidgetTextureCache(widget)
+
+        cache.hold()
+        assert_equal(cache.active, True)
+        assert_equal(parent.canvas.indexof(widget.canvas), -1)
+        assert_equal(cache._fbo.texture.size, (50, 40))
+        cache.release()
+        assert_equal(cache.active, False)
+        assert_not_equal(parent.canvas.indexof(widget.canvas), -1)
+        assert_equal(len(parent.canvas.children), 1)
+
+        # a widget without parent is not cached
+        parent.remove_widget(widget)
+        cache.hold()
+        assert_equal(cache.active, False)
+
+    def test_DesignerCodeInput_refresh(self):
+        code = DesignerCodeInput()
+        code.text = 'a\nb'
+        for text in ('a\nb\nc', 'a\nb\nc\n', 'x\na\nb\nc',
+                     'x = """\na\nb\nc', 'x = 1\na\nb\nc', 'a', '',
+                     # lines that only change by their newline flag
+                     '\nx', 'c\n\nx', 'c\nx', '\n\nx', 'x'):
+            code.text = text
+            assert_equal(code.text, text)
+            assert_equal(code._lines, text.split('\n'))
+            # the same lines and textures as a full refresh
+            full = DesignerCodeInput()
+            full._refresh_text(text)
+            assert_equal(code._lines, full._lines)
+            assert_equal(code._lines_flags, full._lines_flags)
+            assert_equal(code._lines_labels, full._lines_labels)
+
+    def test_DesignerCodeInput_row_offsets(self):
+        code = DesignerCodeInput(size_hint=(None, None), size=(400, 400))
+        code.text = 'aaaa bbbb cccc dddd\nb'
+        assert_equal(code._get_row_offsets(), [0, 20])
+        # wrapped again without a text change
+        code.width = 60
+        code._refresh_text(code.text)
+        offsets = code._get_row_offsets()
+        assert_equal(len(offsets), len(code._lines))
+        assert_equal(offsets[-1], 20)
+
+    def test_DesignerCodeInput_go_to_definition(self):
+        lines = []
+
+        class FakeIndex(object):
+            def definition(self, name, path, line):
+                lines.append(line)
+                return Symbol(PY_CLASS, name, path, 0, 0, None, ())
+
+        class FakeDesigner(object):
+            symbol_index = FakeIndex()
+
+        self.addCleanup(setattr, code_input, 'get_designer',
+                        code_input.get_designer)
+        code_input.get_designer = FakeDesigner
+        code = DesignerCodeInput(size_hint=(None, None), size=(60, 400))
+        code.text = 'aaaa bbbb cccc dddd\nFoo'
+        code.cursor = (1, len(code._lines) - 1)
+        assert_not_equal(code.cursor_row, 1)
+        code.go_to_definition()
+        # the line of the text, not the row displayed
+        assert_equal(lines, [1])
+
+    def test_LargeFileView_close(self):
+        jobs = []
+
+        class FakeWorker(object):
+            def submit(self, func, on_result=None):
+                jobs.append(Job(func, on_result=on_result))
+                return jobs[-1]
+
+        class FakeDesigner(object):
+            io_worker = FakeWorker()
+
+        self.addCleanup(setattr, large_file_view, 'get_designer',
+                        large_file_view.get_designer)
+        large_file_view.get_designer = FakeDesigner
+        fd, path = tempfile.mkstemp()
+        os.write(fd, b'a\nb\n')
+        os.close(fd)
+        self.addCleanup(os.remove, path)
+
+        view = LargeFileView()
+        view.open(path)
+        view.open(path)
+        # the result of the first job is stale
+        assert_equal(jobs[0].cancelled, True)
+        view._on_indexed(jobs[0], 5)
+        assert_equal(view.line_count, 0)
+        jobs[1].run()
+        view._on_indexed(jobs[1], jobs[1].result)
+        assert_equal(view.line_count, 2)
+        view.close()
+        assert_equal(view.loading, False)
+
     def test_KivyConsole(self):
         kc = KivyConsole()
         h = kc.txtinput_history_box
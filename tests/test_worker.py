@@ -0,0 +1,100 @@
+'''
+File responsible for testing the background workers
+'''
+import threading
+import time
+import unittest
+
+from nose.tools import assert_equal
+
+from designer.utils import worker
+from designer.utils.worker import Worker, current_job
+from kivy.clock import Clock
+
+
+class ImmediateClock(object):
+    '''Calls the callbacks when they are scheduled, in the worker thread
+    '''
+
+    @staticmethod
+    def schedule_once(callback, timeout=0):
+        callback(0)
+
+
+def fail():
+    raise ValueError('failed')
+
+
+def wait_cancelled(started):
+    job = current_job()
+    started.set()
+    while not job.cancelled:
+        time.sleep(0.01)
+    return 'cancelled'
+
+
+class WorkerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.worker = Worker(name='Test')
+        self.block = threading.Event()
+
+    def tearDown(self):
+        self.block.set()
+        self.worker.stop()
+
+    def test_submit(self):
+        job = self.worker.submit(lambda a, b=0: a + b, 1, b=2)
+        assert_equal(job.wait(5), 3)
+        assert_equal(job.done, True)
+
+    def test_key(self):
+        self.worker.submit(self.block.wait, 5)
+        first = self.worker.submit(lambda: 1, key='request')
+        second = self.worker.submit(lambda: 2, key='request')
+        assert_equal(first.cancelled, True)
+        self.block.set()
+        assert_equal(second.wait(5), 2)
+        assert_equal(first.wait(5), None)
+
+        pending = self.worker.submit(self.block.wait, 5, key='pending')
+        pending.wait(5)
+        assert_equal(self.worker.cancel('pending'), False)
+        assert_equal(self.worker.cancel('unknown'), False)
+
+    def test_cancel(self):
+        self.worker.submit(self.block.wait, 5)
+        pending = self.worker.submit(lambda: 1, key='pending')
+        assert_equal(self.worker.cancel('pending'), True)
+        self.block.set()
+        assert_equal(pending.wait(5), None)
+
+        started = threading.Event()
+        running = self.worker.submit(wait_cancelled, started)
+        queued = self.worker.submit(lambda: 1)
+        started.wait(5)
+        self.worker.cancel_all()
+        assert_equal(running.wait(5), 'cancelled')
+        assert_equal(queued.cancelled, True)
+
+    def test_on_error(self):
+        worker.Clock = ImmediateClock
+        self.addCleanup(setattr, worker, 'Clock', Clock)
+        errors = []
+        results = []
+        delivered = threading.Event()
+
+        def on_error(job, error):
+            errors.append(str(error))
+            delivered.set()
+        job = self.worker.submit(
+            fail, on_result=lambda job, result: results.append(result),
+            on_error=on_error)
+        delivered.wait(5)
+        assert_equal(errors, ['failed'])
+        assert_equal(results, [])
+        assert_equal(str(job.error), 'failed')
+
+
+if __name__ == '__main__':
+    unittest.main()